@@ -1,13 +1,17 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy import and_
+from sqlalchemy import and_, delete, select
 from sqlalchemy.exc import IntegrityError
-from app.models.database_models import User, TrainingProfile, ActiveSession, Course, UserCourseProgress, Training, SavedProgram, TrainingProgress, TrainingSchedule
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database_models import User, TrainingProfile, ActiveSession, RevokedToken, Course, UserCourseProgress, Training, SavedProgram, TrainingProgress, TrainingSchedule
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import uuid
 import psycopg2.errors
+from app import search_index
+from app import session_cache
+from app import token_revocation
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -86,6 +90,7 @@ def update_user_profile(db: Session, user_id: int, username: Optional[str] = Non
     user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(user)
+    session_cache.invalidate_user(user_id)
     return user
 
 
@@ -97,6 +102,7 @@ def change_user_password(db: Session, user_id: int, new_password: str) -> bool:
     user.hashed_password = pwd_context.hash(new_password)
     user.updated_at = datetime.utcnow()
     db.commit()
+    session_cache.invalidate_user(user_id)
     return True
 
 
@@ -110,6 +116,7 @@ def update_user_trainer_profile(db: Session, user_id: int, trainer_profile: Dict
     user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(user)
+    session_cache.invalidate_user(user_id)
     return user
 
 
@@ -158,7 +165,8 @@ def create_active_session(db: Session, user_id: int, token: str, expires_at: dat
 
 
 def get_active_session(db: Session, token: str) -> Optional[ActiveSession]:
-    return db.query(ActiveSession).filter(
+    """Действующая сессия вместе с пользователем: один запрос по уникальному индексу token"""
+    return db.query(ActiveSession).options(joinedload(ActiveSession.user)).filter(
         and_(
             ActiveSession.token == token,
             ActiveSession.expires_at > datetime.utcnow()
@@ -166,33 +174,84 @@ def get_active_session(db: Session, token: str) -> Optional[ActiveSession]:
     ).first()
 
 
+def _revoke_session_token(db: Session, session: ActiveSession) -> Optional[str]:
+    """Удалить сессию и записать jti её токена в отозванные"""
+    jti = token_revocation.token_jti(session.token)
+    if jti and db.get(RevokedToken, jti) is None:
+        db.add(RevokedToken(jti=jti, user_id=session.user_id, expires_at=session.expires_at))
+    db.delete(session)
+    return jti
+
+
 def revoke_session(db: Session, token: str) -> bool:
     session = db.query(ActiveSession).filter(ActiveSession.token == token).first()
+    revoked = False
     if session:
-        db.delete(session)
+        jti = _revoke_session_token(db, session)
         db.commit()
-        return True
-    return False
+        token_revocation.revoke(jti)
+        revoked = True
+    # После commit: иначе параллельный запрос успеет снова закэшировать ещё не удалённую сессию
+    session_cache.invalidate_token(token)
+    return revoked
 
 
 def revoke_user_sessions(db: Session, user_id: int) -> int:
     sessions = db.query(ActiveSession).filter(ActiveSession.user_id == user_id).all()
     count = len(sessions)
-    for session in sessions:
-        db.delete(session)
+    jtis = [_revoke_session_token(db, session) for session in sessions]
     db.commit()
+    for jti in jtis:
+        token_revocation.revoke(jti)
+    session_cache.invalidate_user(user_id)
     return count
 
 
-def cleanup_expired_sessions(db: Session) -> int:
-    expired_sessions = db.query(ActiveSession).filter(
-        ActiveSession.expires_at <= datetime.utcnow()
-    ).all()
-    count = len(expired_sessions)
-    for session in expired_sessions:
-        db.delete(session)
-    db.commit()
-    return count
+def is_token_revoked(db: Session, jti: str) -> bool:
+    return db.get(RevokedToken, jti) is not None
+
+
+def get_revoked_token_ids(db: Session) -> List[str]:
+    """jti отозванных токенов, срок действия которых ещё не истёк"""
+    rows = db.query(RevokedToken.jti).filter(RevokedToken.expires_at > datetime.utcnow()).all()
+    return [jti for (jti,) in rows]
+
+
+def _delete_expired(db: Session, model, key_column, batch_size: int) -> int:
+    """
+    Удалить строки с истёкшим expires_at пакетами по batch_size строк.
+
+    Каждый пакет - один DELETE по индексу expires_at в отдельной короткой
+    транзакции, строки не загружаются в Python.
+    """
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        expired_keys = (
+            select(key_column)
+            .where(model.expires_at <= now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(model)
+            .where(key_column.in_(expired_keys))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def cleanup_expired_sessions(db: Session, batch_size: int = 1000) -> int:
+    """Удалить истёкшие сессии пакетами по batch_size строк"""
+    return _delete_expired(db, ActiveSession, ActiveSession.id, batch_size)
+
+
+def cleanup_revoked_tokens(db: Session, batch_size: int = 1000) -> int:
+    """Удалить записи об отозванных токенах, срок действия которых истёк"""
+    return _delete_expired(db, RevokedToken, RevokedToken.jti, batch_size)
 
 
 def get_user_active_sessions(db: Session, user_id: int) -> List[ActiveSession]:
@@ -353,6 +412,7 @@ def create_training(db: Session, training_data: dict, user_id: int):
         db.add(db_training)
         db.commit()
         db.refresh(db_training)
+        search_index.upsert_training(db_training)
         return db_training
     except IntegrityError as e:
         db.rollback()
@@ -392,6 +452,8 @@ def update_training(db: Session, training_id: str, training_data: Dict[str, Any]
     training.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(training)
+    # Иначе поиск продолжит находить программу по старому описанию
+    search_index.upsert_training(training)
     return training
 
 
@@ -403,6 +465,7 @@ def delete_training(db: Session, training_id: str) -> bool:
     
     db.delete(training)
     db.commit()
+    search_index.delete_trainings([training_id])
     return True
 
 
@@ -788,4 +851,320 @@ def debug_all_schedules(db: Session) -> None:
         for item in all_schedules:
             print(f"   - ID: {item.id}, User: {item.user_id}, Date: '{item.date}', Course: {item.course_id}, Index: {item.training_index}")
     else:
-        print(f"❌ No records found in training_schedule table") 
\ No newline at end of file
+        print(f"❌ No records found in training_schedule table") 
+
+
+# ===== ASYNC CRUD FUNCTIONS (AsyncSession) =====
+# Async equivalents for the hot routes; they take the session from get_async_db
+# (an AsyncSession or the sync fallback SyncAsyncSession) and never lazy-load relationships.
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+
+async def get_training_profile_async(db: AsyncSession, user_id: int) -> Optional[TrainingProfile]:
+    return await db.scalar(select(TrainingProfile).where(TrainingProfile.user_id == user_id).limit(1))
+
+
+async def get_training_by_course_id_async(db: AsyncSession, course_id: str) -> Optional[Training]:
+    """Получить тренировку по course_id"""
+    training = await db.scalar(select(Training).where(Training.course_id == course_id).limit(1))
+    if not training:
+        print(f"⚠️ Training with course_id '{course_id}' not found in database")
+    return training
+
+
+async def get_trainings_summary_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Training]:
+    """Получить список всех тренировок с краткой информацией"""
+    return list((await db.scalars(select(Training).offset(skip).limit(limit))).all())
+
+
+async def search_trainings_async(db: AsyncSession, query: str, skip: int = 0, limit: int = 100) -> List[Training]:
+    """Поиск тренировок по названию курса"""
+    search_filter = f"%{query}%"
+    statement = select(Training).where(Training.course_title.ilike(search_filter)).offset(skip).limit(limit)
+    return list((await db.scalars(statement)).all())
+
+
+async def get_trainings_by_user_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Training]:
+    """Получить тренировки конкретного пользователя"""
+    statement = select(Training).where(Training.user_id == user_id).offset(skip).limit(limit)
+    return list((await db.scalars(statement)).all())
+
+
+async def get_available_course_ids_async(db: AsyncSession) -> List[str]:
+    """Получить список всех доступных course_id"""
+    return list((await db.scalars(select(Training.course_id))).all())
+
+
+# Saved Programs
+async def save_program_for_user_async(db: AsyncSession, user_id: int, training_id: int) -> Optional[SavedProgram]:
+    """Сохранить программу для пользователя"""
+    existing = await db.scalar(select(SavedProgram).where(
+        and_(SavedProgram.user_id == user_id, SavedProgram.training_id == training_id)
+    ).limit(1))
+    if existing:
+        return existing  # Уже сохранена
+
+    if await db.get(Training, training_id) is None:
+        return None
+
+    try:
+        saved_program = SavedProgram(user_id=user_id, training_id=training_id)
+        db.add(saved_program)
+        await db.commit()
+        await db.refresh(saved_program)
+        return saved_program
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+
+async def unsave_program_for_user_async(db: AsyncSession, user_id: int, training_id: int) -> bool:
+    """Удалить программу из сохраненных для пользователя"""
+    result = await db.execute(delete(SavedProgram).where(
+        and_(SavedProgram.user_id == user_id, SavedProgram.training_id == training_id)
+    ))
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def get_saved_programs_for_user_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Training]:
+    """Получить все сохраненные программы для пользователя (один запрос с JOIN)"""
+    statement = (
+        select(Training)
+        .join(SavedProgram, SavedProgram.training_id == Training.id)
+        .where(SavedProgram.user_id == user_id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list((await db.scalars(statement)).all())
+
+
+async def is_program_saved_by_user_async(db: AsyncSession, user_id: int, training_id: int) -> bool:
+    """Проверить, сохранена ли программа пользователем"""
+    saved_id = await db.scalar(select(SavedProgram.id).where(
+        and_(SavedProgram.user_id == user_id, SavedProgram.training_id == training_id)
+    ).limit(1))
+    return saved_id is not None
+
+
+# Training Progress
+async def get_training_progress_async(db: AsyncSession, user_id: int, training_id: int) -> Optional[TrainingProgress]:
+    """Получить прогресс пользователя по конкретной тренировке"""
+    return await db.scalar(select(TrainingProgress).where(
+        and_(TrainingProgress.user_id == user_id, TrainingProgress.training_id == training_id)
+    ).limit(1))
+
+
+async def get_or_create_training_progress_async(db: AsyncSession, user_id: int, training: Training) -> TrainingProgress:
+    """Получить или создать прогресс пользователя по тренировке"""
+    progress = await get_training_progress_async(db, user_id, training.id)
+    if progress:
+        return progress
+
+    total_items = len(training.training_plan) if training.training_plan else 0
+    progress = TrainingProgress(
+        user_id=user_id,
+        training_id=training.id,
+        completed_items=[],
+        total_items=total_items,
+        progress_percentage=0.0
+    )
+
+    try:
+        db.add(progress)
+        await db.commit()
+        await db.refresh(progress)
+        print(f"🆕 Created new progress: user {user_id}, training {training.id}, total_items: {total_items}")
+        return progress
+    except IntegrityError as e:
+        await db.rollback()
+        print(f"⚠️ Integrity error creating progress, fetching existing: {e}")
+        existing_progress = await get_training_progress_async(db, user_id, training.id)
+        if existing_progress:
+            return existing_progress
+        raise ValueError(f"Failed to create or find progress for user {user_id}, training {training.id}")
+
+
+async def update_training_progress_async(db: AsyncSession, user_id: int, training: Training, item_number: int) -> TrainingProgress:
+    """Обновить прогресс пользователя - пометить item как выполненный"""
+    total_items = len(training.training_plan) if training.training_plan else 0
+
+    # Валидация номера item (items нумеруются с 0)
+    if item_number < 0 or item_number >= total_items:
+        raise ValueError(f"Item number {item_number} is invalid. Must be between 0 and {total_items - 1}")
+
+    progress = await get_or_create_training_progress_async(db, user_id, training)
+
+    completed_items = list(progress.completed_items) if progress.completed_items else []
+    if item_number not in completed_items:
+        completed_items.append(item_number)
+        completed_items.sort()
+
+        progress.completed_items = completed_items[:]
+        progress.last_completed_item = item_number
+        progress.total_items = total_items
+        progress.progress_percentage = (len(completed_items) / total_items) * 100.0 if total_items > 0 else 0.0
+        progress.last_updated = datetime.utcnow()
+        flag_modified(progress, "completed_items")
+
+        try:
+            await db.commit()
+            await db.refresh(progress)
+            print(f"✅ Progress updated: user {user_id}, training {training.id}, item {item_number}, progress: {progress.progress_percentage:.1f}%")
+        except Exception as e:
+            await db.rollback()
+            print(f"❌ Error saving progress: {e}")
+            raise
+
+    return progress
+
+
+async def get_training_progress_by_course_id_async(db: AsyncSession, user_id: int, course_id: str) -> Optional[TrainingProgress]:
+    """Получить прогресс пользователя по course_id тренировки (один запрос с JOIN)"""
+    return await db.scalar(
+        select(TrainingProgress)
+        .join(Training, Training.id == TrainingProgress.training_id)
+        .where(and_(TrainingProgress.user_id == user_id, Training.course_id == course_id))
+        .limit(1)
+    )
+
+
+async def get_user_training_progresses_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[TrainingProgress]:
+    """Получить все прогрессы пользователя по тренировкам вместе с тренировками"""
+    statement = (
+        select(TrainingProgress)
+        .options(selectinload(TrainingProgress.training))
+        .where(TrainingProgress.user_id == user_id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list((await db.scalars(statement)).all())
+
+
+async def reset_training_progress_async(db: AsyncSession, user_id: int, training_id: int) -> bool:
+    """Сбросить прогресс пользователя по тренировке"""
+    progress = await get_training_progress_async(db, user_id, training_id)
+    if not progress:
+        return False
+
+    progress.completed_items = []
+    progress.progress_percentage = 0.0
+    progress.last_completed_item = None
+    progress.last_updated = datetime.utcnow()
+    flag_modified(progress, "completed_items")
+
+    try:
+        await db.commit()
+        print(f"🔄 Progress reset: user {user_id}, training {training_id}")
+        return True
+    except Exception as e:
+        await db.rollback()
+        print(f"❌ Error resetting progress: {e}")
+        raise
+
+
+# Training Schedule (Tracker)
+async def save_user_schedule_async(db: AsyncSession, user_id: int, schedule_data: List[Dict[str, Any]]) -> int:
+    """Сохранить расписание пользователя; существующие записи и неизвестные курсы пропускаются"""
+    course_ids = {item["course_id"] for item in schedule_data}
+    if not course_ids:
+        return 0
+
+    try:
+        known_courses = set((await db.scalars(
+            select(Training.course_id).where(Training.course_id.in_(course_ids))
+        )).all())
+        existing = {
+            tuple(row) for row in await db.execute(
+                select(TrainingSchedule.course_id, TrainingSchedule.date, TrainingSchedule.training_index).where(
+                    and_(TrainingSchedule.user_id == user_id, TrainingSchedule.course_id.in_(known_courses))
+                )
+            )
+        }
+
+        added_count = 0
+        for item in schedule_data:
+            if item["course_id"] not in known_courses:
+                print(f"❌ Training not found for course_id: {item['course_id']}, skipping...")
+                continue
+
+            key = (item["course_id"], item["date"].strip(), item["index"])
+            if key in existing:
+                continue
+            existing.add(key)
+            db.add(TrainingSchedule(user_id=user_id, course_id=key[0], date=key[1], training_index=key[2]))
+            added_count += 1
+
+        await db.commit()
+        print(f"✅ Added {added_count} schedule instances for user {user_id}")
+        return added_count
+
+    except Exception as e:
+        await db.rollback()
+        print(f"❌ Error saving schedule: {e}")
+        raise
+
+
+async def get_user_schedule_async(db: AsyncSession, user_id: int, course_id: Optional[str] = None) -> List[TrainingSchedule]:
+    """Получить расписание пользователя, опционально фильтруя по course_id"""
+    statement = select(TrainingSchedule).where(TrainingSchedule.user_id == user_id)
+    if course_id:
+        statement = statement.where(TrainingSchedule.course_id == course_id)
+    statement = statement.order_by(TrainingSchedule.date, TrainingSchedule.training_index)
+    return list((await db.scalars(statement)).all())
+
+
+async def get_trainings_by_date_async(db: AsyncSession, user_id: int, date: str) -> List[Dict[str, Any]]:
+    """Получить все тренировки на конкретную дату"""
+    schedule_items = (await db.scalars(select(TrainingSchedule).where(
+        and_(TrainingSchedule.user_id == user_id, TrainingSchedule.date == date.strip())
+    ))).all()
+    if not schedule_items:
+        return []
+
+    # Все тренировки дня одним запросом
+    course_ids = {item.course_id for item in schedule_items}
+    trainings_by_course = {
+        training.course_id: training
+        for training in (await db.scalars(select(Training).where(Training.course_id.in_(course_ids)))).all()
+    }
+
+    trainings = []
+    for item in schedule_items:
+        training = trainings_by_course.get(item.course_id)
+        if training and training.training_plan and 0 <= item.training_index < len(training.training_plan):
+            trainings.append({
+                "course_id": item.course_id,
+                "course_title": training.course_title,
+                "training_index": item.training_index,
+                "training_day": training.training_plan[item.training_index]
+            })
+    return trainings
+
+
+async def delete_user_schedule_async(db: AsyncSession, user_id: int, course_id: str) -> int:
+    """Удалить все расписание для конкретного курса пользователя"""
+    try:
+        result = await db.execute(delete(TrainingSchedule).where(
+            and_(TrainingSchedule.user_id == user_id, TrainingSchedule.course_id == course_id)
+        ))
+        await db.commit()
+        print(f"🗑️ Deleted {result.rowcount} schedule instances for user {user_id}, course {course_id}")
+        return result.rowcount
+    except Exception as e:
+        await db.rollback()
+        print(f"❌ Error deleting schedule: {e}")
+        raise
+
+
+async def get_user_calendar_dates_async(db: AsyncSession, user_id: int) -> List[str]:
+    """Получить все даты с тренировками для календаря пользователя"""
+    statement = (
+        select(TrainingSchedule.date)
+        .where(TrainingSchedule.user_id == user_id)
+        .distinct()
+        .order_by(TrainingSchedule.date)
+    )
+    return list((await db.scalars(statement)).all())
@@ -1,9 +1,14 @@
+from fastapi import Depends
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import URL, CursorResult, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
-import time
+import asyncio
+from typing import Optional
+
+from app.db_pool import pool_options, register_pool
 
 load_dotenv()
 
@@ -13,37 +18,18 @@ DATABASE_URL = os.getenv(
     "postgresql://uruser:urpassword@db:5432/urtraining"
 )
 
-print(f"Attempting to connect to database: {DATABASE_URL}")
-
-# Create engine based on database type
-if "postgresql://" in DATABASE_URL:
-    # PostgreSQL connection with retry logic
-    max_retries = 30
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            engine = create_engine(DATABASE_URL)
-            # Test connection
-            conn = engine.connect()
-            conn.close()
-            print("✅ Connected to PostgreSQL database successfully")
-            break
-        except Exception as e:
-            retry_count += 1
-            print(f"❌ PostgreSQL connection attempt {retry_count}/{max_retries} failed: {e}")
-            if retry_count < max_retries:
-                print("⏳ Retrying in 2 seconds...")
-                time.sleep(2)
-            else:
-                print("🔄 Max retries reached, falling back to SQLite")
-                DATABASE_URL = "sqlite:///./urtraining.db"
-                engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-                print(f"📁 Using SQLite database: {DATABASE_URL}")
+# Pool sizing, pre-ping and recycle come from DB_POOL_* env vars (see app/db_pool.py).
+# Connections are opened lazily: /health/ready reports whether the database is reachable.
+if DATABASE_URL.startswith("sqlite"):
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **pool_options(DATABASE_URL))
 else:
-    # SQLite or other database
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-    print(f"📁 Using database: {DATABASE_URL}")
+    engine_url = make_url(DATABASE_URL)
+    if engine_url.drivername == "postgresql":
+        # psycopg2 is the driver in requirements.txt; SQLAlchemy 2.1 picks psycopg 3 for plain postgresql://
+        engine_url = engine_url.set(drivername="postgresql+psycopg2")
+    engine = create_engine(engine_url, **pool_options(DATABASE_URL))
+register_pool("sync", engine)
+print(f"📁 Using database: {engine.url.render_as_string(hide_password=True)}")
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -57,4 +43,116 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+# Async sessions for the request handlers: queries no longer block the event loop.
+# Set ASYNC_DATABASE=false to use the sync fallback below instead.
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "true").lower() == "true"
+
+
+# Driver of DATABASE_URL -> async driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "postgresql+asyncpg": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "sqlite+aiosqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> Optional[URL]:
+    """URL of the same database for an async driver (asyncpg / aiosqlite), None for other drivers"""
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    return url.set(drivername=drivername) if drivername else None
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+# An in-memory SQLite database is private to its engine, so it is only reachable through the sync one
+if ASYNC_DATABASE and ":memory:" not in DATABASE_URL:
+    async_url = get_async_database_url(DATABASE_URL)
+    if async_url is None:
+        print(f"⚠️ No async driver for {engine.dialect.driver}, using sync sessions in a thread pool")
+    else:
+        try:
+            import greenlet  # noqa: F401  (required by sqlalchemy.ext.asyncio)
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            async_engine = create_async_engine(async_url, **pool_options(DATABASE_URL, async_driver=True))
+            register_pool("async", async_engine)
+            AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+            print(f"⚡ Async database driver: {async_engine.dialect.driver}")
+        except ImportError as e:
+            print(f"⚠️ Async database driver unavailable ({e}), using sync sessions in a thread pool")
+
+class SyncAsyncSession:
+    """
+    AsyncSession-compatible wrapper around a sync Session.
+
+    Used when no async driver is installed (and for in-memory SQLite): every
+    query runs in a worker thread, so async CRUD functions work unchanged and
+    still do not block the event loop.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    def _execute(self, statement, *args, **kwargs):
+        result = self.sync_session.execute(statement, *args, **kwargs)
+        if isinstance(result, CursorResult) and not result.returns_rows:
+            return result  # INSERT/UPDATE/DELETE: only rowcount is used
+        # Fetch all rows in the worker thread
+        return result.freeze()()
+
+    async def execute(self, statement, *args, **kwargs):
+        return await asyncio.to_thread(self._execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return (await self.execute(statement, *args, **kwargs)).scalar()
+
+    async def scalars(self, statement, *args, **kwargs):
+        return (await self.execute(statement, *args, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await asyncio.to_thread(self.sync_session.get, entity, ident, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await asyncio.to_thread(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await asyncio.to_thread(self.sync_session.flush)
+
+    async def refresh(self, instance, attribute_names=None):
+        await asyncio.to_thread(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await asyncio.to_thread(self.sync_session.commit)
+
+    async def rollback(self):
+        await asyncio.to_thread(self.sync_session.rollback)
+
+    async def close(self):
+        await asyncio.to_thread(self.sync_session.close)
+
+
+# Dependency to get async database session
+async def get_async_db(sync_db=Depends(get_db)):
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        # Reuse the request's sync session (shared with get_current_user),
+        # so a request holds one pooled connection, not two
+        sync_db.expire_on_commit = False
+        yield SyncAsyncSession(sync_db)
@@ -0,0 +1,279 @@
+"""
+Настройки, метрики и проверка готовности пула соединений с БД.
+
+Размер пула задаётся переменными окружения:
+
+- DB_POOL_SIZE (5) - постоянные соединения пула;
+- DB_MAX_OVERFLOW (10) - дополнительные соединения сверх DB_POOL_SIZE;
+- DB_POOL_TIMEOUT (30) - сколько секунд запрос ждёт свободное соединение;
+- DB_POOL_RECYCLE (1800) - соединения старше этого числа секунд
+  переоткрываются (-1 - никогда);
+- DB_POOL_PRE_PING (true) - проверять соединение перед выдачей из пула
+  (лишний SELECT 1 на каждую выдачу, зато перезапуск БД не даёт ошибок);
+- DB_CONNECT_TIMEOUT (10) - сколько секунд PostgreSQL-драйвер ждёт
+  установки нового соединения.
+
+Каждый процесс держит до DB_POOL_SIZE + DB_MAX_OVERFLOW соединений на
+пул, а при ASYNC_DATABASE пулов два (sync и async). Поэтому число
+воркеров выбирается так, чтобы
+workers * пулов * (DB_POOL_SIZE + DB_MAX_OVERFLOW) < max_connections
+PostgreSQL с запасом для миграций и psql.
+
+/metrics отдаёт время ожидания соединения (db_pool_checkout_wait_seconds),
+таймауты ожидания и заполненность пулов; /health/ready проверяет БД
+запросом SELECT 1 и не блокирует event loop.
+"""
+import os
+import time
+import bisect
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_READINESS_TIMEOUT = float(os.getenv("DB_READINESS_TIMEOUT", "2"))
+DB_INIT_RETRY_INTERVAL = float(os.getenv("DB_INIT_RETRY_INTERVAL", "2"))
+
+# Секунды: от соединения из пула сразу до ожидания почти всего DB_POOL_TIMEOUT
+WAIT_BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Гистограмма ожидания соединения и число таймаутов одного пула"""
+
+    def __init__(self, buckets: Tuple[float, ...] = WAIT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.wait_sum = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.wait_sum += seconds
+            if timed_out:
+                self.timeouts += 1
+
+
+# Имя пула (sync / async) -> движок; пул берётся из движка, так как dispose() его пересоздаёт
+_ENGINES: Dict[str, object] = {}
+
+
+class _TimedCheckoutMixin:
+    """Замеряет ожидание свободного соединения при выдаче из пула"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, async_driver: bool = False) -> dict:
+    """Аргументы create_engine / create_async_engine для пула по настройкам окружения"""
+    if ":memory:" in url:
+        # In-memory SQLite живёт в одном соединении, пул SQLAlchemy выбирает сам
+        return {}
+    options = {
+        "poolclass": TimedAsyncAdaptedQueuePool if async_driver else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url.startswith("postgresql"):
+        # Без таймаута connect к недоступному серверу висит до таймаута TCP
+        options["connect_args"] = {"timeout" if async_driver else "connect_timeout": DB_CONNECT_TIMEOUT}
+    return options
+
+
+def register_pool(name: str, engine) -> None:
+    """Включить метрики пула движка (sync engine или AsyncEngine)"""
+    engine = getattr(engine, "sync_engine", engine)
+    if isinstance(engine.pool, _TimedCheckoutMixin):
+        _ENGINES[name] = engine
+
+
+def _pools() -> List[Tuple[str, QueuePool]]:
+    return [(name, engine.pool) for name, engine in _ENGINES.items()]
+
+
+def pool_status() -> Dict[str, dict]:
+    """Текущая заполненность пулов"""
+    status = {}
+    for name, pool in _pools():
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        status[name] = {
+            "size": pool.size(),
+            "max_connections": capacity,
+            "checked_out": checked_out,
+            "saturation": round(checked_out / capacity, 4) if capacity else 0.0,
+            "checkout_timeouts": pool.stats.timeouts,
+        }
+    return status
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+def render_metrics() -> str:
+    """Метрики пулов в текстовом формате Prometheus"""
+    gauges = [
+        ("db_pool_size", "Persistent connections kept by the pool.", "size"),
+        ("db_pool_max_connections", "Connections the pool may open, including overflow.", "max_connections"),
+        ("db_pool_checked_out", "Connections currently checked out of the pool.", "checked_out"),
+        ("db_pool_saturation", "Checked out connections divided by max connections.", "saturation"),
+    ]
+    status = pool_status()
+    lines: List[str] = []
+    for metric, documentation, key in gauges:
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} gauge"]
+        for name, values in status.items():
+            lines.append(f'{metric}{{pool="{name}"}} {_format_value(values[key])}')
+
+    lines += [
+        "# HELP db_pool_checkout_timeouts_total Checkouts that gave up after DB_POOL_TIMEOUT.",
+        "# TYPE db_pool_checkout_timeouts_total counter",
+    ]
+    for name, pool in _pools():
+        lines.append(f'db_pool_checkout_timeouts_total{{pool="{name}"}} {pool.stats.timeouts}')
+
+    lines += [
+        "# HELP db_pool_checkout_wait_seconds Time spent waiting for a pooled connection.",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+    ]
+    for name, pool in _pools():
+        stats = pool.stats
+        with stats._lock:
+            counts, wait_sum = list(stats.counts), stats.wait_sum
+        cumulative = 0
+        for bound, count in zip(stats.buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(
+                f'db_pool_checkout_wait_seconds_bucket{{pool="{name}",le="{_format_value(bound)}"}} {cumulative}'
+            )
+        lines.append(f'db_pool_checkout_wait_seconds_sum{{pool="{name}"}} {_format_value(wait_sum)}')
+        lines.append(f'db_pool_checkout_wait_seconds_count{{pool="{name}"}} {cumulative}')
+    return "\n".join(lines) + "\n"
+
+
+def _ping(engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+# Поток синхронной проверки нельзя прервать по таймауту: он ждёт соединение до
+# DB_POOL_TIMEOUT или висит на TCP connect. Поэтому проверки идут в своём пуле,
+# а не в общем с SyncAsyncSession, и пока прошлая не завершилась, новая не запускается.
+_ping_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="db-readiness")
+_running_pings: Dict[object, Future] = {}
+_running_pings_lock = threading.Lock()
+
+
+def _start_ping(engine) -> Optional[Future]:
+    """Запустить SELECT 1 через sync-пул; None, если прошлая проверка ещё идёт"""
+    with _running_pings_lock:
+        running = _running_pings.get(engine)
+        if running is not None and not running.done():
+            return None
+        future = _running_pings[engine] = _ping_executor.submit(_ping, engine)
+        return future
+
+
+async def _ping_async(engine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_database(engine, async_engine=None, timeout: float = DB_READINESS_TIMEOUT) -> Optional[str]:
+    """None, если БД отвечает на SELECT 1 через все пулы за timeout секунд, иначе причина"""
+    ping = _start_ping(engine)
+    if ping is None:
+        return "previous database check is still running"
+    checks = [asyncio.wrap_future(ping)]
+    if async_engine is not None:
+        checks.append(_ping_async(async_engine))
+    try:
+        await asyncio.wait_for(asyncio.gather(*checks), timeout)
+    except asyncio.TimeoutError:
+        return f"database did not respond within {timeout:g}s"
+    except Exception as e:
+        return f"database unavailable: {e.__class__.__name__}"
+    return None
+
+
+class DatabaseInitializer:
+    """
+    Создание схемы в фоне при старте приложения.
+
+    Раньше database.py при импорте до 30 раз по 2 секунды ждал PostgreSQL и
+    затем молча переключался на SQLite. Теперь приложение стартует сразу,
+    а схема создаётся фоновой задачей с повтором раз в
+    DB_INIT_RETRY_INTERVAL секунд; до этого /health/ready отвечает 503,
+    а фоновые задачи, работающие с БД, ждут wait().
+    """
+
+    def __init__(self, init, retry_interval: float = DB_INIT_RETRY_INTERVAL):
+        self._init = init
+        self.retry_interval = retry_interval
+        self.last_error: Optional[str] = None
+        self._done = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._init)
+            except Exception as e:
+                self.last_error = e.__class__.__name__
+                logger.warning("Database initialization failed, retrying in %gs: %s", self.retry_interval, e)
+                await asyncio.sleep(self.retry_interval)
+            else:
+                self.last_error = None
+                self._done.set()
+                logger.info("Database initialized")
+                return
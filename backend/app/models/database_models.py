@@ -80,7 +80,7 @@ class ActiveSession(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String(255), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     user_agent = Column(String(255))
     ip_address = Column(String(45))
@@ -89,6 +89,18 @@ class ActiveSession(Base):
     user = relationship("User", back_populates="active_sessions")
 
 
+class RevokedToken(Base):
+    """
+    Отозванные JWT (по jti) до истечения их срока действия
+    """
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Course(Base):
     __tablename__ = "courses"
     
@@ -7,13 +7,15 @@ from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
 import re
+import uuid
 
 from app.database import get_db
 from app.crud import (
     authenticate_user, get_user_by_username, get_user_by_email, create_user,
     create_active_session, get_active_session, revoke_session,
-    cleanup_expired_sessions, get_user_by_id, update_user_trainer_profile
+    get_user_by_id, update_user_trainer_profile, is_token_revoked
 )
+from app import session_cache, token_revocation
 from app.models.training import TrainerProfile
 
 router = APIRouter()
@@ -99,10 +101,54 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_to_dict(user) -> dict:
+    """Convert user to dict format for backward compatibility"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "full_name": user.full_name,
+        "email": user.email,
+        "country": user.country,
+        "city": user.city,
+        "is_admin": user.is_admin,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+        "trainer_profile": user.trainer_profile
+    }
+
+def get_stateless_user(token: str, db: Session) -> Optional[dict]:
+    """
+    Verify the JWT locally (AUTH_MODE=jwt).
+    
+    Signature and expiry are checked without the database, revocation against
+    the in-memory revoked token list; the database is queried only when that
+    list reports a possible match or the user is not in the session cache.
+    Returns None for tokens issued without jti, which use the session lookup.
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    jti = payload.get("jti")
+    user_id = payload.get("user_id")
+    if not jti or user_id is None:
+        return None
+    
+    if token_revocation.REVOCATION_LIST.might_be_revoked(jti) and is_token_revoked(db, jti):
+        raise JWTError("Token has been revoked")
+    
+    cached_user = session_cache.get_principal(token)
+    if cached_user is not None:
+        return cached_user
+    
+    user = get_user_by_id(db, user_id)
+    if not user:
+        raise JWTError("Unknown user")
+    user_dict = user_to_dict(user)
+    session_cache.cache_principal(token, user_dict, datetime.utcfromtimestamp(payload["exp"]))
+    return user_dict
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,32 +157,24 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     )
     
     try:
-        # Clean up expired sessions periodically
-        cleanup_expired_sessions(db)
+        if token_revocation.STATELESS_AUTH:
+            user_dict = get_stateless_user(credentials.credentials, db)
+            if user_dict is not None:
+                return user_dict
         
-        # Get active session from database
-        session = get_active_session(db, credentials.credentials)
-        if not session:
-            raise credentials_exception
+        # Recently validated sessions are served from the cache without DB queries
+        cached_user = session_cache.get_principal(credentials.credentials)
+        if cached_user is not None:
+            return cached_user
         
-        # Get user from session
-        user = get_user_by_id(db, session.user_id)
-        if not user:
+        # Get active session with its user in one indexed lookup;
+        # expired sessions are removed by the background cleanup task
+        session = get_active_session(db, credentials.credentials)
+        if not session or not session.user:
             raise credentials_exception
-            
-        # Convert user to dict format for backward compatibility
-        user_dict = {
-            "id": user.id,
-            "username": user.username,
-            "full_name": user.full_name,
-            "email": user.email,
-            "country": user.country,
-            "city": user.city,
-            "is_admin": user.is_admin,
-            "created_at": user.created_at.isoformat() if user.created_at else None,
-            "updated_at": user.updated_at.isoformat() if user.updated_at else None
-        }
         
+        user_dict = user_to_dict(session.user)
+        session_cache.cache_principal(credentials.credentials, user_dict, session.expires_at)
         return user_dict
         
     except JWTError:
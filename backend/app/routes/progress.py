@@ -1,15 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import (
-    update_training_progress,
-    get_training_progress_by_course_id,
-    get_user_training_progresses,
-    reset_training_progress,
-    get_training_by_course_id
+    update_training_progress_async,
+    get_training_progress_by_course_id_async,
+    get_user_training_progresses_async,
+    reset_training_progress_async,
+    get_training_by_course_id_async
 )
 from app.routes.auth import get_current_user
 
@@ -40,14 +40,14 @@ class ResetProgressRequest(BaseModel):
 async def update_progress(
     request: UpdateProgressRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Обновить прогресс пользователя - отметить item как выполненный
     """
     try:
         # Найти тренировку по course_id
-        training = get_training_by_course_id(db, request.course_id)
+        training = await get_training_by_course_id_async(db, request.course_id)
         if not training:
             raise HTTPException(
                 status_code=404,
@@ -55,10 +55,10 @@ async def update_progress(
             )
         
         # Обновить прогресс
-        progress = update_training_progress(
+        progress = await update_training_progress_async(
             db, 
             current_user["id"], 
-            training.id, 
+            training, 
             request.item_number
         )
         
@@ -91,17 +91,17 @@ async def update_progress(
 async def get_progress(
     course_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить прогресс пользователя по конкретной тренировке
     """
     try:
-        progress = get_training_progress_by_course_id(db, current_user["id"], course_id)
+        progress = await get_training_progress_by_course_id_async(db, current_user["id"], course_id)
         
         if not progress:
             # Если прогресса нет, проверяем существует ли тренировка
-            training = get_training_by_course_id(db, course_id)
+            training = await get_training_by_course_id_async(db, course_id)
             if not training:
                 raise HTTPException(
                     status_code=404,
@@ -145,13 +145,13 @@ async def get_all_progress(
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(100, ge=1, le=100, description="Максимальное количество записей"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить весь прогресс пользователя по всем тренировкам
     """
     try:
-        progresses = get_user_training_progresses(db, current_user["id"], skip, limit)
+        progresses = await get_user_training_progresses_async(db, current_user["id"], skip, limit)
         
         result = []
         for progress in progresses:
@@ -183,21 +183,21 @@ async def get_all_progress(
 async def reset_progress(
     request: ResetProgressRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Сбросить прогресс пользователя по тренировке
     """
     try:
         # Найти тренировку по course_id
-        training = get_training_by_course_id(db, request.course_id)
+        training = await get_training_by_course_id_async(db, request.course_id)
         if not training:
             raise HTTPException(
                 status_code=404,
                 detail=f"Тренировка с ID {request.course_id} не найдена"
             )
         
-        success = reset_training_progress(db, current_user["id"], training.id)
+        success = await reset_training_progress_async(db, current_user["id"], training.id)
         
         if success:
             return {"message": "Прогресс успешно сброшен"}
@@ -1,36 +1,72 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 import requests
 from app.routes.trainings import get_training_details
 
-from app.database import get_db
-from app.crud import (
-    get_training_by_id, 
-    get_trainings_summary, 
-    get_trainings_by_user,
-    delete_training,
-    search_trainings,
-    get_training_with_trainer_info,
-    get_user_by_id,
-    get_training_profile
-)
+from app.database import get_async_db
+from app.crud import get_training_profile_async
 from app.models.training import (
     TrainingResponse
 )
 from app.routes.auth import get_current_user
+from app.search_index import VECTOR_DB_URL, SEARCH_INDEX_NAME
 
 router = APIRouter()
 
+# Program metadata values matching each training profile answer
+DIFFICULTY_LEVELS = {
+    "beginner": ["Beginner", "All Levels (Adaptive Program)"],
+    "intermediate": ["Intermediate", "All Levels (Adaptive Program)"],
+    "advanced": ["Advanced", "All Levels (Adaptive Program)"],
+}
+# Keyed by the stored training_location values (TrainingLocationEnum, plus the
+# older models.user.TrainingLocation); None means any environment
+TRAINING_ENVIRONMENTS = {
+    "gym": ["Gym", "Universal"],
+    "home": ["Home Without Equipment", "Home With Basic Equipment", "Universal"],
+    "outdoors": ["Outdoors", "Universal"],
+    "outdoor": ["Outdoors", "Universal"],
+    "pool": ["Pool", "Universal"],
+    "mixed": None,
+}
+JOINT_BACK_LIMITATIONS = ["Joint Issues", "Back Problems"]
+CHRONIC_LIMITATIONS = ["Cardiovascular Diseases", "Diabetes", "Overweight"]
+
+
+def build_profile_filter(profile) -> dict:
+    """Metadata filter for the vector service derived from a training profile"""
+    metadata_filter = {}
+
+    levels = DIFFICULTY_LEVELS.get(profile.training_level)
+    if levels:
+        metadata_filter["Difficulty Level"] = {"$in": levels}
+
+    environments = TRAINING_ENVIRONMENTS.get(profile.training_location)
+    if environments:
+        metadata_filter["Training Environment"] = {"$in": environments}
+
+    limitations = []
+    if profile.joint_back_problems:
+        limitations.extend(JOINT_BACK_LIMITATIONS)
+    if profile.chronic_conditions:
+        limitations.extend(CHRONIC_LIMITATIONS)
+    if limitations:
+        # Only programs adapted to at least one of the user's conditions
+        metadata_filter["Physical Limitations"] = {"$in": limitations}
+
+    return metadata_filter
+
 @router.get("/")
-async def get_user_recommendations(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_recommendations(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get the recommendations for user considering all the training profile information"""
     try:
         # Get training profile
         print("ye")
 
-        profile = get_training_profile(db, current_user["id"])
+        profile = await get_training_profile_async(db, current_user["id"])
         print(profile)
         if not profile:
             raise HTTPException(
@@ -94,31 +130,41 @@ async def get_user_recommendations(current_user: dict = Depends(get_current_user
         query_text = ".\n".join(query_parts) + "."
 
         
-        search_url = "http://31.129.96.182:1337/search_index"
+        search_url = f"{VECTOR_DB_URL}/search_index"
         payload = {
-            "index_name": "bm25_index",
+            "index_name": SEARCH_INDEX_NAME,
             "query_text": query_text,
             "k": 5,  # Get top 5 recommendations
-            "nprobe": 1
+            "nprobe": 1,
+            # Filtered inside the index, so all 5 results match the profile
+            "filter": build_profile_filter(profile),
         }
 
-        response = requests.post(
-            search_url,
-            json=payload,
-            headers={"Content-Type": "application/json"}
-        )
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="Vector search service unavailable"
-            )
-        
-        search_results = response.json()
-        if not search_results.get("success"):
-            raise HTTPException(
-                status_code=500,
-                detail="Vector search failed"
+        def search(payload: dict) -> dict:
+            response = requests.post(
+                search_url,
+                json=payload,
+                headers={"Content-Type": "application/json"}
             )
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail="Vector search service unavailable"
+                )
+
+            search_results = response.json()
+            if not search_results.get("success"):
+                raise HTTPException(
+                    status_code=500,
+                    detail="Vector search failed"
+                )
+            return search_results
+
+        # The vector service call is blocking, keep it off the event loop
+        search_results = await run_in_threadpool(search, payload)
+        if not search_results["results"] and payload["filter"]:
+            # No program matches every constraint, rank the whole catalog
+            search_results = await run_in_threadpool(search, {**payload, "filter": None})
         
         # 5. Extract just the IDs from results
         recommended_ids = [result["id"] for result in search_results["results"]]
@@ -1,15 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from pydantic import BaseModel, Field
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import (
-    save_program_for_user,
-    unsave_program_for_user,
-    get_saved_programs_for_user,
-    get_training_by_course_id,
-    is_program_saved_by_user
+    save_program_for_user_async,
+    unsave_program_for_user_async,
+    get_saved_programs_for_user_async,
+    get_training_by_course_id_async,
+    is_program_saved_by_user_async
 )
 from app.models.training import TrainingResponse
 from app.routes.auth import get_current_user
@@ -31,14 +31,14 @@ class ProgramSavedStatusResponse(BaseModel):
 async def save_program(
     course_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Сохранить программу тренировок для текущего пользователя
     """
     try:
         # Найти тренировку по course_id
-        training = get_training_by_course_id(db, course_id)
+        training = await get_training_by_course_id_async(db, course_id)
         if not training:
             raise HTTPException(
                 status_code=404,
@@ -46,7 +46,7 @@ async def save_program(
             )
         
         # Сохранить программу для пользователя
-        saved_program = save_program_for_user(db, current_user["id"], training.id)
+        saved_program = await save_program_for_user_async(db, current_user["id"], training.id)
         
         if saved_program:
             return SaveProgramResponse(
@@ -73,14 +73,14 @@ async def save_program(
 async def unsave_program(
     course_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Удалить программу тренировок из сохраненных для текущего пользователя
     """
     try:
         # Найти тренировку по course_id
-        training = get_training_by_course_id(db, course_id)
+        training = await get_training_by_course_id_async(db, course_id)
         if not training:
             raise HTTPException(
                 status_code=404,
@@ -88,7 +88,7 @@ async def unsave_program(
             )
         
         # Удалить программу из сохраненных
-        unsaved = unsave_program_for_user(db, current_user["id"], training.id)
+        unsaved = await unsave_program_for_user_async(db, current_user["id"], training.id)
         
         if unsaved:
             return SaveProgramResponse(
@@ -116,13 +116,13 @@ async def get_saved_programs(
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(100, ge=1, le=100, description="Максимальное количество записей"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить все сохраненные программы тренировок для текущего пользователя
     """
     try:
-        saved_trainings = get_saved_programs_for_user(db, current_user["id"], skip, limit)
+        saved_trainings = await get_saved_programs_for_user_async(db, current_user["id"], skip, limit)
         
         # Helper function to create response dict from db training
         def create_response_dict(db_training):
@@ -195,20 +195,20 @@ async def get_saved_programs(
 async def check_program_saved_status(
     course_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Проверка, сохранена ли программа тренировок пользователем
     """
     try:
-        training = get_training_by_course_id(db, course_id)
+        training = await get_training_by_course_id_async(db, course_id)
         if not training:
             raise HTTPException(
                 status_code=404,
                 detail=f"Программа с ID {course_id} не найдена"
             )
         
-        is_saved = is_program_saved_by_user(db, current_user["id"], training.id)
+        is_saved = await is_program_saved_by_user_async(db, current_user["id"], training.id)
         return ProgramSavedStatusResponse(saved=is_saved)
 
     except HTTPException:
@@ -1,16 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.crud import (
-    save_user_schedule,
-    get_user_schedule,
-    get_trainings_by_date,
-    delete_user_schedule,
-    get_user_calendar_dates,
-    debug_all_schedules,
-    get_available_course_ids
+    save_user_schedule_async,
+    get_user_schedule_async,
+    get_trainings_by_date_async,
+    delete_user_schedule_async,
+    get_user_calendar_dates_async,
+    get_available_course_ids_async
 )
 from app.models.tracker import (
     ScheduleInstance,
@@ -30,7 +29,7 @@ router = APIRouter()
 async def add_schedule(
     request: AddScheduleRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Добавить расписание тренировок для пользователя
@@ -51,7 +50,7 @@ async def add_schedule(
         print(f"📋 Processed schedule data: {schedule_data}")
         
         # Сохраняем расписание
-        added_count = save_user_schedule(db, current_user["id"], schedule_data)
+        added_count = await save_user_schedule_async(db, current_user["id"], schedule_data)
         
         return AddScheduleResponse(
             message=f"Расписание успешно добавлено",
@@ -71,7 +70,7 @@ async def add_schedule(
 async def get_schedule(
     course_id: Optional[str] = Query(None, description="ID курса для фильтрации"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить расписание пользователя
@@ -80,7 +79,7 @@ async def get_schedule(
         print(f"📋 GET /tracker/schedule - User ID: {current_user['id']}, Course ID: {course_id}")
         
         # Получаем расписание
-        schedule_db = get_user_schedule(db, current_user["id"], course_id)
+        schedule_db = await get_user_schedule_async(db, current_user["id"], course_id)
         
         print(f"📊 Found {len(schedule_db)} schedule items in database")
         
@@ -111,7 +110,7 @@ async def get_schedule(
 async def get_trainings_by_date_endpoint(
     date: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить все тренировки на конкретную дату
@@ -123,7 +122,7 @@ async def get_trainings_by_date_endpoint(
 
         
         # Получаем тренировки на дату
-        trainings_data = get_trainings_by_date(db, current_user["id"], date)
+        trainings_data = await get_trainings_by_date_async(db, current_user["id"], date)
         
         # Преобразуем в Pydantic модели
         trainings = []
@@ -154,14 +153,14 @@ async def get_trainings_by_date_endpoint(
 async def delete_schedule(
     course_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Удалить все расписание для конкретного курса
     """
     try:
         # Удаляем расписание для курса
-        deleted_count = delete_user_schedule(db, current_user["id"], course_id)
+        deleted_count = await delete_user_schedule_async(db, current_user["id"], course_id)
         
         return DeleteScheduleResponse(
             message=f"Расписание для курса {course_id} удалено",
@@ -179,14 +178,14 @@ async def delete_schedule(
 @router.get("/calendar", response_model=List[str])
 async def get_calendar(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить все даты с тренировками для отображения в календаре
     """
     try:
         # Получаем все даты с тренировками
-        dates = get_user_calendar_dates(db, current_user["id"])
+        dates = await get_user_calendar_dates_async(db, current_user["id"])
         
         return dates
         
@@ -201,13 +200,13 @@ async def get_calendar(
 @router.get("/available-courses", response_model=List[str])
 async def get_available_courses(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список всех доступных course_id для добавления в расписание
     """
     try:
-        course_ids = get_available_course_ids(db)
+        course_ids = await get_available_course_ids_async(db)
         return course_ids
         
     except Exception as e:
@@ -1,22 +1,22 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.crud import (
     get_training_by_id, 
-    get_trainings_summary, 
-    get_trainings_by_user,
     create_training,
     update_training,
     delete_training,
-    search_trainings,
-    get_training_with_trainer_info,
-    get_user_by_id,
     is_training_belong_to_user,
     is_program_saved_by_user,
-    get_training_by_course_id,
+    get_trainings_summary_async,
+    search_trainings_async,
+    get_trainings_by_user_async,
+    get_training_by_course_id_async,
+    get_user_by_id_async,
     DuplicateCourseIdError
 )
 from app.models.training import (
@@ -52,7 +52,7 @@ async def get_trainings_catalog(
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(100, ge=1, le=100, description="Максимальное количество записей"),
     search: Optional[str] = Query(None, description="Поиск по названию"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список всех тренировочных программ с полной информацией.
@@ -62,9 +62,9 @@ async def get_trainings_catalog(
     """
     try:
         if search:
-            trainings = search_trainings(db, search, skip, limit)
+            trainings = await search_trainings_async(db, search, skip, limit)
         else:
-            trainings = get_trainings_summary(db, skip, limit)
+            trainings = await get_trainings_summary_async(db, skip, limit)
         
         # Helper function to create response dict from db training
         def create_response_dict(db_training):
@@ -137,7 +137,7 @@ async def get_trainings_catalog(
 @router.get("/{training_id}", response_model=TrainingResponse)
 async def get_training_details(
     training_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить полную информацию о конкретной тренировочной программе.
@@ -146,7 +146,7 @@ async def get_training_details(
     Возвращает всю информацию включая план тренировок и данные тренера.
     """
     try:
-        training = get_training_with_trainer_info(db, training_id)
+        training = await get_training_by_course_id_async(db, training_id)
         
         if not training:
             raise HTTPException(
@@ -221,7 +221,7 @@ async def get_training_details(
 
 
 @router.post("/list", response_model=List[TrainingResponse], summary="Create Multiple Trainings")
-async def create_training_programs_bulk(
+def create_training_programs_bulk(
     trainings_data: List[TrainingCreate],
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -381,7 +381,7 @@ async def create_training_programs_bulk(
 
 
 @router.post("/", response_model=TrainingResponse, summary="Create Training")
-async def create_training_program(
+def create_training_program(
     training_data: TrainingCreate,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -475,7 +475,7 @@ async def create_training_program(
 
 
 @router.put("/{training_id}", response_model=TrainingResponse)
-async def update_training_program(
+def update_training_program(
     training_id: str,
     training_data: TrainingUpdate,
     current_user: dict = Depends(get_current_user),
@@ -562,7 +562,7 @@ async def update_training_program(
 
 
 @router.delete("/{training_id}")
-async def delete_training_program(
+def delete_training_program(
     training_id: str,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -616,7 +616,7 @@ async def get_my_trainings(
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(10, ge=1, le=100, description="Максимальное количество записей"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список тренировочных программ текущего пользователя.
@@ -624,7 +624,7 @@ async def get_my_trainings(
     Этот эндпоинт требует авторизации и возвращает краткую информацию о тренировках пользователя.
     """
     try:
-        trainings = get_trainings_by_user(db, current_user["id"], skip, limit)
+        trainings = await get_trainings_by_user_async(db, current_user["id"], skip, limit)
         
         # Преобразуем в формат для краткого отображения
         training_summaries = []
@@ -656,7 +656,7 @@ async def get_user_trainings(
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(10, ge=1, le=100, description="Максимальное количество записей"),
     current_user: dict = Depends(get_current_user),  # Требуем авторизации для безопасности
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получить список тренировочных программ конкретного пользователя по его ID с полной информацией.
@@ -666,7 +666,7 @@ async def get_user_trainings(
     """
     try:
         # Проверяем, существует ли пользователь с указанным ID
-        user = get_user_by_id(db, user_id)
+        user = await get_user_by_id_async(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=404,
@@ -674,7 +674,7 @@ async def get_user_trainings(
             )
         
         # Получаем тренировки пользователя
-        trainings = get_trainings_by_user(db, user_id, skip, limit)
+        trainings = await get_trainings_by_user_async(db, user_id, skip, limit)
         
         # Helper function to create response dict from db training (same as in GET /trainings)
         def create_response_dict(db_training):
@@ -749,13 +749,13 @@ async def get_user_trainings(
 async def check_program_belongs_to_user_status(
     course_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Проверка, принадлежит ли программа тренировок пользователю
     """
     try:
-        training = get_training_by_course_id(db, course_id)
+        training = await get_training_by_course_id_async(db, course_id)
         if not training:
             raise HTTPException(
                 status_code=404,
@@ -775,7 +775,7 @@ async def check_program_belongs_to_user_status(
 @router.get("/can-create", response_model=dict)
 async def can_create_training(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Проверить, может ли пользователь создавать тренировки.
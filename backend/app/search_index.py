@@ -0,0 +1,111 @@
+"""
+Синхронизация программ тренировок с индексом поиска vector-db.
+
+Созданные и изменённые программы отправляются в /upsert_documents,
+удалённые - в /delete_documents. Запросы выполняются в фоновом потоке
+по одному, в порядке изменений, и не блокируют обработку запроса;
+ошибки сервиса поиска только логируются.
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DB_URL = os.getenv("VECTOR_DB_URL", "http://31.129.96.182:1337")
+SEARCH_INDEX_NAME = os.getenv("SEARCH_INDEX_NAME", "bm25_index")
+SEARCH_INDEX_SYNC = os.getenv("SEARCH_INDEX_SYNC", "true").lower() == "true"
+SEARCH_INDEX_TIMEOUT = float(os.getenv("SEARCH_INDEX_TIMEOUT", "10"))
+
+# Поля программы в порядке и с названиями из JSON с курсами,
+# из которого строился индекс (ml/scripts/prepare_course_data.ipynb)
+COURSE_FIELDS = {
+    "Activity Type": "activity_type",
+    "Program Goal": "program_goal",
+    "Training Environment": "training_environment",
+    "Difficulty Level": "difficulty_level",
+    "Course Duration (weeks)": "course_duration_weeks",
+    "Weekly Training Frequency": "weekly_training_frequency",
+    "Average Workout Duration": "average_workout_duration",
+    "Age Group": "age_group",
+    "Gender Orientation": "gender_orientation",
+    "Physical Limitations": "physical_limitations",
+    "Required Equipment": "required_equipment",
+    "Course Language": "course_language",
+    "Visual Content": "visual_content",
+    "Trainer Feedback Options": "trainer_feedback_options",
+    "Tags": "tags",
+    "Average Course Rating": "average_course_rating",
+    "Active Participants": "active_participants",
+    "Number of Reviews": "number_of_reviews",
+    "Certification": "certification",
+    "Experience": "experience",
+    "Trainer Name": "trainer_name",
+    "Course Title": "course_title",
+    "Program Description": "program_description",
+    "training_plan": "training_plan",
+}
+
+# Поля, по которым рекомендации фильтруют программы
+FILTER_FIELDS = [
+    "Activity Type",
+    "Difficulty Level",
+    "Training Environment",
+    "Required Equipment",
+    "Physical Limitations",
+]
+
+# Один поток сохраняет порядок изменений одной программы
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+
+
+def training_document(training) -> Dict[str, Any]:
+    """Документ индекса для программы, в формате исходной загрузки курсов"""
+    course = {key: getattr(training, field) for key, field in COURSE_FIELDS.items()}
+    course["id"] = training.course_id
+
+    parts = []
+    for key, value in course.items():
+        if isinstance(value, list):
+            value_str = ", ".join(str(v) for v in value)
+        else:
+            value_str = str(value)
+        parts.append(f"{key}: {value_str}")
+
+    return {
+        "id": training.course_id,
+        "content": "\n\n".join(parts),
+        "metadata": {field: course[field] for field in FILTER_FIELDS},
+    }
+
+
+def _post(endpoint: str, payload: Dict[str, Any]) -> None:
+    try:
+        response = requests.post(
+            f"{VECTOR_DB_URL}/{endpoint}", json=payload, timeout=SEARCH_INDEX_TIMEOUT
+        )
+        if response.status_code != 200:
+            logger.warning(
+                f"Search index {endpoint} failed: {response.status_code} {response.text}"
+            )
+    except requests.RequestException as e:
+        logger.warning(f"Search index {endpoint} failed: {e}")
+
+
+def upsert_training(training) -> None:
+    """Добавить или обновить программу в индексе поиска"""
+    if not SEARCH_INDEX_SYNC:
+        return
+    payload = {"index_name": SEARCH_INDEX_NAME, "documents": [training_document(training)]}
+    _executor.submit(_post, "upsert_documents", payload)
+
+
+def delete_trainings(course_ids: List[str]) -> None:
+    """Удалить программы из индекса поиска"""
+    if not SEARCH_INDEX_SYNC or not course_ids:
+        return
+    payload = {"index_name": SEARCH_INDEX_NAME, "document_ids": list(course_ids)}
+    _executor.submit(_post, "delete_documents", payload)
@@ -0,0 +1,237 @@
+"""
+Кэш авторизованных пользователей по токену сессии.
+
+get_current_user выполняется в каждом авторизованном запросе; с кэшем
+повторные запросы с тем же токеном не обращаются к БД. Запись живёт не
+дольше SESSION_CACHE_TTL секунд и не дольше самой сессии, размер
+локального кэша ограничен SESSION_CACHE_SIZE записями (LRU).
+
+Записи сбрасываются при отзыве сессии (revoke_session,
+revoke_user_sessions) и изменении пользователя (update_user_profile,
+change_user_password, update_user_trainer_profile). Локальный кэш
+сбрасывается только в текущем процессе, поэтому при нескольких
+воркерах нужно задать SESSION_CACHE_URL (Redis): тогда кэш общий и
+сброс виден всем воркерам. SESSION_CACHE_TTL=0 отключает кэш.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_URL = os.getenv("SESSION_CACHE_URL", "")
+
+
+class SessionCacheBackend(ABC):
+    """Хранилище пользователей сессий: токен -> словарь пользователя"""
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Пользователь сессии или None, если записи нет или она истекла"""
+        pass
+
+    @abstractmethod
+    def set(self, token: str, principal: Dict[str, Any], ttl: float) -> None:
+        """Запомнить пользователя сессии на ttl секунд"""
+        pass
+
+    @abstractmethod
+    def delete(self, token: str) -> None:
+        """Сбросить сессию"""
+        pass
+
+    @abstractmethod
+    def delete_user(self, user_id: int) -> None:
+        """Сбросить все сессии пользователя"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Сбросить весь кэш"""
+        pass
+
+
+class LocalSessionCache(SessionCacheBackend):
+    """Кэш в памяти процесса с вытеснением давно не использованных записей"""
+
+    def __init__(self, max_size: int = SESSION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._user_tokens: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return dict(principal)
+
+    def set(self, token: str, principal: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (time.monotonic() + ttl, dict(principal))
+            self._user_tokens.setdefault(principal["id"], set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, token: str) -> None:
+        with self._lock:
+            self._remove(token)
+
+    def delete_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._user_tokens.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]["id"]
+        tokens = self._user_tokens.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[user_id]
+
+
+class RedisSessionCache(SessionCacheBackend):
+    """
+    Общий кэш для нескольких воркеров.
+
+    Ключи содержат sha256 токена, а не сам токен; для каждого
+    пользователя хранится множество его ключей для delete_user.
+    Подойдёт любой клиент с API redis-py (redis, fakeredis и т.п.).
+    """
+
+    def __init__(self, client, prefix: str = "urtraining:session:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisSessionCache":
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def _token_key(self, token: str) -> str:
+        return self.prefix + "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        value = self.client.get(self._token_key(token))
+        return json.loads(value) if value is not None else None
+
+    def set(self, token: str, principal: Dict[str, Any], ttl: float) -> None:
+        token_key = self._token_key(token)
+        user_key = self._user_key(principal["id"])
+        ttl_ms = max(int(ttl * 1000), 1)
+        pipe = self.client.pipeline()
+        pipe.set(token_key, json.dumps(principal), px=ttl_ms)
+        pipe.sadd(user_key, token_key)
+        # Множество живёт не меньше любой записи пользователя
+        pipe.pexpire(user_key, max(int(SESSION_CACHE_TTL * 1000), ttl_ms))
+        pipe.execute()
+
+    def delete(self, token: str) -> None:
+        self.client.delete(self._token_key(token))
+
+    def delete_user(self, user_id: int) -> None:
+        user_key = self._user_key(user_id)
+        token_keys = self.client.smembers(user_key)
+        self.client.delete(user_key, *token_keys)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def _create_backend() -> Optional[SessionCacheBackend]:
+    if SESSION_CACHE_TTL <= 0:
+        return None
+    if SESSION_CACHE_URL:
+        return RedisSessionCache.from_url(SESSION_CACHE_URL)
+    return LocalSessionCache(SESSION_CACHE_SIZE)
+
+
+_backend: Optional[SessionCacheBackend] = _create_backend()
+
+
+def set_backend(backend: Optional[SessionCacheBackend]) -> None:
+    """Заменить хранилище кэша (None - отключить кэш)"""
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> Optional[SessionCacheBackend]:
+    return _backend
+
+
+def get_principal(token: str) -> Optional[Dict[str, Any]]:
+    """Пользователь сессии из кэша или None; ошибки хранилища только логируются"""
+    if _backend is None:
+        return None
+    try:
+        return _backend.get(token)
+    except Exception:
+        logger.exception("Session cache lookup failed")
+        return None
+
+
+def cache_principal(token: str, principal: Dict[str, Any], session_expires_at: datetime) -> None:
+    """Запомнить пользователя сессии до её истечения, но не дольше SESSION_CACHE_TTL"""
+    if _backend is None:
+        return
+    if session_expires_at.tzinfo is not None:
+        session_expires_at = session_expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+    ttl = min(SESSION_CACHE_TTL, (session_expires_at - datetime.utcnow()).total_seconds())
+    if ttl <= 0:
+        return
+    try:
+        _backend.set(token, principal, ttl)
+    except Exception:
+        logger.exception("Session cache update failed")
+
+
+def invalidate_token(token: str) -> None:
+    if _backend is None:
+        return
+    try:
+        _backend.delete(token)
+    except Exception:
+        logger.exception("Session cache invalidation failed")
+
+
+def invalidate_user(user_id: int) -> None:
+    if _backend is None:
+        return
+    try:
+        _backend.delete_user(user_id)
+    except Exception:
+        logger.exception("Session cache invalidation failed")
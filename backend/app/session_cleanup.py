@@ -0,0 +1,114 @@
+"""
+Фоновая очистка истёкших сессий.
+
+Раньше истёкшие сессии удалялись при каждой проверке токена, из-за чего
+любой авторизованный запрос выполнял лишнюю выборку и удаление. Теперь
+это делает фоновая задача, запущенная в lifespan приложения: раз в
+SESSION_CLEANUP_INTERVAL секунд она удаляет истёкшие сессии пакетами
+по SESSION_CLEANUP_BATCH_SIZE строк. Истёкшая, но ещё не удалённая
+сессия не проходит проверку, так как get_active_session сравнивает
+expires_at с текущим временем. Также удаляются истёкшие записи
+revoked_tokens, а при AUTH_MODE=jwt раз в TOKEN_REVOCATION_REFRESH
+секунд пересобирается список отозванных токенов (см. token_revocation).
+"""
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from app import token_revocation
+from app.crud import cleanup_expired_sessions, cleanup_revoked_tokens, get_revoked_token_ids
+from app.database import SessionLocal, engine
+from app.models.database_models import ActiveSession
+
+logger = logging.getLogger(__name__)
+
+SESSION_CLEANUP_INTERVAL = float(os.getenv("SESSION_CLEANUP_INTERVAL", "300"))
+SESSION_CLEANUP_BATCH_SIZE = int(os.getenv("SESSION_CLEANUP_BATCH_SIZE", "1000"))
+
+
+def run_cleanup(batch_size: int = SESSION_CLEANUP_BATCH_SIZE) -> int:
+    """Один проход очистки в отдельной сессии БД; возвращает число удалённых сессий"""
+    db = SessionLocal()
+    try:
+        removed = cleanup_expired_sessions(db, batch_size=batch_size)
+        cleanup_revoked_tokens(db, batch_size=batch_size)
+        return removed
+    finally:
+        db.close()
+
+
+def refresh_revocation_list() -> int:
+    """Пересобрать список отозванных токенов из БД; возвращает его размер"""
+    db = SessionLocal()
+    try:
+        return token_revocation.REVOCATION_LIST.rebuild(get_revoked_token_ids(db))
+    finally:
+        db.close()
+
+
+def ensure_session_indexes() -> None:
+    """
+    Создать недостающие индексы active_sessions.
+
+    create_all не добавляет индексы в уже существующие таблицы, поэтому
+    индекс по expires_at для старых баз создаётся здесь.
+    """
+    for index in ActiveSession.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+async def cleanup_loop(interval: float = SESSION_CLEANUP_INTERVAL) -> None:
+    """Периодическая очистка; ошибки логируются и не останавливают цикл"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(run_cleanup)
+            if removed:
+                logger.info("Removed %d expired sessions", removed)
+        except Exception:
+            logger.exception("Expired session cleanup failed")
+        await asyncio.sleep(interval)
+
+
+async def revocation_refresh_loop(interval: float = token_revocation.TOKEN_REVOCATION_REFRESH) -> None:
+    """Периодическая пересборка списка отозванных токенов"""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_revocation_list)
+        except Exception:
+            logger.exception("Revoked token list refresh failed")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def session_cleanup_scheduler(
+    wait_for_database: Optional[Callable[[], Awaitable[None]]] = None
+) -> AsyncIterator[None]:
+    """
+    Запустить фоновые задачи на время работы приложения (для lifespan FastAPI).
+
+    wait_for_database откладывает их до создания схемы БД.
+    """
+    loops: List[Callable] = []
+    if SESSION_CLEANUP_INTERVAL > 0:
+        loops.append(cleanup_loop)
+    if token_revocation.STATELESS_AUTH:
+        loops.append(revocation_refresh_loop)
+
+    async def start(loop: Callable) -> None:
+        if wait_for_database is not None:
+            await wait_for_database()
+        await loop()
+
+    tasks = [asyncio.create_task(start(loop)) for loop in loops]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
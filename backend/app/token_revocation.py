@@ -0,0 +1,107 @@
+"""
+Список отозванных JWT для проверки токенов без обращения к БД.
+
+При AUTH_MODE=jwt get_current_user проверяет подпись и срок действия
+токена локально, а отзыв - по bloom-фильтру jti отозванных токенов.
+Отрицательный ответ фильтра окончателен, и запрос обходится без БД;
+положительный (отозван или ложное срабатывание) проверяется по таблице
+revoked_tokens.
+
+Фильтр каждого процесса пересобирается из revoked_tokens раз в
+TOKEN_REVOCATION_REFRESH секунд (см. session_cleanup), а токены,
+отозванные в этом процессе, добавляются сразу. Поэтому токен,
+отозванный другим воркером, может приниматься до следующей пересборки.
+До первой пересборки каждый токен проверяется по БД.
+"""
+import os
+import math
+import hashlib
+import threading
+from typing import Iterable, Optional, Set
+
+from jose import JWTError, jwt
+
+STATELESS_AUTH = os.getenv("AUTH_MODE", "session").lower() == "jwt"
+TOKEN_REVOCATION_REFRESH = float(os.getenv("TOKEN_REVOCATION_REFRESH", "30"))
+TOKEN_REVOCATION_ERROR_RATE = float(os.getenv("TOKEN_REVOCATION_ERROR_RATE", "0.001"))
+
+
+class BloomFilter:
+    """Bloom-фильтр строк с заданной долей ложных срабатываний"""
+
+    def __init__(self, capacity: int, error_rate: float = TOKEN_REVOCATION_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Bloom-фильтр отозванных jti с пересборкой из БД"""
+
+    def __init__(self, error_rate: float = TOKEN_REVOCATION_ERROR_RATE):
+        self.error_rate = error_rate
+        self._filter = BloomFilter(1024, error_rate)
+        # Отозванные в этом процессе с начала текущей пересборки
+        self._pending: Set[str] = set()
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._filter.add(jti)
+            self._pending.add(jti)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        """False - токен точно не отозван (на момент последней пересборки)"""
+        if not self._ready:
+            return True
+        return jti in self._filter
+
+    def rebuild(self, jtis: Iterable[str]) -> int:
+        """Заменить фильтр построенным по jtis и отозванным с прошлой пересборки"""
+        jtis = list(jtis)
+        with self._lock:
+            revoked = set(jtis) | self._pending
+            bloom = BloomFilter(max(2 * len(revoked), 1024), self.error_rate)
+            for jti in revoked:
+                bloom.add(jti)
+            self._filter = bloom
+            self._pending = set()
+            self._ready = True
+        return len(revoked)
+
+
+REVOCATION_LIST = RevocationList()
+
+
+def token_jti(token: str) -> Optional[str]:
+    """jti токена без проверки подписи (None для старых токенов без jti)"""
+    try:
+        return jwt.get_unverified_claims(token).get("jti")
+    except JWTError:
+        return None
+
+
+def revoke(jti: Optional[str]) -> None:
+    """Добавить jti в список этого процесса (только при AUTH_MODE=jwt)"""
+    if jti and STATELESS_AUTH:
+        REVOCATION_LIST.add(jti)
@@ -0,0 +1,179 @@
+"""
+Load test: throughput of the hot read routes under concurrent requests.
+
+Starts the app with uvicorn in this process on a fresh SQLite database,
+seeds trainings, a user with progress, saved programs and schedule, and
+sends --requests requests from --concurrency client threads, round-robin
+over the catalog, training details, progress, saved programs and calendar
+routes.
+
+--db-latency-ms adds a delay to every statement, in the thread that runs it,
+to emulate a database over the network: sync sessions wait in the request's
+thread (the event loop itself for sync code in async routes), aiosqlite
+waits in its connection thread while the event loop serves other requests.
+Compare the async routes with the sync fallback:
+
+    python load_test.py --db-latency-ms 5
+    ASYNC_DATABASE=false python load_test.py --db-latency-ms 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backend routes load test")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--trainings", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    return parser.parse_args()
+
+
+def prepare_database() -> str:
+    """Point the app at a fresh SQLite database before it is imported"""
+    path = os.path.join(tempfile.mkdtemp(prefix="urtraining-load-"), "load.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("SEARCH_INDEX_SYNC", "false")
+    return path
+
+
+def seed(trainings: int) -> str:
+    from app.database import SessionLocal, engine
+    from app.models.database_models import Base, User, Training, SavedProgram, TrainingProgress, TrainingSchedule
+    from app.crud import create_active_session
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="load_user", full_name="Load User", email="load@example.com", hashed_password="-")
+    db.add(user)
+    db.commit()
+    # A real program plan, so responses have production-like size
+    with open(os.path.join(BACKEND_DIR, "selected_courses_with_ids_plus_plan.json")) as f:
+        plan = json.load(f)[0]["training_plan"]
+    for i in range(trainings):
+        db.add(Training(
+            course_id=f"load-{i}",
+            user_id=user.id,
+            course_title=f"Load program {i}",
+            certification={"Type": "", "Level": "", "Specialization": ""},
+            experience={"Years": 0, "Specialization": "", "Courses": 0, "Rating": 0.0},
+            training_plan=plan,
+            tags=["load"],
+        ))
+    db.commit()
+    for training_id in range(1, 11):
+        db.add(SavedProgram(user_id=user.id, training_id=training_id))
+        db.add(TrainingProgress(user_id=user.id, training_id=training_id, completed_items=[0, 1], total_items=len(plan)))
+        db.add(TrainingSchedule(user_id=user.id, course_id=f"load-{training_id}", date=f"{training_id:02d}.01.2026", training_index=0))
+    db.commit()
+    token = "load-test-token"
+    create_active_session(db, user.id, token, datetime.utcnow() + timedelta(hours=1))
+    db.close()
+    return token
+
+
+def add_query_latency(seconds: float) -> None:
+    """Delay every statement in the thread that executes it, like a wait on the database socket"""
+    from sqlalchemy import event
+    from app import database
+
+    def delay(statement):
+        time.sleep(seconds)
+
+    def on_sync_connect(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(delay)
+
+    def on_async_connect(dbapi_connection, connection_record):
+        # aiosqlite runs statements in its own thread
+        dbapi_connection.run_async(lambda connection: connection.set_trace_callback(delay))
+
+    database.engine.dispose()  # connections opened while seeding
+    event.listen(database.engine, "connect", on_sync_connect)
+    async_engine = getattr(database, "async_engine", None)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", on_async_connect)
+
+
+def start_server(port: int):
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def run_load(base_url: str, token: str, total: int, concurrency: int, trainings: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    routes = [
+        ("/trainings/?limit=20", None),
+        (None, None),  # training details, id varies
+        ("/progress/", headers),
+        ("/saved-programs/", headers),
+        ("/tracker/calendar", headers),
+    ]
+    local = threading.local()
+
+    def call(i: int):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        path, route_headers = routes[i % len(routes)]
+        if path is None:
+            path = f"/trainings/load-{i % trainings}"
+        start = time.perf_counter()
+        response = session.get(base_url + path, headers=route_headers)
+        elapsed = time.perf_counter() - start
+        return response.status_code, elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(concurrency)))  # warm-up
+        start = time.perf_counter()
+        results = list(executor.map(call, range(total)))
+        duration = time.perf_counter() - start
+    return results, duration
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    prepare_database()
+    sys.path.insert(0, BACKEND_DIR)
+    token = seed(args.trainings)
+    if args.db_latency_ms:
+        add_query_latency(args.db_latency_ms / 1000)
+    server, thread = start_server(args.port)
+
+    from app import database
+    mode = "async" if getattr(database, "AsyncSessionLocal", None) is not None else "sync"
+    try:
+        results, duration = run_load(
+            f"http://127.0.0.1:{args.port}", token, args.requests, args.concurrency, args.trainings
+        )
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    latencies = sorted(elapsed for _, elapsed in results)
+    errors = sum(status != 200 for status, _ in results)
+    print(f"sessions: {mode}, query latency: {args.db_latency_ms} ms, concurrency: {args.concurrency}")
+    print(f"requests: {len(results)}, errors: {errors}, throughput: {len(results) / duration:.1f} req/s")
+    print(
+        f"latency p50: {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p95: {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms"
+    )
@@ -23,7 +23,7 @@ def wait_for_api(max_retries: int = 30, delay: int = 2) -> bool:
     
     for attempt in range(max_retries):
         try:
-            response = requests.get(f"{API_BASE_URL}/docs", timeout=5)
+            response = requests.get(f"{API_BASE_URL}/health/ready", timeout=5)
             if response.status_code == 200:
                 print("API is ready!")
                 return True
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.auth import router as auth_router, get_current_user
 from app.routes.trainings import router as trainings_router
@@ -9,17 +9,21 @@ from app.routes.saved_programs import router as saved_programs_router
 from app.routes.progress import router as progress_router
 from app.routes.tracker import router as tracker_router
 from app.database import get_db
-from app.crud import get_training_profile, update_user_profile, update_training_profile, get_user_by_id
+from app.crud import get_training_profile, update_user_profile, update_training_profile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict
 from enum import Enum
+from contextlib import asynccontextmanager
 import json
 import os
+import asyncio
 
 # Database imports
-from app.database import engine
+from app.database import engine, async_engine
+from app.db_pool import DatabaseInitializer, check_database, pool_status, render_metrics
 from app.models.database_models import Base
+from app.session_cleanup import ensure_session_indexes, session_cleanup_scheduler
 
 # Enums for validation
 class CountryEnum(str, Enum):
@@ -211,26 +215,40 @@ class UserDataUpdate(BaseModel):
         
         return city
 
+def init_database():
+    """Create missing tables and indexes"""
+    Base.metadata.create_all(bind=engine)
+    ensure_session_indexes()
+    print("Database tables created successfully!")
+
+
+database_initializer = DatabaseInitializer(init_database)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the database in the background and run background session cleanup"""
+    init_task = asyncio.create_task(database_initializer.run())
+    try:
+        async with session_cleanup_scheduler(database_initializer.wait):
+            yield
+    finally:
+        init_task.cancel()
+        try:
+            await init_task
+        except asyncio.CancelledError:
+            pass
+
 app = FastAPI(
     title="UrTraining Backend API",
     description="A comprehensive training platform API for fitness courses and user management",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
-# Create database tables on startup
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database tables on application startup"""
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully!")
-        
-    except Exception as e:
-        print(f"Error creating database tables: {e}")
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # FRONTEND DOMEN!
@@ -251,6 +269,31 @@ app.include_router(progress_router, prefix="/progress", tags=["Training Progress
 app.include_router(tracker_router, prefix="/tracker", tags=["Training Tracker"])
 
 
+@app.get("/health")
+async def health():
+    """Liveness probe: the process is up, the database is not checked"""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: schema is created and the database answers through every pool"""
+    if not database_initializer.ready:
+        error = f"database is initializing: {database_initializer.last_error or 'in progress'}"
+    else:
+        error = await check_database(engine, async_engine)
+    content = {"status": "ready" if error is None else "unavailable", "pools": pool_status()}
+    if error is not None:
+        content["error"] = error
+    return JSONResponse(status_code=200 if error is None else 503, content=content)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Connection pool checkout wait and saturation in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/survey-data")
 def get_survey_data():
     """Return survey data from JSON file"""
@@ -306,12 +349,8 @@ def get_user_data(current_user: dict = Depends(get_current_user), db: Session =
             "updated_at": current_user["updated_at"]
         }
         
-        # Get trainer profile
-        user = get_user_by_id(db, current_user["id"])
-        if user and user.trainer_profile:
-            user_data["trainer_profile"] = user.trainer_profile
-        else:
-            user_data["trainer_profile"] = None
+        # Trainer profile is loaded together with the current user
+        user_data["trainer_profile"] = current_user.get("trainer_profile") or None
         
         # Get training profile
         profile = get_training_profile(db, current_user["id"])
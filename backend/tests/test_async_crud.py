@@ -0,0 +1,175 @@
+import sys
+import os
+import asyncio
+import subprocess
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Добавляем корень проекта (backend) в PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import Base, SyncAsyncSession, get_async_database_url
+from app.models.database_models import User, Training
+from app.crud import (
+    get_training_by_course_id_async,
+    update_training_progress_async,
+    get_training_progress_by_course_id_async,
+    get_user_training_progresses_async,
+    reset_training_progress_async,
+    save_program_for_user_async,
+    unsave_program_for_user_async,
+    get_saved_programs_for_user_async,
+    is_program_saved_by_user_async,
+    save_user_schedule_async,
+    get_trainings_by_date_async,
+    get_user_calendar_dates_async,
+    delete_user_schedule_async
+)
+
+
+@pytest.fixture(params=["aiosqlite", "sync_fallback"])
+def session_factory(request, tmp_path):
+    """Фабрика асинхронных сессий: через aiosqlite и через синхронный shim"""
+    url = f"sqlite:///{tmp_path / 'async_crud.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    user = User(username="async_user", full_name="Async User", email="async@test.com", hashed_password="hashed")
+    db.add(user)
+    db.commit()
+    for i in range(3):
+        db.add(Training(
+            course_id=f"course-{i}",
+            user_id=user.id,
+            course_title=f"Course {i}",
+            training_plan=[{"day": 1}, {"day": 2}]
+        ))
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    if request.param == "aiosqlite":
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async_crud.db'}")
+        factory = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    else:
+        async_engine = None
+        sync_factory = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+        factory = lambda: SyncAsyncSession(sync_factory())
+
+    yield factory, user_id
+
+    if async_engine is not None:
+        asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def run(factory, scenario):
+    async def main():
+        db = factory()
+        try:
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_progress_async(session_factory):
+    """Отметка, чтение и сброс прогресса через AsyncSession"""
+    factory, user_id = session_factory
+
+    async def scenario(db):
+        training = await get_training_by_course_id_async(db, "course-1")
+        await update_training_progress_async(db, user_id, training, 1)
+        progress = await update_training_progress_async(db, user_id, training, 0)
+        assert progress.completed_items == [0, 1]
+        assert progress.progress_percentage == 100.0
+
+        with pytest.raises(ValueError):
+            await update_training_progress_async(db, user_id, training, 5)
+
+        by_course = await get_training_progress_by_course_id_async(db, user_id, "course-1")
+        assert by_course.id == progress.id
+        progresses = await get_user_training_progresses_async(db, user_id)
+        assert [p.training.course_id for p in progresses] == ["course-1"]
+
+        assert await reset_training_progress_async(db, user_id, training.id)
+        assert not await reset_training_progress_async(db, user_id, training.id + 100)
+        by_course = await get_training_progress_by_course_id_async(db, user_id, "course-1")
+        assert by_course.completed_items == []
+
+    run(factory, scenario)
+
+
+def test_saved_programs_async(session_factory):
+    """Сохранение и удаление программ через AsyncSession"""
+    factory, user_id = session_factory
+
+    async def scenario(db):
+        training = await get_training_by_course_id_async(db, "course-2")
+        assert await save_program_for_user_async(db, user_id, training.id) is not None
+        assert await save_program_for_user_async(db, user_id, training.id) is not None
+        assert await is_program_saved_by_user_async(db, user_id, training.id)
+        saved = await get_saved_programs_for_user_async(db, user_id)
+        assert [t.course_id for t in saved] == ["course-2"]
+
+        assert await unsave_program_for_user_async(db, user_id, training.id)
+        assert not await unsave_program_for_user_async(db, user_id, training.id)
+        assert not await is_program_saved_by_user_async(db, user_id, training.id)
+
+    run(factory, scenario)
+
+
+def test_schedule_async(session_factory):
+    """Расписание: дубликаты и неизвестные курсы пропускаются"""
+    factory, user_id = session_factory
+
+    async def scenario(db):
+        schedule = [
+            {"course_id": "course-0", "date": "01.02.2026", "index": 0},
+            {"course_id": "course-0", "date": " 01.02.2026 ", "index": 0},
+            {"course_id": "course-1", "date": "01.02.2026", "index": 1},
+            {"course_id": "unknown", "date": "02.02.2026", "index": 0},
+        ]
+        assert await save_user_schedule_async(db, user_id, schedule) == 2
+        assert await save_user_schedule_async(db, user_id, schedule) == 0
+
+        trainings = await get_trainings_by_date_async(db, user_id, "01.02.2026")
+        assert sorted((t["course_id"], t["training_day"]["day"]) for t in trainings) == [
+            ("course-0", 1), ("course-1", 2)
+        ]
+        assert await get_user_calendar_dates_async(db, user_id) == ["01.02.2026"]
+        assert await delete_user_schedule_async(db, user_id, "course-0") == 1
+
+    run(factory, scenario)
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+    ("postgresql+psycopg2://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+    ("postgresql+psycopg://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+    ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+    ("sqlite+pysqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+    ("mysql+pymysql://u:p@db/app", None),
+])
+def test_async_database_url(url, expected):
+    """Синхронный драйвер заменяется на async-драйвер той же БД, для прочих - None"""
+    async_url = get_async_database_url(url)
+    if expected is None:
+        assert async_url is None
+    else:
+        assert async_url.render_as_string(hide_password=False) == expected
+
+
+def test_import_with_explicit_sync_driver():
+    """DATABASE_URL с явным psycopg2 не ломает импорт приложения"""
+    pytest.importorskip("psycopg2")
+    backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    env = dict(os.environ, DATABASE_URL="postgresql+psycopg2://u:p@localhost:5432/app", ASYNC_DATABASE="true")
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.database as d; print(d.engine.dialect.driver, d.async_engine is not None)"],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
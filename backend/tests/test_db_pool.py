@@ -0,0 +1,103 @@
+import sys
+import os
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Добавляем корень проекта (backend) в PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import db_pool
+from app.db_pool import DatabaseInitializer, TimedQueuePool, check_database, pool_status, register_pool, render_metrics
+
+
+@pytest.fixture
+def pool_engine(tmp_path):
+    """Движок с пулом на 1 соединение и 1 overflow"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+    register_pool("test", engine)
+    yield engine
+    db_pool._ENGINES.pop("test", None)
+    db_pool._running_pings.pop(engine, None)
+    engine.dispose()
+
+
+def test_pool_saturation_and_checkout_timeouts(pool_engine):
+    """Заполненность пула и таймауты ожидания соединения попадают в метрики"""
+    first = pool_engine.connect()
+    second = pool_engine.connect()
+    assert pool_status()["test"]["saturation"] == 1.0
+
+    with pytest.raises(PoolTimeoutError):
+        pool_engine.connect()
+    first.close()
+    second.close()
+
+    status = pool_status()["test"]
+    assert status["checked_out"] == 0
+    assert status["max_connections"] == 2
+    assert status["checkout_timeouts"] == 1
+
+    metrics = render_metrics()
+    assert 'db_pool_checkout_timeouts_total{pool="test"} 1' in metrics
+    assert 'db_pool_checkout_wait_seconds_count{pool="test"} 3' in metrics
+    assert 'db_pool_saturation{pool="test"} 0.0' in metrics
+
+
+def test_check_database(pool_engine):
+    """Проверка готовности отвечает без ошибки, а при занятом пуле - по таймауту"""
+    assert asyncio.run(check_database(pool_engine)) is None
+
+    connections = [pool_engine.connect(), pool_engine.connect()]
+    try:
+        error = asyncio.run(check_database(pool_engine, timeout=1))
+    finally:
+        for connection in connections:
+            connection.close()
+    assert error == "database unavailable: TimeoutError"
+
+
+def test_check_database_does_not_stack_stuck_pings(tmp_path):
+    """Пока прошлая проверка ждёт соединение, новая не занимает ещё один поток"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stuck.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=1
+    )
+    connection = engine.connect()
+    try:
+        assert asyncio.run(check_database(engine, timeout=0.05)) == "database did not respond within 0.05s"
+        assert asyncio.run(check_database(engine, timeout=0.05)) == "previous database check is still running"
+        assert len([f for f in db_pool._running_pings.values() if not f.done()]) == 1
+    finally:
+        connection.close()
+    # Ожидание соединения закончилось, следующая проверка снова идёт в БД
+    db_pool._running_pings[engine].exception(timeout=2)
+    assert asyncio.run(check_database(engine)) is None
+    db_pool._running_pings.pop(engine, None)
+    engine.dispose()
+
+
+def test_database_initializer_retries():
+    """Инициализация схемы повторяется, пока БД недоступна"""
+    attempts = []
+
+    def init():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("database is starting")
+
+    initializer = DatabaseInitializer(init, retry_interval=0)
+    asyncio.run(initializer.run())
+    assert initializer.ready
+    assert initializer.last_error is None
+    assert len(attempts) == 3
@@ -0,0 +1,42 @@
+import sys
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Добавляем корень проекта (backend) в PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import TrainingLocationEnum
+from app.models.user import TrainingLocation
+from app.routes.recommendations import TRAINING_ENVIRONMENTS, build_profile_filter
+
+
+def _profile(training_location):
+    return SimpleNamespace(
+        training_level="beginner",
+        training_location=training_location,
+        joint_back_problems=False,
+        chronic_conditions=False
+    )
+
+
+@pytest.mark.parametrize("location", [*TrainingLocationEnum, *TrainingLocation], ids=lambda location: location.value)
+def test_profile_filter_for_every_training_location(location):
+    """Каждое сохраняемое место тренировок либо фильтрует по среде, либо явно не ограничивает её"""
+    assert location.value in TRAINING_ENVIRONMENTS
+
+    metadata_filter = build_profile_filter(_profile(location.value))
+    environments = TRAINING_ENVIRONMENTS[location.value]
+    if environments is None:
+        assert "Training Environment" not in metadata_filter
+    else:
+        assert metadata_filter["Training Environment"] == {"$in": environments}
+        assert "Universal" in environments
+
+
+def test_profile_filter_pool_and_outdoors():
+    """Бассейн и улица подбирают программы своей среды"""
+    assert build_profile_filter(_profile("pool"))["Training Environment"] == {"$in": ["Pool", "Universal"]}
+    assert build_profile_filter(_profile("outdoors"))["Training Environment"] == {"$in": ["Outdoors", "Universal"]}
+    assert "Training Environment" not in build_profile_filter(_profile("mixed"))
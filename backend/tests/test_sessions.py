@@ -0,0 +1,200 @@
+import sys
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+# Добавляем корень проекта (backend) в PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import session_cache, token_revocation
+from app.crud import (
+    cleanup_expired_sessions, create_active_session, get_active_session,
+    get_revoked_token_ids, revoke_session, revoke_user_sessions, update_user_profile
+)
+from app.routes.auth import create_access_token, get_current_user
+from app.session_cache import LocalSessionCache
+from app.token_revocation import BloomFilter, RevocationList
+from app.models.database_models import User, ActiveSession
+
+
+def _create_user(db, username):
+    user = User(
+        username=username,
+        full_name="Session Test",
+        email=f"{username}@test.com",
+        hashed_password="hashed"
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_get_active_session(test_db):
+    """Сессия с пользователем находится только по действующему токену"""
+    user = _create_user(test_db, "session_lookup")
+    now = datetime.utcnow()
+    create_active_session(test_db, user.id, "lookup-valid", now + timedelta(minutes=30))
+    create_active_session(test_db, user.id, "lookup-expired", now - timedelta(minutes=1))
+
+    assert get_active_session(test_db, "lookup-valid").user.id == user.id
+    assert get_active_session(test_db, "lookup-expired") is None
+    assert get_active_session(test_db, "lookup-unknown") is None
+
+
+def test_cleanup_expired_sessions_in_batches(test_db):
+    """Истёкшие сессии удаляются пакетами, действующие остаются"""
+    user = _create_user(test_db, "session_cleanup")
+    now = datetime.utcnow()
+    for i in range(7):
+        create_active_session(test_db, user.id, f"cleanup-expired-{i}", now - timedelta(minutes=i + 1))
+    create_active_session(test_db, user.id, "cleanup-valid", now + timedelta(minutes=30))
+    already_expired = test_db.query(ActiveSession).filter(ActiveSession.expires_at <= now).count()
+
+    assert cleanup_expired_sessions(test_db, batch_size=3) == already_expired
+    assert test_db.query(ActiveSession).filter(ActiveSession.expires_at <= now).count() == 0
+    assert get_active_session(test_db, "cleanup-valid").user_id == user.id
+    assert cleanup_expired_sessions(test_db, batch_size=3) == 0
+
+
+def test_local_session_cache_limits_and_invalidation():
+    """Локальный кэш вытесняет старые записи и сбрасывается по токену и пользователю"""
+    cache = LocalSessionCache(max_size=2)
+    cache.set("t1", {"id": 1}, ttl=60)
+    cache.set("t2", {"id": 1}, ttl=60)
+    assert cache.get("t1") == {"id": 1}
+    cache.set("t3", {"id": 2}, ttl=60)
+    assert cache.get("t2") is None
+    assert len(cache) == 2
+
+    cache.delete("t3")
+    assert cache.get("t3") is None
+    cache.set("t4", {"id": 1}, ttl=60)
+    cache.delete_user(1)
+    assert len(cache) == 0
+
+    cache.set("t5", {"id": 3}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("t5") is None
+
+
+def test_session_cache_invalidated_by_crud(test_db):
+    """Отзыв сессий и изменение пользователя сбрасывают кэш"""
+    previous = session_cache.get_backend()
+    session_cache.set_backend(LocalSessionCache())
+    try:
+        user = _create_user(test_db, "session_cache")
+        expires_at = datetime.utcnow() + timedelta(minutes=30)
+        for token in ("cache-1", "cache-2", "cache-3"):
+            create_active_session(test_db, user.id, token, expires_at)
+            session_cache.cache_principal(token, {"id": user.id}, expires_at)
+
+        revoke_session(test_db, "cache-1")
+        assert session_cache.get_principal("cache-1") is None
+        assert session_cache.get_principal("cache-2") == {"id": user.id}
+
+        update_user_profile(test_db, user.id, full_name="Renamed User")
+        assert session_cache.get_principal("cache-2") is None
+
+        session_cache.cache_principal("cache-2", {"id": user.id}, expires_at)
+        revoke_user_sessions(test_db, user.id)
+        assert session_cache.get_principal("cache-2") is None
+        assert get_active_session(test_db, "cache-3") is None
+
+        # Истёкшая сессия не кэшируется
+        session_cache.cache_principal("cache-old", {"id": user.id}, datetime.utcnow())
+        assert session_cache.get_principal("cache-old") is None
+    finally:
+        session_cache.set_backend(previous)
+
+
+def test_revoke_session_invalidates_cache_after_commit(test_db):
+    """Пользователь, закэшированный параллельным запросом до commit, не переживает отзыв"""
+    previous = session_cache.get_backend()
+    session_cache.set_backend(LocalSessionCache())
+    try:
+        user = _create_user(test_db, "session_cache_race")
+        expires_at = datetime.utcnow() + timedelta(minutes=30)
+        create_active_session(test_db, user.id, "race-token", expires_at)
+
+        # Параллельный запрос видит ещё не удалённую сессию и кэширует пользователя
+        recache = lambda session: session_cache.cache_principal("race-token", {"id": user.id}, expires_at)
+        event.listen(test_db, "before_commit", recache)
+        try:
+            assert revoke_session(test_db, "race-token")
+        finally:
+            event.remove(test_db, "before_commit", recache)
+        assert session_cache.get_principal("race-token") is None
+
+        # Токен без строки в active_sessions тоже сбрасывается из кэша
+        session_cache.cache_principal("orphan-token", {"id": user.id}, expires_at)
+        assert not revoke_session(test_db, "orphan-token")
+        assert session_cache.get_principal("orphan-token") is None
+    finally:
+        session_cache.set_backend(previous)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Bloom-фильтр находит все добавленные jti и редко ошибается на остальных"""
+    bloom = BloomFilter(2000, error_rate=0.001)
+    added = [uuid.uuid4().hex for _ in range(2000)]
+    for jti in added:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in added)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 100
+
+
+def test_revocation_list_rebuild_keeps_local_revocations():
+    """До первой пересборки отозванным считается любой токен; локальные отзывы переживают пересборку"""
+    revocations = RevocationList()
+    assert revocations.might_be_revoked("any")
+
+    revocations.add("local")
+    assert revocations.rebuild(["from-db"]) == 2
+    assert revocations.might_be_revoked("local")
+    assert revocations.might_be_revoked("from-db")
+    assert not revocations.might_be_revoked("valid")
+
+
+def test_stateless_auth_without_db_queries(test_db, monkeypatch):
+    """При AUTH_MODE=jwt повторная проверка токена не обращается к БД, отзыв виден сразу"""
+    monkeypatch.setattr(token_revocation, "STATELESS_AUTH", True)
+    monkeypatch.setattr(token_revocation, "REVOCATION_LIST", RevocationList())
+    previous = session_cache.get_backend()
+    session_cache.set_backend(LocalSessionCache())
+    try:
+        user = _create_user(test_db, "stateless_auth")
+        token = create_access_token({"sub": user.email, "user_id": user.id})
+        create_active_session(test_db, user.id, token, datetime.utcnow() + timedelta(minutes=30))
+        token_revocation.REVOCATION_LIST.rebuild(get_revoked_token_ids(test_db))
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        assert get_current_user(credentials, test_db)["id"] == user.id
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+        try:
+            assert get_current_user(credentials, test_db)["username"] == "stateless_auth"
+        finally:
+            event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+        assert statements == []
+
+        revoke_session(test_db, token)
+        with pytest.raises(HTTPException):
+            get_current_user(credentials, test_db)
+
+        # Другой процесс узнаёт об отзыве после пересборки списка из БД
+        session_cache.get_backend().clear()
+        monkeypatch.setattr(token_revocation, "REVOCATION_LIST", RevocationList())
+        token_revocation.REVOCATION_LIST.rebuild(get_revoked_token_ids(test_db))
+        with pytest.raises(HTTPException):
+            get_current_user(credentials, test_db)
+    finally:
+        session_cache.set_backend(previous)
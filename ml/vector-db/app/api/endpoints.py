@@ -1,7 +1,13 @@
+import json
+import time
+import asyncio
 import logging
-from typing import List
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, List
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 
 from .models import (
     CreateIndexRequest,
@@ -11,6 +17,9 @@ from .models import (
     SearchRequest,
     SearchResponse,
     SearchResult,
+    SearchBatchRequest,
+    SearchBatchResponse,
+    BatchSearchResult,
     GetEmbeddingRequest,
     GetEmbeddingResponse,
     GetIndexDocsRequest,
@@ -20,17 +29,36 @@ from .models import (
     DeleteIndexResponse,
     GetDocumentRequest,
     GetDocumentResponse,
+    UpsertDocumentsRequest,
+    UpsertDocumentsResponse,
+    DeleteDocumentsRequest,
+    DeleteDocumentsResponse,
 )
 from .service import VectorDBService
+from ..services.metrics import REGISTRY, REQUEST_SECONDS, stage, start_trace
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 vector_service = VectorDBService()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Checkpoint idle writes periodically; save them and stop workers on shutdown."""
+    checkpoints = asyncio.create_task(vector_service.checkpoint_periodically())
+    yield
+    checkpoints.cancel()
+    with suppress(asyncio.CancelledError):
+        await checkpoints
+    await vector_service.aclose()
+
+
 app = FastAPI(
     title="Vector Database API",
     description="API for vector similarity search and document storage",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -39,22 +67,57 @@ def get_vector_service() -> VectorDBService:
     return vector_service
 
 
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Record request latency; add stage timings if tracing is on or requested."""
+    trace = start_trace()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    # Route templates, not raw paths, keep the label set bounded
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    )
+    if vector_service.trace_headers or request.headers.get("x-trace") == "1":
+        response.headers["Server-Timing"] = trace.server_timing(total=elapsed)
+    return response
+
+
+def _json_response(model: BaseModel) -> Response:
+    """JSON response for a built model; FastAPI would validate it again."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
 @app.post("/create_index", response_model=CreateIndexResponse)
 async def create_index(
     request: CreateIndexRequest, service: VectorDBService = Depends(get_vector_service)
 ):
     """Create a new vector index."""
     try:
-        success = service.create_index(
+        success = await service.create_index(
             name=request.name,
             dimension=request.dimension,
             distance_metric=request.distance_metric,
             index_type=request.index_type,
             nlist=request.nlist,
             nprobe=request.nprobe,
+            pq_m=request.pq_m,
+            pq_nbits=request.pq_nbits,
+            hnsw_m=request.hnsw_m,
+            ef_construction=request.ef_construction,
+            ef_search=request.ef_search,
             bm25_k1=request.bm25_k1,
             bm25_b=request.bm25_b,
             bm25_epsilon=request.bm25_epsilon,
+            dense_index_type=request.dense_index_type,
+            fusion=request.fusion,
+            rrf_k=request.rrf_k,
+            dense_weight=request.dense_weight,
         )
 
         return CreateIndexResponse(
@@ -76,7 +139,7 @@ async def add_documents(
 ):
     """Add documents to an index."""
     try:
-        added_count, document_ids = service.add_documents(
+        added_count, document_ids = await service.add_documents(
             index_name=request.index_name, documents=request.documents
         )
 
@@ -94,6 +157,55 @@ async def add_documents(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/upsert_documents", response_model=UpsertDocumentsResponse)
+async def upsert_documents(
+    request: UpsertDocumentsRequest, service: VectorDBService = Depends(get_vector_service)
+):
+    """Insert documents or replace the stored versions with the same ids."""
+    try:
+        upserted_count, document_ids = await service.upsert_documents(
+            index_name=request.index_name, documents=request.documents
+        )
+
+        return UpsertDocumentsResponse(
+            success=True,
+            message=f"Upserted {upserted_count} documents in index '{request.index_name}'",
+            upserted_count=upserted_count,
+            document_ids=document_ids,
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error upserting documents: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/delete_documents", response_model=DeleteDocumentsResponse)
+async def delete_documents(
+    request: DeleteDocumentsRequest, service: VectorDBService = Depends(get_vector_service)
+):
+    """Delete documents from an index."""
+    try:
+        deleted_ids, not_found_ids = await service.delete_documents(
+            index_name=request.index_name, document_ids=request.document_ids
+        )
+
+        return DeleteDocumentsResponse(
+            success=True,
+            message=f"Deleted {len(deleted_ids)} documents from index '{request.index_name}'",
+            deleted_count=len(deleted_ids),
+            deleted_ids=deleted_ids,
+            not_found_ids=not_found_ids,
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error deleting documents: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @app.post("/get_document", response_model=GetDocumentResponse)
 async def get_document(
     request: GetDocumentRequest, service: VectorDBService = Depends(get_vector_service)
@@ -101,42 +213,85 @@ async def get_document(
     """Get a document from an index."""
     return GetDocumentResponse(
         success=True,
-        document=service.get_document(request.index_name, request.document_id),
+        document=await service.get_document(request.index_name, request.document_id),
     )
 
 
+def _to_search_results(distances, documents) -> List[SearchResult]:
+    """Convert distances and documents into search results."""
+    return [
+        SearchResult(
+            id=doc.id,
+            content=f"{doc.content[:10]}...",
+            metadata=doc.metadata or {},
+            distance=distance,
+        )
+        for distance, doc in zip(distances, documents)
+    ]
+
+
 @app.post("/search_index", response_model=SearchResponse)
 async def search_index(
     request: SearchRequest, service: VectorDBService = Depends(get_vector_service)
 ):
     """Search for similar vectors in an index."""
     try:
-        distances, documents, query_time = service.search(
+        distances, documents, query_time = await service.search(
             index_name=request.index_name,
             query_vector=request.query_vector,
             query_text=request.query_text,
             k=request.k,
             nprobe=request.nprobe,
+            ef_search=request.ef_search,
+            metadata_filter=request.filter,
         )
 
-        results = []
-        for distance, doc in zip(distances, documents):
-            if doc.id:
-                results.append(
-                    SearchResult(
-                        id=doc.id,
-                        content=f"{doc.content[:10]}...",
-                        metadata=doc.metadata or {},
-                        distance=distance,
-                    )
+        with stage("serialize", "json"):
+            results = _to_search_results(distances, documents)
+            return _json_response(
+                SearchResponse(success=True, results=results, query_time_ms=query_time)
+            )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching index: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/search_batch", response_model=SearchBatchResponse)
+async def search_batch(
+    request: SearchBatchRequest, service: VectorDBService = Depends(get_vector_service)
+):
+    """Search for similar vectors for many queries in one call."""
+    try:
+        batch = await service.search_batch(
+            index_name=request.index_name,
+            queries=[query.model_dump() for query in request.queries],
+            k=request.k,
+            nprobe=request.nprobe,
+            ef_search=request.ef_search,
+            metadata_filter=request.filter,
+        )
+
+        with stage("serialize", "json"):
+            results = [
+                BatchSearchResult(
+                    results=_to_search_results(distances, documents),
+                    query_time_ms=query_time,
                 )
+                for distances, documents, query_time in batch
+            ]
+            total_time = sum(result.query_time_ms for result in results)
 
-        return SearchResponse(success=True, results=results, query_time_ms=query_time)
+            return _json_response(
+                SearchBatchResponse(success=True, results=results, query_time_ms=total_time)
+            )
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error searching index: {e}")
+        logger.error(f"Error in batch search: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -146,7 +301,7 @@ async def get_embedding(
 ):
     """Get embeddings for texts."""
     try:
-        embeddings, dimension, model_used = service.get_embeddings(
+        embeddings, dimension, model_used = await service.get_embeddings(
             texts=request.texts, model_name=request.model_name
         )
 
@@ -166,10 +321,13 @@ async def get_embedding(
 async def get_index_docs(
     request: GetIndexDocsRequest, service: VectorDBService = Depends(get_vector_service)
 ):
-    """Get documents from an index with pagination."""
+    """Get documents from an index with offset or cursor pagination, in id order."""
     try:
-        documents, total_count = service.get_index_documents(
-            index_name=request.index_name, limit=request.limit, offset=request.offset
+        documents, total_count, next_cursor = await service.get_index_documents(
+            index_name=request.index_name,
+            limit=request.limit,
+            offset=request.offset,
+            cursor=request.cursor,
         )
 
         doc_infos: List[DocumentInfo] = [
@@ -183,6 +341,7 @@ async def get_index_docs(
             total_count=total_count,
             offset=request.offset,
             limit=request.limit,
+            next_cursor=next_cursor,
         )
 
     except ValueError as e:
@@ -192,6 +351,24 @@ async def get_index_docs(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/indices/{index_name}/export")
+async def export_index_docs(
+    index_name: str, service: VectorDBService = Depends(get_vector_service)
+):
+    """Stream all documents of an index as NDJSON, one document per line."""
+    try:
+        documents = service.export_index_documents(index_name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for doc in documents:
+            line = {"id": doc.id, "content": doc.content, "metadata": doc.metadata or {}}
+            yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health(service: VectorDBService = Depends(get_vector_service)):
     """Health check endpoint."""
@@ -202,13 +379,21 @@ async def health(service: VectorDBService = Depends(get_vector_service)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.delete("/indices/{index_name}", response_model=DeleteIndexResponse)
 async def delete_index(
     index_name: str, service: VectorDBService = Depends(get_vector_service)
 ):
     """Delete an index and all its data."""
     try:
-        success = service.delete_index(index_name)
+        success = await service.delete_index(index_name)
         return DeleteIndexResponse(
             success=success,
             message=f"Index '{index_name}' deleted successfully",
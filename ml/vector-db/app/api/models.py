@@ -12,16 +12,30 @@ class CreateIndexRequest(BaseModel):
         default="L2", description="Distance metric (L2, IP, COSINE)"
     )
     index_type: str = Field(
-        default="IVF_FLAT", description="Index type (FLAT, IVF_FLAT, BM25)"
+        default="IVF_FLAT",
+        description="Index type (FLAT, IVF_FLAT, IVF_PQ, HNSW, SQ8, SQ_FP16, BM25, HYBRID)",
     )
     nlist: int = Field(default=100, gt=0, description="Number of clusters for IVF")
     nprobe: int = Field(default=10, gt=0, description="Number of clusters to probe")
+
+    # Quantization and graph parameters
+    pq_m: Optional[int] = Field(default=None, gt=0, description="Number of PQ sub-quantizers (IVF_PQ; default: dimension / 8)")
+    pq_nbits: Optional[int] = Field(default=None, gt=0, le=16, description="Bits per PQ code (IVF_PQ)")
+    hnsw_m: Optional[int] = Field(default=None, gt=0, description="Graph neighbors per node (HNSW)")
+    ef_construction: Optional[int] = Field(default=None, gt=0, description="Candidate list size while building (HNSW)")
+    ef_search: Optional[int] = Field(default=None, gt=0, description="Default candidate list size while searching (HNSW)")
     
     # BM25-specific parameters
     bm25_k1: Optional[float] = Field(default=1.2, gt=0, description="BM25 k1 parameter (term frequency saturation)")
     bm25_b: Optional[float] = Field(default=0.75, ge=0, le=1, description="BM25 b parameter (length normalization)")
     bm25_epsilon: Optional[float] = Field(default=0.25, ge=0, description="BM25 epsilon parameter (IDF floor)")
 
+    # Hybrid-specific parameters
+    dense_index_type: Optional[str] = Field(default=None, description="Vector index type of the dense half (HYBRID; default: service default)")
+    fusion: Optional[str] = Field(default=None, description="Rank fusion method (HYBRID): rrf or weighted")
+    rrf_k: Optional[int] = Field(default=None, gt=0, description="Reciprocal rank fusion constant (HYBRID)")
+    dense_weight: Optional[float] = Field(default=None, ge=0, le=1, description="Weight of normalized dense scores in weighted fusion (HYBRID)")
+
 
 class CreateIndexResponse(BaseModel):
     """Response model for index creation."""
@@ -47,6 +61,39 @@ class AddDocumentsResponse(BaseModel):
     document_ids: List[str]
 
 
+class UpsertDocumentsRequest(BaseModel):
+    """Request model for inserting or replacing documents by id."""
+
+    index_name: str = Field(..., description="Index name")
+    documents: List[Any] = Field(..., description="Documents, each with an 'id'")
+
+
+class UpsertDocumentsResponse(BaseModel):
+    """Response model for upserting documents."""
+
+    success: bool
+    message: str
+    upserted_count: int
+    document_ids: List[str]
+
+
+class DeleteDocumentsRequest(BaseModel):
+    """Request model for deleting documents."""
+
+    index_name: str = Field(..., description="Index name")
+    document_ids: List[str] = Field(..., min_length=1, description="IDs of documents to delete")
+
+
+class DeleteDocumentsResponse(BaseModel):
+    """Response model for deleting documents."""
+
+    success: bool
+    message: str
+    deleted_count: int
+    deleted_ids: List[str]
+    not_found_ids: List[str]
+
+
 class GetDocumentRequest(BaseModel):
     """Request model for getting a document."""
 
@@ -69,6 +116,14 @@ class SearchRequest(BaseModel):
     query_text: Optional[str] = Field(None, description="Query text (will be embedded)")
     k: int = Field(default=5, gt=0, le=100, description="Number of results")
     nprobe: Optional[int] = Field(None, gt=0, description="Number of clusters to probe")
+    ef_search: Optional[int] = Field(None, gt=0, description="HNSW candidate list size")
+    filter: Optional[Dict[str, Any]] = Field(
+        None,
+        description=(
+            "Metadata filter: field -> value, list of values, or "
+            "{'$eq'|'$ne'|'$in'|'$nin': ...}; fields are combined with AND"
+        ),
+    )
 
 
 class SearchResult(BaseModel):
@@ -88,6 +143,47 @@ class SearchResponse(BaseModel):
     query_time_ms: float
 
 
+class BatchQuery(BaseModel):
+    """Single query within a batch search."""
+
+    query_vector: Optional[List[float]] = Field(None, description="Query vector")
+    query_text: Optional[str] = Field(None, description="Query text (will be embedded)")
+
+
+class SearchBatchRequest(BaseModel):
+    """Request model for batch search."""
+
+    index_name: str = Field(..., description="Index name")
+    queries: List[BatchQuery] = Field(
+        ..., min_length=1, max_length=1000, description="Queries to search for"
+    )
+    k: int = Field(default=5, gt=0, le=100, description="Number of results per query")
+    nprobe: Optional[int] = Field(None, gt=0, description="Number of clusters to probe")
+    ef_search: Optional[int] = Field(None, gt=0, description="HNSW candidate list size")
+    filter: Optional[Dict[str, Any]] = Field(
+        None,
+        description=(
+            "Metadata filter: field -> value, list of values, or "
+            "{'$eq'|'$ne'|'$in'|'$nin': ...}; fields are combined with AND"
+        ),
+    )
+
+
+class BatchSearchResult(BaseModel):
+    """Search results for a single query of a batch."""
+
+    results: List[SearchResult]
+    query_time_ms: float
+
+
+class SearchBatchResponse(BaseModel):
+    """Response model for batch search."""
+
+    success: bool
+    results: List[BatchSearchResult]
+    query_time_ms: float
+
+
 class GetEmbeddingRequest(BaseModel):
     """Request model for getting embeddings."""
 
@@ -112,6 +208,11 @@ class GetIndexDocsRequest(BaseModel):
         default=10, gt=0, le=1000, description="Maximum number of documents"
     )
     offset: int = Field(default=0, ge=0, description="Offset for pagination")
+    cursor: Optional[str] = Field(
+        default=None,
+        description="Return documents after this id (next_cursor of the previous page); "
+        "takes precedence over offset",
+    )
 
 
 class DocumentInfo(BaseModel):
@@ -130,6 +231,7 @@ class GetIndexDocsResponse(BaseModel):
     total_count: int
     offset: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -140,6 +242,8 @@ class HealthResponse(BaseModel):
     version: str
     indices: Dict[str, Dict]
     loaded_embedders: List[str]
+    embedding_cache: Dict[str, Dict] = {}
+    embedder_pools: Dict[str, Dict] = {}
     config: Dict
 
 
@@ -1,24 +1,39 @@
 import os
 import time
 import shutil
+import asyncio
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+import threading
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, Any, TypeVar
 from datetime import datetime
 
 import numpy as np
 
-from ..services.config import VectorDBConfig, DistanceMetric, IndexType
-from ..services.vector_db import VectorDB
+from ..services.config import VectorDBConfig, DistanceMetric, IndexType, FusionMethod
+from ..services.indices import IndexFactory
 from ..services.bm25_index import BM25Index
+from ..services.hybrid_index import HybridIndex, hybrid_path
 from ..services.document import Document
+from ..services.storage import store_path
+from ..services.catalog import IndexCatalog, Index
+from ..services.locks import ReadWriteLock
+from ..services.metrics import stage
 from ..services.embedder.huggingface import HuggingFaceEmbedder
+from ..services.embedder.onnx import ONNXEmbedder
 from ..services.embedder.api import KlusterAIEmbedder
 from ..services.embedder.bm25 import BM25Embedder
 from ..services.embedder.base import BaseEmbedder
+from ..services.embedder.cache import CachedEmbedder
+from ..services.embedder.pool import EmbedderPool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class VectorDBService:
     """Service layer for managing vector databases."""
@@ -40,44 +55,115 @@ class VectorDBService:
         self.default_index_type = os.getenv("INDEX_TYPE", "IVF_FLAT")
         self.default_nlist = int(os.getenv("NLIST", "100"))
         self.default_nprobe = int(os.getenv("NPROBE", "10"))
+        self.train_points_per_centroid = int(
+            os.getenv("TRAIN_POINTS_PER_CENTROID", "39")
+        )
+        self.retrain_growth_factor = float(os.getenv("RETRAIN_GROWTH_FACTOR", "2.0"))
         self.embedder_device = os.getenv("EMBEDDER_DEVICE", "cpu")
         self.embedder_max_length = int(os.getenv("EMBEDDER_MAX_LENGTH", "512"))
         self.embedder_pooling = os.getenv("EMBEDDER_POOLING_STRATEGY", "mean")
         self.embedder_normalize = (
             os.getenv("EMBEDDER_NORMALIZE", "true").lower() == "true"
         )
-
-        self.indices: Dict[str, VectorDB] = {}
+        self.checkpoint_batch_size = int(os.getenv("CHECKPOINT_BATCH_SIZE", "100"))
+        self.checkpoint_interval = float(os.getenv("CHECKPOINT_INTERVAL_SECONDS", "30"))
+        self.embedding_cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        self.embedding_cache_path = os.getenv("EMBEDDING_CACHE_PATH") or None
+        self.embedder_onnx_dir = os.getenv(
+            "EMBEDDER_ONNX_DIR", os.path.join(self.data_dir, "onnx")
+        )
+        self.embedder_onnx_quantize = (
+            os.getenv("EMBEDDER_ONNX_QUANTIZE", "false").lower() == "true"
+        )
+        self.embedder_workers = int(os.getenv("EMBEDDER_WORKERS", "0"))
+        self.embedder_max_batch_size = int(os.getenv("EMBEDDER_MAX_BATCH_SIZE", "32"))
+        self.embedder_max_wait_ms = float(os.getenv("EMBEDDER_MAX_WAIT_MS", "5"))
+        self.embedder_api_batch_size = int(os.getenv("EMBEDDER_API_BATCH_SIZE", "32"))
+        self.embedder_api_concurrency = int(os.getenv("EMBEDDER_API_CONCURRENCY", "4"))
+        self.workers = int(os.getenv("VECTOR_DB_WORKERS", str(os.cpu_count() or 4)))
+        self.compaction_threshold = float(os.getenv("COMPACTION_THRESHOLD", "0.2"))
+        self.export_batch_size = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+        self.trace_headers = os.getenv("TRACE_HEADERS", "false").lower() == "true"
+
+        self.indices = IndexCatalog(
+            self.data_dir,
+            checkpoint_batch_size=self.checkpoint_batch_size,
+            checkpoint_interval=self.checkpoint_interval,
+        )
         self.embedders: Dict[str, BaseEmbedder] = {}
+        # Model type per embedder, the "kind" of its embed stage metrics
+        self.embedder_types: Dict[str, str] = {}
+
+        # FAISS and BM25 work runs here so it never blocks the event loop;
+        # the pool size bounds how many CPU-bound requests run at once
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="vector-db"
+        )
+        # Searches share an index; ingest and deletion hold it exclusively
+        self._locks: Dict[str, ReadWriteLock] = {}
+        self._locks_guard = threading.Lock()
+        # Indices with a compaction queued on the worker pool
+        self._compacting: Set[str] = set()
 
-        os.makedirs(self.data_dir, exist_ok=True)
         logger.info(f"Creating {self.default_embedder, self.default_embedder_type}")
         self._get_embedder(self.default_embedder, self.default_embedder_type)
 
+    def _cached(self, embedder: BaseEmbedder) -> BaseEmbedder:
+        """Wrap an embedder with the configured embedding cache."""
+        if self.embedding_cache_size <= 0 and not self.embedding_cache_path:
+            return embedder
+        return CachedEmbedder(
+            embedder,
+            max_entries=self.embedding_cache_size,
+            disk_path=self.embedding_cache_path,
+        )
+
+    def _pooled(self, embedder: BaseEmbedder) -> BaseEmbedder:
+        """Move a local model into worker processes, if configured."""
+        if self.embedder_workers <= 0:
+            return embedder
+        return EmbedderPool(
+            embedder,
+            num_workers=self.embedder_workers,
+            max_batch_size=self.embedder_max_batch_size,
+            max_wait_ms=self.embedder_max_wait_ms,
+        )
+
     def _get_embedder(
         self, model_name: str, model_type: str = "klusterai", **kwargs: Any
     ) -> BaseEmbedder:
         """Get or create embedder with configured parameters."""
         if model_name not in self.embedders:
             if model_type == "huggingface":
-                self.embedders[model_name] = HuggingFaceEmbedder(
+                self.embedders[model_name] = self._cached(self._pooled(HuggingFaceEmbedder(
                     model_name=model_name,
                     device=self.embedder_device,
                     max_length=self.embedder_max_length,
                     pooling_strategy=self.embedder_pooling,
                     normalize=self.embedder_normalize,
-                )
+                )))
+            elif model_type == "onnx":
+                self.embedders[model_name] = self._cached(self._pooled(ONNXEmbedder(
+                    model_name=model_name,
+                    cache_dir=self.embedder_onnx_dir,
+                    max_length=self.embedder_max_length,
+                    pooling_strategy=self.embedder_pooling,
+                    normalize=self.embedder_normalize,
+                    quantize=self.embedder_onnx_quantize,
+                )))
             elif model_type == "klusterai":
                 api_key = os.getenv("KLUSTER_AI_API_KEY")
                 if not api_key:
                     raise ValueError(
                         "KLUSTER_AI_API_KEY environment variable is required for KlusterAI embedder"
                     )
-                self.embedders[model_name] = KlusterAIEmbedder(
+                self.embedders[model_name] = self._cached(KlusterAIEmbedder(
                     api_key=api_key,
                     model_name=model_name,
                     dimension=kwargs.get("dimension", 1024),
-                )
+                    max_batch_size=self.embedder_api_batch_size,
+                    max_concurrency=self.embedder_api_concurrency,
+                ))
             elif model_type == "bm25":
                 self.embedders[model_name] = BM25Embedder(
                     k1=kwargs.get("k1", 1.2),
@@ -86,9 +172,77 @@ class VectorDBService:
                 )
             else:
                 raise ValueError(f"Unsupported model type: {model_type}")
+            self.embedder_types[model_name] = model_type
         return self.embedders[model_name]
 
-    def create_index(
+    def _lock(self, index_name: str) -> ReadWriteLock:
+        """Reader/writer lock of an index."""
+        with self._locks_guard:
+            return self._locks.setdefault(index_name, ReadWriteLock())
+
+    async def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking call on the worker pool."""
+        loop = asyncio.get_running_loop()
+        # The request's trace follows the call into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, fn, *args, **kwargs)
+        )
+
+    def _read_index(self, index_name: str, fn: Callable[[Index], T]) -> T:
+        """Apply ``fn`` to an index under its shared lock (worker thread)."""
+        with self._lock(index_name).read():
+            if index_name not in self.indices:
+                raise ValueError(f"Index '{index_name}' not found")
+            return fn(self.indices[index_name])
+
+    async def _embed(self, texts: List[str], model_name: Optional[str]) -> np.ndarray:
+        """Embed texts without blocking the event loop."""
+        model_name = model_name or self.default_embedder
+        embedder = self._get_embedder(model_name)
+        with stage("embed", self.embedder_types.get(model_name, "")):
+            return await embedder.aencode(texts, executor=self._executor)
+
+    def _is_bm25(self, index_name: str) -> bool:
+        return self.indices.entry(index_name)["kind"] == "bm25"
+
+    def _is_hybrid(self, index_name: str) -> bool:
+        return self.indices.entry(index_name)["kind"] == "hybrid"
+
+    async def _search_hybrid(
+        self,
+        index_name: str,
+        query_texts: List[str],
+        query_vectors: np.ndarray,
+        k: int,
+        metadata_filter: Optional[Dict[str, Any]],
+        search_kwargs: Dict[str, Any],
+    ) -> Tuple[List[List[float]], List[List[Document]]]:
+        """Run the BM25 and dense halves of a hybrid search concurrently, then fuse."""
+        sparse, (fuse, dense) = await asyncio.gather(
+            self._run(
+                self._read_index,
+                index_name,
+                lambda db: db.search_sparse(
+                    query_texts, k, metadata_filter=metadata_filter
+                ),
+            ),
+            self._run(
+                self._read_index,
+                index_name,
+                lambda db: (
+                    db.fuse,
+                    db.search_dense(
+                        query_vectors, k, metadata_filter=metadata_filter, **search_kwargs
+                    ),
+                ),
+            ),
+        )
+
+        fused = [fuse(s, d, k) for s, d in zip(sparse, dense)]
+        return [scores for scores, _ in fused], [documents for _, documents in fused]
+
+    async def create_index(
         self,
         name: str,
         dimension: int,
@@ -96,9 +250,18 @@ class VectorDBService:
         index_type: Optional[str] = None,
         nlist: Optional[int] = None,
         nprobe: Optional[int] = None,
+        pq_m: Optional[int] = None,
+        pq_nbits: Optional[int] = None,
+        hnsw_m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        ef_search: Optional[int] = None,
         bm25_k1: Optional[float] = None,
         bm25_b: Optional[float] = None,
         bm25_epsilon: Optional[float] = None,
+        dense_index_type: Optional[str] = None,
+        fusion: Optional[str] = None,
+        rrf_k: Optional[int] = None,
+        dense_weight: Optional[float] = None,
     ) -> bool:
         """Create a new index with default values from environment."""
         if name in self.indices:
@@ -109,33 +272,109 @@ class VectorDBService:
         nlist = nlist or self.default_nlist
         nprobe = nprobe or self.default_nprobe
         distance_metric_enum = DistanceMetric(distance_metric)
-        index_type_enum = IndexType(index_type)
+        index_type_enum = IndexType.parse(index_type)
 
         if index_type_enum == IndexType.BM25:
-            self.indices[name] = BM25Index(
-                k1=bm25_k1 or 1.2,
-                b=bm25_b or 0.75,
-                epsilon=bm25_epsilon or 0.25,
-                index_path=os.path.join(self.data_dir, name),
+            await self._run(
+                self.indices.create,
+                name,
+                "bm25",
+                {
+                    "k1": bm25_k1 or 1.2,
+                    "b": bm25_b or 0.75,
+                    "epsilon": bm25_epsilon or 0.25,
+                },
             )
         else:
+            kind = "vector"
+            if index_type_enum == IndexType.HYBRID:
+                # The config describes the dense half; BM25 uses bm25_*
+                kind = "hybrid"
+                index_type_enum = IndexType.parse(
+                    dense_index_type or self.default_index_type
+                )
+                if index_type_enum in (IndexType.BM25, IndexType.HYBRID):
+                    raise ValueError("dense_index_type must be a vector index type")
+
+            # Unset quantization/graph/fusion parameters keep the config defaults
+            overrides = {
+                key: value
+                for key, value in {
+                    "pq_m": pq_m,
+                    "pq_nbits": pq_nbits,
+                    "hnsw_m": hnsw_m,
+                    "ef_construction": ef_construction,
+                    "ef_search": ef_search,
+                    "fusion": FusionMethod(fusion) if fusion else None,
+                    "rrf_k": rrf_k,
+                    "dense_weight": dense_weight,
+                }.items()
+                if value is not None
+            }
+            if not 0.0 <= overrides.get("dense_weight", 0.5) <= 1.0:
+                raise ValueError("dense_weight must be between 0 and 1")
+
             config = VectorDBConfig(
                 dimension=dimension,
                 distance_metric=distance_metric_enum,
                 index_type=index_type_enum,
                 nlist=nlist,
                 nprobe=nprobe,
+                train_points_per_centroid=self.train_points_per_centroid,
+                retrain_growth_factor=self.retrain_growth_factor,
                 bm25_k1=bm25_k1 or 1.2,
                 bm25_b=bm25_b or 0.75,
                 bm25_epsilon=bm25_epsilon or 0.25,
-                index_path=os.path.join(self.data_dir, name),
+                **overrides,
             )
+            # Reject invalid parameters before the index is registered
+            IndexFactory.create_index(config)
 
-            self.indices[name] = VectorDB(config)
+            await self._run(self.indices.create, name, kind, config.to_dict())
 
         return True
 
-    def add_documents(
+    def flush(self) -> None:
+        """Checkpoint all indices with unsaved writes, each under its exclusive lock."""
+        self.indices.flush(lambda name: self._lock(name).write())
+
+    async def checkpoint_periodically(self) -> None:
+        """
+        Save indices whose unsaved writes are older than the checkpoint interval.
+
+        Runs until cancelled; without it, writes followed by a quiet period
+        would only be saved by the next write or on shutdown.
+        """
+        if self.checkpoint_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.checkpoint_interval / 2)
+            try:
+                await self._run(
+                    self.indices.flush_due, lambda name: self._lock(name).write()
+                )
+            except Exception as e:
+                logger.error(f"Periodic checkpoint failed: {e}")
+
+    def close(self) -> None:
+        """Stop the worker pool, save pending writes and stop the embedders."""
+        self._shutdown_workers()
+        for embedder in self.embedders.values():
+            embedder.close()
+
+    async def aclose(self) -> None:
+        """Async ``close``; also closes the embedders' async HTTP clients."""
+        await asyncio.to_thread(self._shutdown_workers)
+        for embedder in self.embedders.values():
+            await embedder.aclose()
+
+    def _shutdown_workers(self) -> None:
+        """Stop the worker pool, then save pending writes."""
+        # In-flight writes and queued compactions finish before the final save
+        self._executor.shutdown(wait=True)
+        self.flush()
+
+    async def add_documents(
         self,
         index_name: str,
         documents: List[Dict],
@@ -145,8 +384,6 @@ class VectorDBService:
         if index_name not in self.indices:
             raise ValueError(f"Index '{index_name}' not found")
 
-        db = self.indices[index_name]
-
         doc_objects = []
         texts = []
 
@@ -164,34 +401,116 @@ class VectorDBService:
             )
             doc_objects.append(doc)
 
-        if isinstance(db, BM25Index):
-            db.add_documents(doc_objects)
-        else:
-            embedder = self._get_embedder(embedder_model or self.default_embedder)
-            embeddings = embedder.encode(texts)
+        if not self._is_bm25(index_name):
+            # Embed before taking the lock so searches keep running meanwhile
+            embeddings = await self._embed(texts, embedder_model)
 
             for doc, embedding in zip(doc_objects, embeddings):
                 doc.vector = embedding
 
-            db.add_documents(doc_objects)
+        await self._run(self._write_documents, index_name, doc_objects)
 
         return len(doc_objects), [doc.id for doc in doc_objects]
 
-    def get_document(self, index_name: str, document_id: str) -> Dict:
+    async def upsert_documents(
+        self,
+        index_name: str,
+        documents: List[Dict],
+        embedder_model: Optional[str] = None,
+    ) -> Tuple[int, List[str]]:
+        """Insert documents or replace the stored versions with the same ids."""
+        for doc_data in documents:
+            if not doc_data.get("id"):
+                raise ValueError("Document must have 'id' field to be upserted")
+
+        return await self.add_documents(index_name, documents, embedder_model)
+
+    def _write_documents(self, index_name: str, documents: List[Document]) -> None:
+        """Add documents to an index under its exclusive lock (worker thread)."""
+        with self._lock(index_name).write():
+            if index_name not in self.indices:
+                raise ValueError(f"Index '{index_name}' not found")
+            self.indices[index_name].add_documents(documents)
+            self.indices.record_write(index_name, len(documents))
+        self._schedule_compaction(index_name)
+
+    async def delete_documents(
+        self, index_name: str, document_ids: List[str]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Delete documents from an index.
+
+        Returns:
+            Tuple containing:
+            - Deleted ids
+            - Ids that were not found
+        """
+        if index_name not in self.indices:
+            raise ValueError(f"Index '{index_name}' not found")
+
+        deleted = await self._run(self._delete_documents, index_name, document_ids)
+        deleted_set = set(deleted)
+        return deleted, [doc_id for doc_id in document_ids if doc_id not in deleted_set]
+
+    def _delete_documents(self, index_name: str, document_ids: List[str]) -> List[str]:
+        """Delete documents under the index's exclusive lock (worker thread)."""
+        with self._lock(index_name).write():
+            if index_name not in self.indices:
+                raise ValueError(f"Index '{index_name}' not found")
+            deleted = self.indices[index_name].delete_documents(document_ids)
+            if deleted:
+                self.indices.record_write(index_name, len(deleted))
+        self._schedule_compaction(index_name)
+        return deleted
+
+    def _schedule_compaction(self, index_name: str) -> None:
+        """Queue a compaction once tombstones pass ``COMPACTION_THRESHOLD``."""
+        with self._locks_guard:
+            if index_name in self._compacting or index_name not in self.indices:
+                return
+            if not self.indices[index_name].compaction_due(self.compaction_threshold):
+                return
+            self._compacting.add(index_name)
+        try:
+            self._executor.submit(self._compact, index_name)
+        except RuntimeError:
+            # Shutting down: close() saves the index, compaction runs after restart
+            with self._locks_guard:
+                self._compacting.discard(index_name)
+
+    def _compact(self, index_name: str) -> None:
+        """Compact an index and save it (worker thread)."""
+        try:
+            with self._lock(index_name).write():
+                if index_name not in self.indices:
+                    return
+                self.indices[index_name].compact()
+                self.indices.checkpoint(index_name)
+            logger.info(f"Compacted index '{index_name}'")
+        except Exception as e:
+            logger.error(f"Error compacting index '{index_name}': {e}")
+        finally:
+            with self._locks_guard:
+                self._compacting.discard(index_name)
+
+    async def get_document(self, index_name: str, document_id: str) -> Dict:
         """Get a document from an index."""
         if index_name not in self.indices:
             raise ValueError(f"Index '{index_name}' not found")
 
-        db = self.indices[index_name]
-        return db.get_document(document_id)
+        return await self._run(
+            self._read_index, index_name, lambda db: db.get_document(document_id)
+        )
 
-    def search(
+    async def search(
         self,
         index_name: str,
         query_vector: Optional[List[float]] = None,
         query_text: Optional[str] = None,
         k: int = 5,
         nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[Dict[str, Any]] = None,
         embedder_model: Optional[str] = None,
     ) -> Tuple[List[float], List[Document], float]:
         """Search for similar documents."""
@@ -201,21 +520,26 @@ class VectorDBService:
         if not query_vector and not query_text:
             raise ValueError("Either query_vector or query_text must be provided")
 
-        db = self.indices[index_name]
         start_time = time.time()
 
-        if isinstance(db, BM25Index):
+        if self._is_bm25(index_name):
             if not query_text:
                 raise ValueError("BM25 search requires query_text")
 
-            scores, documents = db.search(query_text, k=k)
+            scores, documents = await self._run(
+                self._read_index,
+                index_name,
+                lambda db: db.search(query_text, k=k, metadata_filter=metadata_filter),
+            )
             query_time = (time.time() - start_time) * 1000
 
             return scores, documents, query_time
         else:
-            if query_text:
-                embedder = self._get_embedder(embedder_model or self.default_embedder)
-                query_vector = embedder.encode([query_text])[0].tolist()
+            if self._is_hybrid(index_name) and not query_text:
+                raise ValueError("Hybrid search requires query_text")
+
+            if query_text and not query_vector:
+                query_vector = (await self._embed([query_text], embedder_model))[0]
 
             # Search
             query_array = np.array(query_vector, dtype=np.float32)
@@ -223,44 +547,208 @@ class VectorDBService:
             search_kwargs = {}
             if nprobe:
                 search_kwargs["nprobe"] = nprobe
+            if ef_search:
+                search_kwargs["ef_search"] = ef_search
+
+            if self._is_hybrid(index_name):
+                all_scores, all_documents = await self._search_hybrid(
+                    index_name,
+                    [query_text],
+                    query_array.reshape(1, -1),
+                    k,
+                    metadata_filter,
+                    search_kwargs,
+                )
+                query_time = (time.time() - start_time) * 1000
 
-            distances, documents = db.search(query_array, k=k, **search_kwargs)
+                return all_scores[0], all_documents[0], query_time
+
+            distances, documents = await self._run(
+                self._read_index,
+                index_name,
+                lambda db: db.search(
+                    query_array, k=k, metadata_filter=metadata_filter, **search_kwargs
+                ),
+            )
 
             query_time = (time.time() - start_time) * 1000
 
             return distances.tolist(), documents, query_time
 
-    def get_embeddings(
+    async def search_batch(
+        self,
+        index_name: str,
+        queries: List[Dict],
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        embedder_model: Optional[str] = None,
+    ) -> List[Tuple[List[float], List[Document], float]]:
+        """
+        Search for many queries at once.
+
+        Query texts are embedded in a single embedder call and all queries
+        go through one index search. Per-query time is the batch time split
+        evenly across the queries.
+        """
+        if index_name not in self.indices:
+            raise ValueError(f"Index '{index_name}' not found")
+
+        if not queries:
+            raise ValueError("At least one query must be provided")
+
+        for query in queries:
+            if not query.get("query_vector") and not query.get("query_text"):
+                raise ValueError(
+                    "Either query_vector or query_text must be provided for each query"
+                )
+
+        start_time = time.time()
+
+        if self._is_bm25(index_name):
+            query_texts = [query.get("query_text") for query in queries]
+            if not all(query_texts):
+                raise ValueError("BM25 search requires query_text")
+
+            all_distances, all_documents = await self._run(
+                self._read_index,
+                index_name,
+                lambda db: db.search_batch(
+                    query_texts, k=k, metadata_filter=metadata_filter
+                ),
+            )
+        else:
+            query_texts = [query.get("query_text") for query in queries]
+            if self._is_hybrid(index_name) and not all(query_texts):
+                raise ValueError("Hybrid search requires query_text")
+
+            query_vectors: List[Optional[List[float]]] = [
+                query.get("query_vector") for query in queries
+            ]
+
+            text_positions = [
+                i
+                for i, query in enumerate(queries)
+                if query.get("query_text") and not query.get("query_vector")
+            ]
+            if text_positions:
+                embeddings = await self._embed(
+                    [queries[i]["query_text"] for i in text_positions], embedder_model
+                )
+                for i, embedding in zip(text_positions, embeddings):
+                    query_vectors[i] = embedding.tolist()
+
+            query_array = np.array(query_vectors, dtype=np.float32)
+
+            search_kwargs = {}
+            if nprobe:
+                search_kwargs["nprobe"] = nprobe
+            if ef_search:
+                search_kwargs["ef_search"] = ef_search
+
+            if self._is_hybrid(index_name):
+                all_distances, all_documents = await self._search_hybrid(
+                    index_name,
+                    query_texts,
+                    query_array,
+                    k,
+                    metadata_filter,
+                    search_kwargs,
+                )
+            else:
+                distances, all_documents = await self._run(
+                    self._read_index,
+                    index_name,
+                    lambda db: db.search_batch(
+                        query_array, k=k, metadata_filter=metadata_filter, **search_kwargs
+                    ),
+                )
+                all_distances = [row.tolist() for row in distances]
+
+        query_time = (time.time() - start_time) * 1000 / len(queries)
+
+        return [
+            (distances, documents, query_time)
+            for distances, documents in zip(all_distances, all_documents)
+        ]
+
+    async def get_embeddings(
         self, texts: List[str], model_name: Optional[str] = None
     ) -> Tuple[List[List[float]], int, str]:
         """Get embeddings for texts."""
         embedder = self._get_embedder(model_name or self.default_embedder)
-        embeddings = embedder.encode(texts)
+        embeddings = await self._embed(texts, model_name)
 
         return embeddings.tolist(), embedder.get_dimension(), embedder.model_name
 
-    def get_index_documents(
-        self, index_name: str, limit: int = 10, offset: int = 0
-    ) -> Tuple[List[Document], int]:
-        """Get documents from an index with pagination."""
+    async def get_index_documents(
+        self,
+        index_name: str,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Document], int, Optional[str]]:
+        """
+        Get a page of documents from an index, in document id order.
+
+        Args:
+            index_name: Index to read
+            limit: Maximum number of documents
+            offset: Documents to skip, used when no cursor is given
+            cursor: Return documents after this id
+
+        Returns:
+            Tuple containing:
+            - Documents of the page
+            - Total number of documents
+            - Cursor for the next page, None on the last page
+        """
         if index_name not in self.indices:
             raise ValueError(f"Index '{index_name}' not found")
 
-        db = self.indices[index_name]
-        all_docs = list(db.documents.values())
-        total_count = len(all_docs)
+        def page(db: Index) -> Tuple[List[Document], int, Optional[str]]:
+            documents, next_cursor = db.documents.page(limit, after=cursor, offset=offset)
+            return documents, len(db.documents), next_cursor
+
+        return await self._run(self._read_index, index_name, page)
 
-        # Apply pagination
-        start_idx = offset
-        end_idx = offset + limit
-        paginated_docs = all_docs[start_idx:end_idx]
+    def export_index_documents(self, index_name: str) -> AsyncIterator[Document]:
+        """
+        Iterate over all documents of an index, in document id order.
 
-        return paginated_docs, total_count
+        Documents are read in pages of ``EXPORT_BATCH_SIZE``, each under
+        the index's shared lock, so an export holds at most one page in
+        memory and does not block writers between pages. Documents written
+        during an export are included if their id sorts after the current
+        page.
+        """
+        if index_name not in self.indices:
+            raise ValueError(f"Index '{index_name}' not found")
+        return self._export(index_name)
+
+    async def _export(self, index_name: str) -> AsyncIterator[Document]:
+        cursor = None
+        while True:
+            documents, _, cursor = await self.get_index_documents(
+                index_name, limit=self.export_batch_size, cursor=cursor
+            )
+            for doc in documents:
+                yield doc
+            if cursor is None:
+                return
 
     def get_health_info(self) -> Dict:
         """Get health information about the service."""
         indices_info = {}
-        for name, db in self.indices.items():
+        for name in self.indices:
+            if not self.indices.is_loaded(name):
+                # Report on-disk indices without opening them
+                entry = self.indices.entry(name)
+                indices_info[name] = {"loaded": False, "kind": entry["kind"]}
+                continue
+
+            db = self.indices[name]
             if isinstance(db, BM25Index):
                 stats = db.get_stats()
                 indices_info[name] = {
@@ -271,14 +759,36 @@ class VectorDBService:
                     "bm25_k1": stats["k1"],
                     "bm25_b": stats["b"],
                     "bm25_epsilon": stats["epsilon"],
+                    "tombstones": db.tombstones,
+                    "loaded": True,
+                    "pending_writes": self.indices.pending_writes(name),
+                }
+            elif isinstance(db, HybridIndex):
+                stats = db.get_stats()
+                indices_info[name] = {
+                    "document_count": stats["num_documents"],
+                    "vector_count": stats["vector_count"],
+                    "staged_vectors": db.vector.staging.ntotal,
+                    "vocabulary_size": stats["vocabulary_size"],
+                    "dimension": db.dimension,
+                    "distance_metric": db.config.distance_metric.value,
+                    "index_type": "Hybrid",
+                    "dense_index_type": db.config.index_type.value,
+                    "fusion": stats["fusion"],
+                    "loaded": True,
+                    "pending_writes": self.indices.pending_writes(name),
                 }
             else:
                 indices_info[name] = {
                     "document_count": len(db.documents),
-                    "vector_count": db.index.ntotal,
+                    "vector_count": db.ntotal,
+                    "staged_vectors": db.staging.ntotal,
+                    "tombstones": db.tombstones + db.dead_positions,
                     "dimension": db.dimension,
                     "distance_metric": db.config.distance_metric.value,
                     "index_type": db.config.index_type.value,
+                    "loaded": True,
+                    "pending_writes": self.indices.pending_writes(name),
                 }
 
         return {
@@ -287,6 +797,19 @@ class VectorDBService:
             "version": "1.0.0",
             "indices": indices_info,
             "loaded_embedders": list(self.embedders.keys()),
+            "embedding_cache": {
+                name: embedder.get_stats()
+                for name, embedder in self.embedders.items()
+                if isinstance(embedder, CachedEmbedder)
+            },
+            "embedder_pools": {
+                name: pool.get_stats()
+                for name, pool in (
+                    (name, getattr(embedder, "embedder", embedder))
+                    for name, embedder in self.embedders.items()
+                )
+                if isinstance(pool, EmbedderPool)
+            },
             "config": {
                 "data_dir": self.data_dir,
                 "default_embedder": self.default_embedder,
@@ -294,29 +817,71 @@ class VectorDBService:
                 "default_index_type": self.default_index_type,
                 "default_nlist": self.default_nlist,
                 "default_nprobe": self.default_nprobe,
+                "train_points_per_centroid": self.train_points_per_centroid,
+                "retrain_growth_factor": self.retrain_growth_factor,
                 "embedder_device": self.embedder_device,
                 "embedder_max_length": self.embedder_max_length,
                 "embedder_pooling": self.embedder_pooling,
                 "embedder_normalize": self.embedder_normalize,
+                "embedder_onnx_quantize": self.embedder_onnx_quantize,
+                "embedder_workers": self.embedder_workers,
+                "embedder_max_batch_size": self.embedder_max_batch_size,
+                "embedder_max_wait_ms": self.embedder_max_wait_ms,
+                "checkpoint_batch_size": self.checkpoint_batch_size,
+                "checkpoint_interval": self.checkpoint_interval,
+                "embedding_cache_size": self.embedding_cache_size,
+                "embedding_cache_path": self.embedding_cache_path,
+                "embedder_api_batch_size": self.embedder_api_batch_size,
+                "embedder_api_concurrency": self.embedder_api_concurrency,
+                "workers": self.workers,
+                "compaction_threshold": self.compaction_threshold,
             },
         }
 
-    def delete_index(self, name: str) -> bool:
+    async def delete_index(self, name: str) -> bool:
         """Delete an index and its associated files."""
         if name not in self.indices:
             raise ValueError(f"Index '{name}' not found")
 
-        db = self.indices[name]
-        del self.indices[name]
+        return await self._run(self._delete_index, name)
+
+    def _delete_index(self, name: str) -> bool:
+        """Drop an index under its exclusive lock (worker thread)."""
+        with self._lock(name).write():
+            if name not in self.indices:
+                raise ValueError(f"Index '{name}' not found")
 
-        index_path: str = os.path.join(self.data_dir, name)
+            kind = self.indices.entry(name)["kind"]
+            self.indices.remove(name)
+            self._remove_files(name, kind)
+
+        with self._locks_guard:
+            self._locks.pop(name, None)
+
+        return True
+
+    def _remove_files(self, name: str, kind: str) -> None:
+        """Remove every file an index may have on disk."""
+
+        index_path: str = self.indices.index_path(name)
         if os.path.exists(index_path):
             if os.path.isdir(index_path):
                 shutil.rmtree(index_path)
             else:
                 os.remove(index_path)
 
-        if isinstance(db, BM25Index):
+        store_dir: str = store_path(index_path)
+        if os.path.isdir(store_dir):
+            shutil.rmtree(store_dir)
+
+        if kind == "hybrid":
+            # Both halves live in one directory
+            hybrid_dir: str = hybrid_path(index_path)
+            if os.path.isdir(hybrid_dir):
+                shutil.rmtree(hybrid_dir)
+            return
+
+        if kind == "bm25":
             # BM25 index file
             bm25_file: str = f"{index_path}.bm25"
             if os.path.exists(bm25_file):
@@ -330,5 +895,3 @@ class VectorDBService:
             data_file: str = f"{index_path}.data"
             if os.path.exists(data_file):
                 os.remove(data_file)
-
-        return True
@@ -0,0 +1,80 @@
+"""
+Migrate indices saved as pickles (``.data`` / ``.bm25``) to the columnar
+memory-mappable store.
+
+    python -m app.migrate --data-dir ./data
+"""
+import os
+import glob
+import pickle
+import argparse
+import logging
+
+from .services.vector_db import VectorDB
+from .services.bm25_index import BM25Index
+from .services.storage import store_exists
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate_vector_index(path: str) -> None:
+    """Rewrite a legacy ``{path}.data`` vector index in the columnar format."""
+    with open(f"{path}.data", "rb") as f:
+        config = pickle.load(f)["config"]
+
+    config.index_path = path
+    VectorDB(config).save(path)
+
+
+def migrate_bm25_index(path: str) -> None:
+    """Rewrite a legacy ``{path}.bm25`` index in the columnar format."""
+    BM25Index(index_path=path).save(path)
+
+
+def migrate(data_dir: str, remove_legacy: bool = False) -> int:
+    """
+    Migrate every legacy index found in a data directory.
+
+    Returns:
+        Number of migrated indices
+    """
+    migrated = 0
+    for suffix, migrate_index in ((".data", migrate_vector_index), (".bm25", migrate_bm25_index)):
+        for legacy_file in sorted(glob.glob(os.path.join(data_dir, f"*{suffix}"))):
+            path = legacy_file[: -len(suffix)]
+            if store_exists(path):
+                logger.info(f"Skipping {path}: already migrated")
+                continue
+
+            migrate_index(path)
+            migrated += 1
+            logger.info(f"Migrated {legacy_file}")
+
+            if remove_legacy:
+                os.remove(legacy_file)
+
+    return migrated
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Migrate pickled indices")
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=os.getenv("VECTOR_DB_DATA_DIR", "./data"),
+        help="Directory with saved indices (default: $VECTOR_DB_DATA_DIR or ./data)",
+    )
+    parser.add_argument(
+        "--remove-legacy",
+        action="store_true",
+        help="Delete pickle files after a successful migration",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    count = migrate(args.data_dir, remove_legacy=args.remove_legacy)
+    logger.info(f"Migrated {count} indices")
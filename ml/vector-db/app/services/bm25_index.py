@@ -1,13 +1,34 @@
 import os
 import pickle
-from typing import List, Tuple, Optional, Dict
+from typing import Any, Iterable, List, Tuple, Optional, Dict
+
+import numpy as np
 
 from .document import Document
 from .embedder.bm25 import BM25Embedder
+from .embedder.inverted_index import InvertedIndex
+from .metadata_index import MetadataIndex
+from .metrics import stage
+from .storage import (
+    DocumentStore,
+    MappedDocumentStore,
+    build_metadata_index,
+    legacy_document_store,
+    load_metadata_index,
+    store_exists,
+    write_store,
+)
 
 
 class BM25Index:
-    """BM25-based document index for text retrieval."""
+    """
+    BM25-based document index for text retrieval.
+
+    Deleted and replaced documents leave tombstones: their postings stay
+    in place but their positions are excluded from every search until
+    ``compact`` drops them. Corpus statistics (IDF, average length) still
+    count tombstoned documents until then.
+    """
 
     def __init__(
         self,
@@ -33,62 +54,103 @@ class BM25Index:
         # Initialize BM25 embedder
         self.bm25 = BM25Embedder(k1=k1, b=b, epsilon=epsilon)
 
-        # Document storage
-        self.documents: Dict[str, Document] = {}
-        self.id_to_index: Dict[str, int] = {}
-        self.index_to_id: Dict[int, str] = {}
-        self._next_index: int = 0
+        # Document storage; deleted positions stay as tombstones
+        self.documents = DocumentStore()
+        self.metadata_index = MetadataIndex()
 
         # Load existing index if path exists
-        if self.index_path and os.path.exists(f"{self.index_path}.bm25"):
+        if self.index_path and (
+            store_exists(self.index_path) or os.path.exists(f"{self.index_path}.bm25")
+        ):
             self.load(self.index_path)
 
     def add_documents(self, documents: List[Document]) -> None:
         """
         Add documents to the BM25 index.
 
+        New documents are appended incrementally. Re-added document ids
+        replace the old version, which is tombstoned.
+
         Args:
             documents: List of documents to add
         """
-        # Store documents first
         for doc in documents:
             if not doc.content:
                 raise ValueError(f"Document {doc.id} doesn't have content")
-            
-            # Store document
-            self.documents[str(doc.id)] = doc
-            self.id_to_index[doc.id] = self._next_index
-            self.index_to_id[self._next_index] = doc.id
-            self._next_index += 1
-
-        # Rebuild corpus and mappings to ensure consistency
-        self._rebuild_corpus()
-
-    def _rebuild_corpus(self) -> None:
-        """Rebuild the BM25 corpus and maintain consistent document mappings."""
-        # Reset mappings
-        self.id_to_index = {}
-        self.index_to_id = {}
-        
-        # Rebuild in consistent order (sorted by document ID for reproducibility)
-        sorted_docs = sorted(self.documents.items())
-        all_contents = []
-        
-        for idx, (doc_id, doc) in enumerate(sorted_docs):
-            all_contents.append(doc.content)
-            self.id_to_index[doc_id] = idx
-            self.index_to_id[idx] = doc_id
-        
-        # Update next index
-        self._next_index = len(self.documents)
-        
-        # Fit BM25 model with ordered contents
-        self.bm25.fit(all_contents)
+
+        # The last version of an id within the batch wins
+        latest: Dict[str, Document] = {}
+        for doc in documents:
+            latest.pop(str(doc.id), None)
+            latest[str(doc.id)] = doc
+
+        self.delete_documents([doc_id for doc_id in latest if doc_id in self.documents])
+
+        positions = self.documents.extend(latest.values())
+        for position, doc in zip(positions, latest.values()):
+            self.metadata_index.add(position, doc.metadata)
+
+        if latest:
+            self.bm25.partial_fit([doc.content for doc in latest.values()])
+
+    def delete_documents(self, doc_ids: Iterable[str]) -> List[str]:
+        """
+        Delete documents, leaving tombstones at their positions.
+
+        Args:
+            doc_ids: Ids of the documents to delete
+
+        Returns:
+            Ids that were found and deleted
+        """
+        return [
+            doc_id
+            for doc_id in dict.fromkeys(str(doc_id) for doc_id in doc_ids)
+            if self.documents.delete(doc_id) is not None
+        ]
+
+    @property
+    def tombstones(self) -> int:
+        """Number of deleted or replaced documents not yet compacted."""
+        return self.documents.dead
+
+    def compaction_due(self, threshold: float) -> bool:
+        """
+        Whether tombstones exceed a share of the documents.
+
+        Args:
+            threshold: Maximum share of tombstones, relative to live documents
+        """
+        return bool(self.tombstones) and self.tombstones > threshold * max(
+            len(self.documents), 1
+        )
+
+    def compact(self) -> None:
+        """Drop tombstoned documents from the postings and renumber positions."""
+        if not self.tombstones:
+            return
+
+        keep = self.documents.compact()
+        self.bm25.load_index(self.bm25.inverted_index.compact(keep))
+        self.metadata_index = self.metadata_index.compact(keep)
+
+    def _candidates(
+        self, metadata_filter: Optional[Dict[str, Any]]
+    ) -> Optional[np.ndarray]:
+        """Mask of live positions matching a metadata filter, None if unrestricted."""
+        if not metadata_filter:
+            return self.documents.live.copy() if self.tombstones else None
+
+        mask = self.metadata_index.mask(metadata_filter)
+        if self.tombstones:
+            mask &= self.documents.live[: len(mask)]
+        return mask
 
     def search(
         self, 
         query_text: str, 
         k: int = 5, 
+        metadata_filter: Optional[Dict[str, Any]] = None,
         **kwargs
     ) -> Tuple[List[float], List[Document]]:
         """
@@ -97,6 +159,7 @@ class BM25Index:
         Args:
             query_text: Query text to search for
             k: Number of results to return
+            metadata_filter: Only score documents matching this filter
             **kwargs: Additional parameters (unused for BM25)
 
         Returns:
@@ -108,25 +171,72 @@ class BM25Index:
             return [], []
 
         # Get BM25 scores for query
-        results = self.bm25.search(query_text, k=min(k, len(self.documents)))
+        with stage("index_search", "BM25"):
+            results = self.bm25.search(
+                query_text,
+                k=min(k, len(self.documents)),
+                candidates=self._candidates(metadata_filter),
+            )
         
         scores = []
         documents = []
         
-        for doc_idx, score in results:
-            if doc_idx < len(self.bm25.corpus):
-                # Find document by corpus position
-                doc_id = self.index_to_id.get(doc_idx)
-                if doc_id and doc_id in self.documents:
-                    scores.append(score)
-                    documents.append(self.documents[doc_id])
-                else:
-                    # Fallback: create empty document
+        with stage("materialize", "BM25"):
+            for doc_idx, score in results:
+                # Find document by corpus position; tombstones are skipped
+                if doc_idx < self.documents.size and self.documents.live[doc_idx]:
                     scores.append(score)
-                    documents.append(Document(id=None, content="", metadata={}))
+                    documents.append(self.documents.document(doc_idx))
 
         return scores, documents
 
+    def search_batch(
+        self,
+        query_texts: List[str],
+        k: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Tuple[List[List[float]], List[List[Document]]]:
+        """
+        Search for many queries with one vectorized BM25 scoring pass.
+
+        Args:
+            query_texts: Query texts to search for
+            k: Number of results to return per query
+            metadata_filter: Only rank documents matching this filter
+            **kwargs: Additional parameters (unused for BM25)
+
+        Returns:
+            Tuple containing:
+            - Per-query lists of BM25 scores
+            - Per-query lists of matching documents
+        """
+        if not self.documents:
+            return [[] for _ in query_texts], [[] for _ in query_texts]
+
+        with stage("index_search", "BM25"):
+            batch_results = self.bm25.search_batch(
+                query_texts,
+                k=min(k, len(self.documents)),
+                candidates=self._candidates(metadata_filter),
+            )
+
+        all_scores = []
+        all_documents = []
+
+        with stage("materialize", "BM25"):
+            for results in batch_results:
+                scores = []
+                documents = []
+                for doc_idx, score in results:
+                    if doc_idx < self.documents.size and self.documents.live[doc_idx]:
+                        scores.append(score)
+                        documents.append(self.documents.document(doc_idx))
+                all_scores.append(scores)
+                all_documents.append(documents)
+
+        return all_scores, all_documents
+
     def get_document(self, doc_id: str) -> Optional[Document]:
         """Get document by ID."""
         return self.documents.get(doc_id)
@@ -135,38 +245,80 @@ class BM25Index:
         """
         Save the BM25 index to disk.
 
+        Documents and flattened postings are written in columnar form to
+        ``{path}.store``, so loading does not re-tokenize the corpus.
+        Tombstoned documents are left out of the saved copy.
+
         Args:
             path: Path to save the index
         """
-        data = {
-            "bm25_state": {
+        live = self.documents.live
+        inverted_index = self.bm25.inverted_index
+        metadata_index = self.metadata_index
+        if self.tombstones:
+            inverted_index = inverted_index.compact(live)
+            metadata_index = metadata_index.compact(live)
+
+        positions = np.flatnonzero(live).tolist()
+        terms, arrays = inverted_index.to_arrays()
+        metadata_keys, metadata_bitmaps = metadata_index.to_arrays()
+
+        write_store(
+            path,
+            [self.documents.ids[p] for p in positions],
+            [self.documents.document(p) for p in positions],
+            manifest={
+                "kind": "bm25",
                 "k1": self.bm25.k1,
                 "b": self.bm25.b,
                 "epsilon": self.bm25.epsilon,
-                "corpus": self.bm25.corpus,
-                "doc_tokens": self.bm25.doc_tokens,
-                "doc_lengths": self.bm25.doc_lengths,
-                "avg_doc_length": self.bm25.avg_doc_length,
-                "doc_freqs": dict(self.bm25.doc_freqs),
-                "idf_scores": self.bm25.idf_scores,
-                "num_docs": self.bm25.num_docs,
+                "metadata_size": metadata_index.size,
             },
-            "documents": self.documents,
-            "id_to_index": self.id_to_index,
-            "index_to_id": self.index_to_id,
-            "next_index": self._next_index,
-        }
-
-        with open(f"{path}.bm25", "wb") as f:
-            pickle.dump(data, f)
+            arrays={
+                **{f"postings_{name}": values for name, values in arrays.items()},
+                "metadata_bitmaps": metadata_bitmaps,
+            },
+            blobs={
+                "terms": [term.encode("utf-8") for term in terms],
+                "metadata_keys": metadata_keys,
+            },
+        )
 
     def load(self, path: str) -> None:
         """
         Load the BM25 index from disk.
 
+        Falls back to the legacy ``{path}.bm25`` pickle when no columnar
+        store exists; the next ``save`` migrates it.
+
         Args:
             path: Path to load the index from
         """
+        if not store_exists(path):
+            self._load_legacy(path)
+            return
+
+        store = MappedDocumentStore(path)
+        manifest = store.manifest
+
+        self.k1, self.b, self.epsilon = manifest["k1"], manifest["b"], manifest["epsilon"]
+        self.bm25 = BM25Embedder(k1=self.k1, b=self.b, epsilon=self.epsilon)
+
+        arrays = {
+            name: store.array(f"postings_{name}")
+            for name in ("offsets", "docs", "tfs", "doc_lengths")
+        }
+        self.bm25.load_index(
+            InvertedIndex.from_arrays(
+                store.blobs("terms").decode_all(), arrays, k1=self.k1, b=self.b
+            )
+        )
+
+        self.documents = DocumentStore(store)
+        self.metadata_index = load_metadata_index(store)
+
+    def _load_legacy(self, path: str) -> None:
+        """Load the index from the legacy pickle format."""
         with open(f"{path}.bm25", "rb") as f:
             data = pickle.load(f)
 
@@ -175,19 +327,15 @@ class BM25Index:
         self.bm25.k1 = bm25_state["k1"]
         self.bm25.b = bm25_state["b"]
         self.bm25.epsilon = bm25_state["epsilon"]
-        self.bm25.corpus = bm25_state["corpus"]
-        self.bm25.doc_tokens = bm25_state["doc_tokens"]
-        self.bm25.doc_lengths = bm25_state["doc_lengths"]
-        self.bm25.avg_doc_length = bm25_state["avg_doc_length"]
-        self.bm25.doc_freqs = bm25_state["doc_freqs"]
-        self.bm25.idf_scores = bm25_state["idf_scores"]
-        self.bm25.num_docs = bm25_state["num_docs"]
+
+        # Postings are not persisted, rebuild them from the stored tokens
+        self.bm25.build_index(bm25_state["doc_tokens"])
 
         # Restore document storage
-        self.documents = data["documents"]
-        self.id_to_index = data["id_to_index"]
-        self.index_to_id = data["index_to_id"]
-        self._next_index = data["next_index"]
+        self.documents = legacy_document_store(
+            data["documents"], data["index_to_id"], data["next_index"]
+        )
+        self.metadata_index = build_metadata_index(self.documents)
 
     def get_stats(self) -> Dict:
         """Get index statistics."""
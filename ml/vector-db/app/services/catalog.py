@@ -0,0 +1,302 @@
+import os
+import glob
+import json
+import time
+import pickle
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Union
+
+from .config import VectorDBConfig
+from .vector_db import VectorDB
+from .bm25_index import BM25Index
+from .hybrid_index import HYBRID_SUFFIX, HybridIndex, hybrid_exists
+from .storage import STORE_SUFFIX, MappedDocumentStore, store_exists
+
+logger = logging.getLogger(__name__)
+
+Index = Union[VectorDB, BM25Index, HybridIndex]
+
+CATALOG_FILE = "catalog.json"
+
+
+class IndexCatalog(Mapping):
+    """
+    Durable registry of the indices saved under a data directory.
+
+    Index configs are persisted in ``catalog.json``. Indices found on disk
+    are opened lazily on first access, and writes are checkpointed to disk
+    once enough documents are pending or enough time has passed; writes
+    followed by a quiet period are saved by ``flush_due``.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        checkpoint_batch_size: int = 100,
+        checkpoint_interval: float = 30.0,
+    ):
+        """
+        Initialize catalog.
+
+        Args:
+            data_dir: Directory holding index files and the catalog
+            checkpoint_batch_size: Save an index once this many documents
+                were written since the last save (<= 0 disables)
+            checkpoint_interval: Save an index once this many seconds
+                passed since the last save or since its oldest unsaved
+                write (<= 0 disables)
+        """
+        self.data_dir = data_dir
+        self.checkpoint_batch_size = checkpoint_batch_size
+        self.checkpoint_interval = checkpoint_interval
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded: Dict[str, Index] = {}
+        self._pending: Dict[str, int] = {}
+        self._last_checkpoint: Dict[str, float] = {}
+        # Time of the oldest write not saved yet, per index
+        self._dirty_since: Dict[str, float] = {}
+        # Guards catalog state; requests run on worker threads
+        self._lock = threading.RLock()
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._read_catalog()
+        self._discover()
+
+    def _catalog_path(self) -> str:
+        return os.path.join(self.data_dir, CATALOG_FILE)
+
+    def index_path(self, name: str) -> str:
+        """Base path of an index's files."""
+        return os.path.join(self.data_dir, name)
+
+    def _read_catalog(self) -> None:
+        if os.path.exists(self._catalog_path()):
+            with open(self._catalog_path()) as f:
+                self._entries = json.load(f)
+
+    def _write_catalog(self) -> None:
+        tmp_path = f"{self._catalog_path()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self._catalog_path())
+
+    def _discover(self) -> None:
+        """Register indices saved on disk that are missing from the catalog."""
+        discovered = False
+
+        for store_dir in glob.glob(os.path.join(self.data_dir, f"*{STORE_SUFFIX}")):
+            name = os.path.basename(store_dir)[: -len(STORE_SUFFIX)]
+            if name in self._entries or not store_exists(self.index_path(name)):
+                continue
+            manifest = MappedDocumentStore(self.index_path(name)).manifest
+            if manifest["kind"] == "bm25":
+                config = {k: manifest[k] for k in ("k1", "b", "epsilon")}
+            else:
+                config = manifest["config"]
+            self._entries[name] = {"kind": manifest["kind"], "config": config}
+            discovered = True
+
+        for hybrid_dir in glob.glob(os.path.join(self.data_dir, f"*{HYBRID_SUFFIX}")):
+            name = os.path.basename(hybrid_dir)[: -len(HYBRID_SUFFIX)]
+            if name in self._entries or not hybrid_exists(self.index_path(name)):
+                continue
+            with open(os.path.join(hybrid_dir, "manifest.json")) as f:
+                manifest = json.load(f)
+            self._entries[name] = {"kind": "hybrid", "config": manifest["config"]}
+            discovered = True
+
+        # Pickles from before the columnar store; configs are read on open
+        for suffix, kind in ((".data", "vector"), (".bm25", "bm25")):
+            for legacy_file in glob.glob(os.path.join(self.data_dir, f"*{suffix}")):
+                name = os.path.basename(legacy_file)[: -len(suffix)]
+                if name not in self._entries:
+                    self._entries[name] = {"kind": kind, "config": None}
+                    discovered = True
+
+        if discovered:
+            logger.info(f"Discovered indices on disk: {sorted(self._entries)}")
+            self._write_catalog()
+
+    def _open(self, name: str) -> Index:
+        entry = self._entries[name]
+        path = self.index_path(name)
+        config = entry["config"]
+
+        if entry["kind"] == "bm25":
+            config = config or {}
+            index = BM25Index(
+                k1=config.get("k1", 1.2),
+                b=config.get("b", 0.75),
+                epsilon=config.get("epsilon", 0.25),
+                index_path=path,
+            )
+        elif entry["kind"] == "hybrid":
+            hybrid_config = VectorDBConfig.from_dict(config)
+            hybrid_config.index_path = path
+            index = HybridIndex(hybrid_config)
+        else:
+            if config is None:
+                with open(f"{path}.data", "rb") as f:
+                    vector_config = pickle.load(f)["config"]
+                entry["config"] = vector_config.to_dict()
+                self._write_catalog()
+            else:
+                vector_config = VectorDBConfig.from_dict(config)
+            vector_config.index_path = path
+            index = VectorDB(vector_config)
+
+        logger.info(f"Opened index '{name}'")
+        return index
+
+    def __getitem__(self, name: str) -> Index:
+        with self._lock:
+            if name not in self._entries:
+                raise KeyError(name)
+            if name not in self._loaded:
+                self._loaded[name] = self._open(name)
+                self._last_checkpoint[name] = time.monotonic()
+            return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether an index was already opened."""
+        return name in self._loaded
+
+    def entry(self, name: str) -> Dict[str, Any]:
+        """Persisted catalog entry (kind and config) of an index."""
+        return self._entries[name]
+
+    def create(self, name: str, kind: str, config: Dict[str, Any]) -> Index:
+        """
+        Register and open a new index.
+
+        Args:
+            name: Index name
+            kind: ``"vector"``, ``"bm25"`` or ``"hybrid"``
+            config: ``VectorDBConfig.to_dict()`` for vector and hybrid
+                indices, or
+                ``k1``/``b``/``epsilon`` for BM25
+
+        Returns:
+            The opened index
+        """
+        with self._lock:
+            if name in self._entries:
+                raise ValueError(f"Index '{name}' already exists")
+
+            self._entries[name] = {"kind": kind, "config": config}
+            self._write_catalog()
+            return self[name]
+
+    def remove(self, name: str) -> None:
+        """Drop an index from the catalog without touching its files."""
+        with self._lock:
+            del self._entries[name]
+            self._loaded.pop(name, None)
+            self._pending.pop(name, None)
+            self._last_checkpoint.pop(name, None)
+            self._dirty_since.pop(name, None)
+            self._write_catalog()
+
+    def record_write(self, name: str, count: int) -> bool:
+        """
+        Account for documents written to an index and checkpoint if due.
+
+        Returns:
+            Whether the index was saved
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._pending[name] = self._pending.get(name, 0) + count
+            self._dirty_since.setdefault(name, now)
+
+            due_by_size = (
+                self.checkpoint_batch_size > 0
+                and self._pending[name] >= self.checkpoint_batch_size
+            )
+            due_by_time = (
+                self.checkpoint_interval > 0
+                and now - self._last_checkpoint.setdefault(name, now)
+                >= self.checkpoint_interval
+            )
+
+        if due_by_size or due_by_time:
+            self.checkpoint(name)
+            return True
+        return False
+
+    def pending_writes(self, name: str) -> int:
+        """Documents written to an index since its last checkpoint."""
+        return self._pending.get(name, 0)
+
+    def checkpoint(self, name: str) -> None:
+        """Save a loaded index to disk."""
+        index = self._loaded.get(name)
+        if index is None:
+            return
+
+        index.save(self.index_path(name))
+        with self._lock:
+            self._pending[name] = 0
+            self._last_checkpoint[name] = time.monotonic()
+            self._dirty_since.pop(name, None)
+        logger.info(f"Checkpointed index '{name}'")
+
+    def flush(
+        self,
+        lock: Optional[Callable[[str], ContextManager]] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Checkpoint every index with pending writes.
+
+        Args:
+            lock: Returns the context manager that excludes writers of an
+                index; each index is saved while holding it.
+            names: Only consider these indices (default: all loaded)
+        """
+        for name in list(self._loaded if names is None else names):
+            if not self._pending.get(name):
+                continue
+            if lock is None:
+                self.checkpoint(name)
+                continue
+            with lock(name):
+                if self._pending.get(name):
+                    self.checkpoint(name)
+
+    def flush_due(self, lock: Optional[Callable[[str], ContextManager]] = None) -> List[str]:
+        """
+        Checkpoint indices whose oldest unsaved write is older than
+        ``checkpoint_interval``.
+
+        ``record_write`` only checks the interval when the next write
+        arrives; this saves the last writes before a quiet period.
+
+        Args:
+            lock: As for ``flush``
+
+        Returns:
+            Names of the indices that were due
+        """
+        if self.checkpoint_interval <= 0:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                name
+                for name, since in self._dirty_since.items()
+                if now - since >= self.checkpoint_interval
+            ]
+        self.flush(lock, names=due)
+        return due
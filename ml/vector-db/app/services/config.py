@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any
 from enum import Enum
 
 
@@ -16,7 +16,29 @@ class IndexType(Enum):
 
     FLAT = "Flat"
     IVF_FLAT = "IVFFlat"
+    IVF_PQ = "IVFPQ"
+    HNSW = "HNSW"
+    SQ8 = "SQ8"
+    SQ_FP16 = "SQfp16"
     BM25 = "BM25"
+    HYBRID = "Hybrid"
+
+    @classmethod
+    def parse(cls, value: str) -> "IndexType":
+        """Look up an index type by value (``IVFFlat``) or name (``IVF_FLAT``)."""
+        try:
+            return cls(value)
+        except ValueError:
+            if value in cls.__members__:
+                return cls[value]
+            raise
+
+
+class FusionMethod(Enum):
+    """How hybrid indices combine BM25 and dense rankings."""
+
+    RRF = "rrf"
+    WEIGHTED = "weighted"
 
 
 @dataclass
@@ -31,9 +53,49 @@ class VectorDBConfig:
     nlist: int = 100
     nprobe: int = 10
 
+    # Trainable indices stage vectors in a flat index until there are
+    # train_points_per_centroid * nlist of them, and retrain whenever the
+    # corpus grows by retrain_growth_factor (<= 1 disables retraining)
+    train_points_per_centroid: int = 39
+    retrain_growth_factor: float = 2.0
+
+    # PQ params (pq_m = 0 picks one sub-quantizer per 8 dimensions)
+    pq_m: int = 0
+    pq_nbits: int = 8
+
+    # HNSW params
+    hnsw_m: int = 32
+    ef_construction: int = 40
+    ef_search: int = 64
+
     # BM25 params
     bm25_k1: float = 1.2
     bm25_b: float = 0.75
     bm25_epsilon: float = 0.25
 
+    # Hybrid params: RRF constant, or the dense share of min-max normalized
+    # scores, and how many candidates each retriever returns per result
+    fusion: FusionMethod = FusionMethod.RRF
+    rrf_k: int = 60
+    dense_weight: float = 0.5
+    fusion_candidates: int = 3
+
     index_path: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize config to a JSON-compatible dict."""
+        data = asdict(self)
+        data["distance_metric"] = self.distance_metric.value
+        data["index_type"] = self.index_type.value
+        data["fusion"] = self.fusion.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VectorDBConfig":
+        """Restore config serialized with ``to_dict``."""
+        data = dict(data)
+        data["distance_metric"] = DistanceMetric(data["distance_metric"])
+        data["index_type"] = IndexType(data["index_type"])
+        if "fusion" in data:
+            data["fusion"] = FusionMethod(data["fusion"])
+        return cls(**data)
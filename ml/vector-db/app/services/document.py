@@ -4,9 +4,14 @@ import uuid
 import numpy as np
 
 
-@dataclass
+@dataclass(slots=True)
 class Document:
-    """Document representation with metadata."""
+    """
+    Document representation with metadata.
+
+    ``vector`` carries the embedding into an index; stored documents are
+    returned without it, since vectors are only kept by the FAISS index.
+    """
 
     id: str
     content: str
@@ -16,3 +21,10 @@ class Document:
     def __post_init__(self) -> None:
         if self.id is None:
             self.id = str(uuid.uuid4())
+
+    def __setstate__(self, state: Any) -> None:
+        # Legacy pickles hold the __dict__ of the former non-slots class
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
@@ -1,8 +1,13 @@
 import time
+import asyncio
 import logging
 import requests
-from typing import List, Union, Optional, Dict
+from typing import List, Union, Optional, Dict, Any
 from abc import abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import httpx
+from requests.adapters import HTTPAdapter
 
 import numpy as np
 
@@ -12,6 +17,12 @@ from .base import BaseEmbedder
 logger = logging.getLogger(__name__)
 
 
+# Transient failures worth retrying; other 4xx responses are final
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+KLUSTER_AI_URL = "https://api.kluster.ai/v1/embeddings"
+
+
 class APIEmbedder(BaseEmbedder):
     """API-based embedder that calls external embedding services."""
 
@@ -25,6 +36,8 @@ class APIEmbedder(BaseEmbedder):
         retry_delay: float = 1.0,
         timeout: float = 30.0,
         headers: Optional[Dict[str, str]] = None,
+        max_batch_size: int = 32,
+        max_concurrency: int = 4,
     ):
         """
         Initialize API embedder.
@@ -34,10 +47,12 @@ class APIEmbedder(BaseEmbedder):
             api_key: API key for authentication
             model_name: Model name to use for embeddings (if required by API)
             dimension: Embedding dimension
-            max_retries: Maximum number of retry attempts
-            retry_delay: Delay between retries in seconds
+            max_retries: Maximum number of retry attempts per batch
+            retry_delay: Base delay between retries in seconds
             timeout: Request timeout in seconds
             headers: Additional headers to send with requests
+            max_batch_size: Maximum number of texts per API request
+            max_concurrency: Maximum number of requests in flight
         """
         self.api_url = api_url
         self.api_key = api_key
@@ -46,49 +61,253 @@ class APIEmbedder(BaseEmbedder):
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
 
         self.headers = headers or {}
         if api_key:
             self.headers["Authorization"] = f"Bearer {api_key}"
         self.headers.setdefault("Content-Type", "application/json")
 
+        # Keep-alive connections reused across requests and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.headers)
+
+        # Shared by all encode calls, so it bounds in-flight requests globally
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="api-embedder"
+        )
+
+        # Async client and its concurrency limit, bound to one event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def encode(
-        self, texts: Union[str, List[str]], batch_size: int = 1, **kwargs
+        self, texts: Union[str, List[str]], batch_size: Optional[int] = None, **kwargs
     ) -> np.ndarray:
         """
         Encode texts into embeddings using API calls.
 
+        Texts are split into batches of up to ``batch_size`` that are sent
+        concurrently, at most ``max_concurrency`` at a time.
+
+        Args:
+            texts: Text or list of texts to encode
+            batch_size: Number of texts to send in each API request
+                (defaults to ``max_batch_size``)
+            **kwargs: Additional arguments passed to the API
+
+        Returns:
+            numpy array of embeddings
+        """
+        batches = self._batches(texts, batch_size)
+
+        if len(batches) <= 1:
+            results = [self._call_batch(batch, **kwargs) for batch in batches]
+        else:
+            futures = [
+                self._executor.submit(self._call_batch, batch, **kwargs)
+                for batch in batches
+            ]
+            try:
+                results = [future.result() for future in futures]
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return self._concat(results)
+
+    async def aencode(
+        self,
+        texts: Union[str, List[str]],
+        executor: Optional[Executor] = None,
+        batch_size: Optional[int] = None,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode texts on the event loop with non-blocking HTTP requests.
+
+        Batches are sent concurrently through a shared ``httpx.AsyncClient``,
+        at most ``max_concurrency`` at a time across all callers.
+
         Args:
             texts: Text or list of texts to encode
+            executor: Unused, requests do not block the event loop
             batch_size: Number of texts to send in each API request
+                (defaults to ``max_batch_size``)
             **kwargs: Additional arguments passed to the API
 
         Returns:
             numpy array of embeddings
         """
+        batches = self._batches(texts, batch_size)
+        results = await asyncio.gather(
+            *(self._acall_batch(batch, **kwargs) for batch in batches)
+        )
+        return self._concat(results)
+
+    def _batches(
+        self, texts: Union[str, List[str]], batch_size: Optional[int]
+    ) -> List[List[str]]:
         if isinstance(texts, str):
             texts = [texts]
+        batch_size = min(batch_size or self.max_batch_size, self.max_batch_size)
+        return [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
 
+    @staticmethod
+    def _concat(results: List[List[List[float]]]) -> np.ndarray:
         all_embeddings = []
-
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i : i + batch_size]
-            embeddings = self._call_api(batch_texts, **kwargs)
+        for embeddings in results:
             all_embeddings.extend(embeddings)
-
         return np.array(all_embeddings)
 
-    @abstractmethod
+    @staticmethod
+    def _check_count(texts: List[str], embeddings: List[List[float]]) -> None:
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"API returned {len(embeddings)} embeddings for {len(texts)} texts"
+            )
+
+    def _call_batch(self, texts: List[str], **kwargs) -> List[List[float]]:
+        """Call the API for one batch and check the number of embeddings."""
+        embeddings = self._call_api(texts, **kwargs)
+        self._check_count(texts, embeddings)
+        return embeddings
+
+    async def _acall_batch(self, texts: List[str], **kwargs) -> List[List[float]]:
+        """Async ``_call_batch``."""
+        result = await self._apost(self._build_payload(texts, **kwargs))
+        embeddings = self._parse_response(result)
+        self._check_count(texts, embeddings)
+        return embeddings
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Exponential backoff, raised to the server's ``Retry-After``."""
+        delay = self.retry_delay * (2**attempt)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def _post(self, payload: Dict[str, Any]) -> Any:
+        """
+        POST a payload through the pooled session with retry and backoff.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried with
+        exponential backoff (honouring ``Retry-After``); other HTTP errors
+        are raised immediately.
+
+        Returns:
+            Decoded JSON response
+        """
+        name = self.__class__.__name__
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    self.api_url, json=payload, timeout=self.timeout
+                )
+                response.raise_for_status()
+                return response.json()
+
+            except requests.exceptions.RequestException as e:
+                status_code = getattr(e.response, "status_code", None)
+                if status_code is not None and status_code not in RETRYABLE_STATUS_CODES:
+                    raise
+
+                logger.warning(f"{name} API request failed (attempt {attempt + 1}): {e}")
+                if attempt >= self.max_retries:
+                    raise Exception(
+                        f"{name} API request failed after {self.max_retries + 1} attempts: {e}"
+                    )
+
+                retry_after = (
+                    e.response.headers.get("Retry-After")
+                    if e.response is not None
+                    else None
+                )
+                time.sleep(self._retry_delay(attempt, retry_after))
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Async client for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._async_loop = loop
+        return self._async_client
+
+    async def _apost(self, payload: Dict[str, Any]) -> Any:
+        """Async ``_post`` with the same retry policy."""
+        name = self.__class__.__name__
+        client = self._get_async_client()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._async_semaphore:
+                    response = await client.post(self.api_url, json=payload)
+                response.raise_for_status()
+                return response.json()
+
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                response = getattr(e, "response", None)
+                if (
+                    response is not None
+                    and response.status_code not in RETRYABLE_STATUS_CODES
+                ):
+                    raise
+
+                logger.warning(f"{name} API request failed (attempt {attempt + 1}): {e}")
+                if attempt >= self.max_retries:
+                    raise Exception(
+                        f"{name} API request failed after {self.max_retries + 1} attempts: {e}"
+                    )
+
+                retry_after = (
+                    response.headers.get("Retry-After") if response is not None else None
+                )
+                await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
     def _call_api(self, texts: List[str], **kwargs) -> List[List[float]]:
         """
         Make API call to get embeddings for the given texts.
         """
+        return self._parse_response(self._post(self._build_payload(texts, **kwargs)))
+
+    @abstractmethod
+    def _build_payload(self, texts: List[str], **kwargs) -> Dict[str, Any]:
+        """Build the request body for a batch of texts."""
+        pass
+
+    @abstractmethod
+    def _parse_response(self, result: Any) -> List[List[float]]:
+        """Extract embeddings, in input order, from a decoded response."""
         pass
 
     def get_dimension(self) -> int:
         """Get embedding dimension."""
         return self._dimension
 
+    def close(self) -> None:
+        """Release pooled connections and worker threads."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    async def aclose(self) -> None:
+        """Release pooled connections, including the async client."""
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
 
 class KlusterAIEmbedder(APIEmbedder):
     """KlusterAI API embedder with predefined settings."""
@@ -98,6 +317,7 @@ class KlusterAIEmbedder(APIEmbedder):
         api_key: str,
         model_name: str = "BAAI/bge-m3",
         dimension: int = 1024,
+        api_url: str = KLUSTER_AI_URL,
         **kwargs,
     ):
         """
@@ -107,66 +327,54 @@ class KlusterAIEmbedder(APIEmbedder):
             api_key: API key
             model_name: model name
             dimension: Embedding dimension
+            api_url: Embeddings endpoint URL
             **kwargs: Additional arguments passed to APIEmbedder
         """
         super().__init__(
-            api_url="https://api.kluster.ai/v1/embeddings",
+            api_url=api_url,
             api_key=api_key,
             model_name=model_name,
             dimension=dimension,
             **kwargs,
         )
 
-    def _call_api(self, texts: List[str], **kwargs) -> List[List[float]]:
+    def _build_payload(self, texts: List[str], **kwargs) -> Dict[str, Any]:
         """
-        Make API call to KlusterAI embeddings endpoint.
+        Build a request for the KlusterAI embeddings endpoint.
 
         Args:
             texts: List of texts to embed
             **kwargs: Additional arguments for the API
 
         Returns:
-            List of embedding vectors
+            Request payload
         """
         payload = {"input": texts, "model": self.model_name}
 
         payload.update(kwargs)
 
-        for attempt in range(self.max_retries + 1):
-            try:
-                response = requests.post(
-                    self.api_url,
-                    json=payload,
-                    headers=self.headers,
-                    timeout=self.timeout,
-                )
-                response.raise_for_status()
+        return payload
 
-                result = response.json()
+    def _parse_response(self, result: Any) -> List[List[float]]:
+        """
+        Extract embeddings from a KlusterAI response.
 
-                # Handle OpenAI-style response format
-                if "data" in result:
-                    return [item["embedding"] for item in result["data"]]
-                elif "embeddings" in result:
-                    return result["embeddings"]
-                elif isinstance(result, list):
-                    return result
-                else:
-                    raise ValueError(f"Unexpected API response format: {result}")
+        Args:
+            result: Decoded JSON response
 
-            except requests.exceptions.RequestException as e:
-                logger.warning(
-                    f"KlusterAI API request failed (attempt {attempt + 1}): {e}"
-                )
-                if attempt < self.max_retries:
-                    time.sleep(self.retry_delay * (2**attempt))
-                else:
-                    raise Exception(
-                        f"KlusterAI API request failed after {self.max_retries + 1} attempts: {e}"
-                    )
-            except Exception as e:
-                logger.error(f"Unexpected error during KlusterAI API call: {e}")
-                raise
+        Returns:
+            List of embedding vectors
+        """
+        # Handle OpenAI-style response format
+        if "data" in result:
+            data = sorted(result["data"], key=lambda item: item.get("index", 0))
+            return [item["embedding"] for item in data]
+        elif "embeddings" in result:
+            return result["embeddings"]
+        elif isinstance(result, list):
+            return result
+        else:
+            raise ValueError(f"Unexpected API response format: {result}")
 
 
 if __name__ == "__main__":
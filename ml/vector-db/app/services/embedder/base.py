@@ -1,4 +1,8 @@
-from typing import List, Union
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import Executor
+from typing import List, Union, Optional
 from abc import ABC, abstractmethod
 
 import numpy as np
@@ -11,8 +15,35 @@ class BaseEmbedder(ABC):
     def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
         """Encode texts into embeddings."""
         pass
+
+    async def aencode(
+        self,
+        texts: Union[str, List[str]],
+        executor: Optional[Executor] = None,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode texts without blocking the event loop.
+
+        Runs ``encode`` in ``executor`` by default; embedders doing network
+        I/O override this with a native async implementation.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            executor, functools.partial(context.run, self.encode, texts, **kwargs)
+        )
     
     @abstractmethod
     def get_dimension(self) -> int:
         """Get embedding dimension."""
-        pass 
\ No newline at end of file
+        pass
+
+    def close(self) -> None:
+        """Release workers and connections held by the embedder."""
+        pass
+
+    async def aclose(self) -> None:
+        """Async ``close``; also releases clients bound to the event loop."""
+        self.close()
+
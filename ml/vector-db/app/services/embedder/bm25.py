@@ -4,7 +4,37 @@ from collections import defaultdict
 import math
 import re
 
+from scipy.sparse import csr_matrix
+
 from .base import BaseEmbedder
+from .inverted_index import InvertedIndex
+
+
+def _top_k_row(
+    scores: np.ndarray, k: int, positions: Optional[np.ndarray] = None
+) -> List[tuple]:
+    """
+    Top-k of a dense score row, ties broken by document position.
+
+    If ``positions`` (sorted) is given, only those documents are ranked.
+    """
+    if positions is not None:
+        return [
+            (int(positions[idx]), score)
+            for idx, score in _top_k_row(scores[positions], k)
+        ]
+
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return []
+
+    kth = np.partition(scores, -k)[-k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(above)]
+    candidates = np.concatenate([above, ties])
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return [(int(idx), float(scores[idx])) for idx in candidates[order]]
 
 
 class BM25Embedder(BaseEmbedder):
@@ -31,15 +61,16 @@ class BM25Embedder(BaseEmbedder):
         self.tokenizer = tokenizer or self._default_tokenizer
         self.model_name = "BM25"
 
-        self.corpus: List[str] = []
-        self.doc_tokens: List[List[str]] = []
         self.doc_lengths: List[int] = []
         self.avg_doc_length: float = 0.0
         self.doc_freqs: Dict[str, int] = defaultdict(int)
-        self.idf_scores: Dict[str, float] = {}
+        self._idf_scores: Dict[str, float] = {}
+        self._idf_dirty: bool = False
         self.num_docs: int = 0
         self._dimension = 1
 
+        self.inverted_index = InvertedIndex(k1=k1, b=b)
+
     def _default_tokenizer(self, text: str) -> List[str]:
         """Default tokenization: lowercase, split on whitespace and punctuation."""
         text = text.lower()
@@ -48,105 +79,142 @@ class BM25Embedder(BaseEmbedder):
 
     def _compute_idf(self):
         """Compute IDF scores for all terms in the corpus."""
-        self.idf_scores = {}
+        self._idf_scores = {}
         for term, freq in self.doc_freqs.items():
             idf = math.log((self.num_docs - freq + 0.5) / (freq + 0.5))
-            self.idf_scores[term] = max(self.epsilon, idf)
+            self._idf_scores[term] = max(self.epsilon, idf)
+        self._idf_dirty = False
+
+    @property
+    def idf_scores(self) -> Dict[str, float]:
+        """IDF per term, recomputed on first access after the corpus changed."""
+        if self._idf_dirty:
+            self._compute_idf()
+        return self._idf_scores
 
     def fit(self, documents: List[str]) -> None:
-        self.corpus = documents
-        self.doc_tokens = []
-        self.doc_lengths = []
-        self.doc_freqs = defaultdict(int)
-        self.num_docs = len(documents)
+        self.build_index([self.tokenizer(doc) for doc in documents])
 
-        total_length = 0
-        for doc in documents:
-            tokens = self.tokenizer(doc)
-            self.doc_tokens.append(tokens)
-            doc_length = len(tokens)
-            self.doc_lengths.append(doc_length)
-            total_length += doc_length
+    def build_index(self, doc_tokens: List[List[str]]) -> None:
+        """Build postings, length norms and IDF from tokenized documents."""
+        inverted_index = InvertedIndex(k1=self.k1, b=self.b)
+        for tokens in doc_tokens:
+            inverted_index.add(tokens)
 
-            unique_tokens = set(tokens)
-            for token in unique_tokens:
-                self.doc_freqs[token] += 1
+        self.load_index(inverted_index)
 
-        self.avg_doc_length = total_length / self.num_docs if self.num_docs > 0 else 0
+    def load_index(self, inverted_index: InvertedIndex) -> None:
+        """Adopt a prebuilt inverted index and derive corpus statistics."""
+        self.inverted_index = inverted_index
+        self.doc_lengths = inverted_index.doc_lengths
+        self.doc_freqs = defaultdict(int, inverted_index.doc_freqs())
 
-        self._compute_idf()
+        self.num_docs = inverted_index.num_docs
+        self.avg_doc_length = inverted_index.avg_doc_length
+        self._idf_dirty = True
 
-    def _bm25_score(
-        self, query_tokens: List[str], doc_tokens: List[str], doc_length: int
-    ) -> float:
-        score = 0.0
-        doc_token_counts = defaultdict(int)
-
-        # Count term frequencies in document
-        for token in doc_tokens:
-            doc_token_counts[token] += 1
+    def partial_fit(self, documents: List[str]) -> None:
+        """
+        Append documents to the fitted corpus without refitting it.
 
-        # Compute BM25 score
-        for token in query_tokens:
-            if token in doc_token_counts and token in self.idf_scores:
-                tf = doc_token_counts[token]
-                idf = self.idf_scores[token]
+        Only the new documents are tokenized; doc frequencies, lengths and
+        postings are updated in place. IDF is recomputed lazily on the next
+        query, so a run of inserts pays for it once.
 
-                # BM25 formula
-                numerator = tf * (self.k1 + 1)
-                denominator = tf + self.k1 * (
-                    1 - self.b + self.b * (doc_length / self.avg_doc_length)
-                )
+        Args:
+            documents: Documents to append
+        """
+        for doc in documents:
+            tokens = self.tokenizer(doc)
+            self.inverted_index.add(tokens)
 
-                score += idf * (numerator / denominator)
+            for token in set(tokens):
+                self.doc_freqs[token] += 1
 
-        return score
+        self.num_docs = self.inverted_index.num_docs
+        self.avg_doc_length = self.inverted_index.avg_doc_length
+        self._idf_dirty = True
+
+    def _query_matrix(
+        self, texts: List[str], vocabulary: Dict[str, int]
+    ) -> csr_matrix:
+        """Sparse query x term matrix of query term counts."""
+        rows: List[int] = []
+        cols: List[int] = []
+        counts: List[float] = []
+
+        for row, query_text in enumerate(texts):
+            for token in self.tokenizer(query_text):
+                col = vocabulary.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    counts.append(1.0)
+
+        # Duplicate (row, col) entries are summed on construction
+        return csr_matrix(
+            (counts, (rows, cols)),
+            shape=(len(texts), len(vocabulary)),
+            dtype=np.float32,
+        )
 
     def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
-        if not self.corpus:
+        if not self.num_docs:
             raise ValueError("BM25 model must be fitted with documents before encoding")
 
         if isinstance(texts, str):
             texts = [texts]
 
-        scores_matrix = []
+        vocabulary, weights = self.inverted_index.weight_matrix(self.idf_scores)
+        queries = self._query_matrix(texts, vocabulary)
 
-        for query_text in texts:
-            query_tokens = self.tokenizer(query_text)
-            doc_scores = []
+        return (queries @ weights).toarray().astype(np.float32, copy=False)
 
-            # Compute BM25 score against each document in corpus
-            for i, (doc_tokens, doc_length) in enumerate(
-                zip(self.doc_tokens, self.doc_lengths)
-            ):
-                score = self._bm25_score(query_tokens, doc_tokens, doc_length)
-                doc_scores.append(score)
+    def search(
+        self, query: str, k: int = 5, candidates: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        if not self.num_docs:
+            raise ValueError(
+                "BM25 model must be fitted with documents before searching"
+            )
 
-            scores_matrix.append(doc_scores)
+        query_tokens = self.tokenizer(query)
+        return self.inverted_index.top_k(
+            query_tokens, self.idf_scores, k, candidates=candidates
+        )
 
-        return np.array(scores_matrix, dtype=np.float32)
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        candidates: Optional[np.ndarray] = None,
+    ) -> List[List[tuple]]:
+        """
+        Search many queries with one sparse matrix product.
+
+        Args:
+            queries: Query texts
+            k: Number of results per query
+            candidates: Boolean mask over documents eligible for results
 
-    def search(self, query: str, k: int = 5) -> List[tuple]:
-        if not self.corpus:
+        Returns:
+            Per-query lists of (doc_idx, score), ranked like ``search``
+        """
+        if not self.num_docs:
             raise ValueError(
                 "BM25 model must be fitted with documents before searching"
             )
 
-        query_tokens = self.tokenizer(query)
-        scores = []
-
-        for i, (doc_tokens, doc_length) in enumerate(
-            zip(self.doc_tokens, self.doc_lengths)
-        ):
-            score = self._bm25_score(query_tokens, doc_tokens, doc_length)
-            scores.append((i, score))
+        positions = None
+        if candidates is not None:
+            positions = np.flatnonzero(candidates[: self.num_docs])
 
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores[:k]
+        scores_matrix = self.encode(queries)
+        return [_top_k_row(scores, k, positions) for scores in scores_matrix]
 
     def get_dimension(self) -> int:
         """Get the 'dimension' - for BM25 this is the corpus size."""
-        return len(self.corpus) if self.corpus else 1
+        return self.num_docs or 1
 
     def get_vocabulary_size(self) -> int:
         """Get the size of the vocabulary."""
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import List, Union, Optional, Dict, Tuple
+
+import numpy as np
+
+from .base import BaseEmbedder
+from ..metrics import EMBEDDING_CACHE_TEXTS
+
+
+class SQLiteEmbeddingStore:
+    """On-disk embedding tier backed by a sqlite table of float32 blobs."""
+
+    def __init__(self, path: str):
+        """
+        Initialize sqlite store.
+
+        Args:
+            path: Path of the sqlite database file
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch stored vectors for the given keys."""
+        found: Dict[str, np.ndarray] = {}
+        # Stay below sqlite's bound parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                chunk,
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors, replacing existing keys."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [
+                (key, np.asarray(vector, dtype=np.float32).tobytes())
+                for key, vector in items.items()
+            ],
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbedder(BaseEmbedder):
+    """
+    Content-addressed cache in front of another embedder.
+
+    Embeddings are keyed by (model name, sha256 of the text). Lookups go
+    through a bounded in-memory LRU, then an optional on-disk tier, and
+    only misses are sent to the wrapped embedder.
+    """
+
+    def __init__(
+        self,
+        embedder: BaseEmbedder,
+        max_entries: int = 10000,
+        disk_path: Optional[str] = None,
+    ):
+        """
+        Initialize cached embedder.
+
+        Args:
+            embedder: Embedder to cache
+            max_entries: Maximum number of embeddings kept in memory
+            disk_path: Path of a sqlite file for the on-disk tier
+        """
+        self.embedder = embedder
+        self.model_name = getattr(embedder, "model_name", type(embedder).__name__)
+        self.max_entries = max_entries
+        self.disk = SQLiteEmbeddingStore(disk_path) if disk_path else None
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(
+        self, texts: List[str]
+    ) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        """
+        Resolve texts against the memory and disk tiers.
+
+        Returns:
+            Tuple containing:
+            - Cache key per text
+            - Vectors found so far, by key
+            - Deduplicated misses (key -> text), in first-seen order
+        """
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in vectors:
+                    continue
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+                    self.memory_hits += 1
+                    EMBEDDING_CACHE_TEXTS.inc(model=self.model_name, result="memory_hit")
+
+            if self.disk is not None:
+                missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+                for key, vector in self.disk.get_many(missing).items():
+                    vectors[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    EMBEDDING_CACHE_TEXTS.inc(model=self.model_name, result="disk_hit")
+
+        miss_texts: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in miss_texts:
+                miss_texts[key] = text
+
+        return keys, vectors, miss_texts
+
+    def _store(self, keys: List[str], embeddings: np.ndarray) -> Dict[str, np.ndarray]:
+        """Cache freshly computed embeddings."""
+        computed = dict(zip(keys, np.asarray(embeddings, dtype=np.float32)))
+
+        with self._lock:
+            self.misses += len(computed)
+            EMBEDDING_CACHE_TEXTS.inc(len(computed), model=self.model_name, result="miss")
+            for key, vector in computed.items():
+                self._remember(key, vector)
+            if self.disk is not None:
+                self.disk.put_many(computed)
+
+        return computed
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Encode texts, embedding only those missing from the cache."""
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.get_dimension()), dtype=np.float32)
+
+        keys, vectors, miss_texts = self._lookup(texts)
+
+        if miss_texts:
+            embeddings = self.embedder.encode(list(miss_texts.values()), **kwargs)
+            vectors.update(self._store(list(miss_texts), embeddings))
+
+        return np.stack([vectors[key] for key in keys])
+
+    async def aencode(
+        self,
+        texts: Union[str, List[str]],
+        executor: Optional[Executor] = None,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Async ``encode``; misses go through the wrapped embedder's ``aencode``.
+
+        With a disk tier, lookups and stores run in ``executor``: they query
+        sqlite under a lock that executor threads also take.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.get_dimension()), dtype=np.float32)
+
+        keys, vectors, miss_texts = await self._off_loop(executor, self._lookup, texts)
+
+        if miss_texts:
+            embeddings = await self.embedder.aencode(
+                list(miss_texts.values()), executor=executor, **kwargs
+            )
+            vectors.update(
+                await self._off_loop(executor, self._store, list(miss_texts), embeddings)
+            )
+
+        return np.stack([vectors[key] for key in keys])
+
+    async def _off_loop(self, executor: Optional[Executor], func, *args):
+        """Run a cache step in ``executor`` if it touches the disk tier."""
+        if self.disk is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    def get_dimension(self) -> int:
+        return self.embedder.get_dimension()
+
+    def close(self) -> None:
+        self.embedder.close()
+
+    async def aclose(self) -> None:
+        await self.embedder.aclose()
+
+    def get_stats(self) -> Dict:
+        """Cache hit/miss counters and sizes."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+        }
@@ -5,6 +5,7 @@ from transformers import AutoModel, AutoTokenizer
 
 from .base import BaseEmbedder
 from .pooling import pool_embeddings
+from ..metrics import stage
 
 
 class HuggingFaceEmbedder(BaseEmbedder):
@@ -45,14 +46,14 @@ class HuggingFaceEmbedder(BaseEmbedder):
         for i in range(0, len(texts), batch_size):
             batch_texts = texts[i : i + batch_size]
 
-            # Tokenize
-            encoded = self.tokenizer(
-                batch_texts,
-                padding=True,
-                truncation=True,
-                max_length=self.max_length,
-                return_tensors="pt",
-            )
+            with stage("tokenize", "huggingface"):
+                encoded = self.tokenizer(
+                    batch_texts,
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                )
             encoded = {k: v.to(self.device) for k, v in encoded.items()}
 
             # Generate embeddings
@@ -0,0 +1,363 @@
+import heapq
+from collections import Counter
+from collections.abc import Mapping
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class PostingsArrays(Mapping):
+    """
+    Read-only term postings over the flattened arrays of ``to_arrays``.
+
+    The arrays are used as given, typically memory-mapped from a saved
+    store, so opening an index costs O(vocabulary) rather than O(postings):
+    a term's postings are decoded only when the term is looked up.
+    """
+
+    def __init__(
+        self,
+        terms: List[str],
+        offsets: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self._rows: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+
+    def __getitem__(self, term: str) -> List[Tuple[int, int]]:
+        row = self._rows[term]
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return list(zip(self.docs[start:end].tolist(), self.tfs[start:end].tolist()))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, term: object) -> bool:
+        return term in self._rows
+
+    def doc_freq(self, term: str) -> int:
+        row = self._rows.get(term)
+        return 0 if row is None else int(self.offsets[row + 1] - self.offsets[row])
+
+    def doc_freqs(self) -> Dict[str, int]:
+        """Number of postings per term, without decoding them."""
+        return dict(zip(self.terms, np.diff(self.offsets).tolist()))
+
+
+class InvertedIndex:
+    """Term postings with per-document length norms for BM25 scoring."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize inverted index.
+
+        Args:
+            k1: Controls term frequency saturation point
+            b: Controls length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        # term -> list of (doc_idx, term frequency); a loaded index keeps
+        # the saved arrays until its first write
+        self.postings: Union[Dict[str, List[Tuple[int, int]]], PostingsArrays] = {}
+        self.doc_lengths: List[int] = []
+        self.total_length: int = 0
+
+        # k1 * (1 - b + b * dl / avgdl), refreshed lazily when avgdl changes
+        self._doc_norms: List[float] = []
+        self._norms_dirty: bool = False
+
+        # Cached term x document matrix of BM25 weights
+        self._vocabulary: Dict[str, int] = {}
+        self._weights: Optional[csr_matrix] = None
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self.total_length / self.num_docs if self.num_docs > 0 else 0.0
+
+    def clear(self) -> None:
+        """Drop all postings and document statistics."""
+        self.postings = {}
+        self.doc_lengths = []
+        self.total_length = 0
+        self._doc_norms = []
+        self._norms_dirty = False
+        self._vocabulary = {}
+        self._weights = None
+
+    def add(self, tokens: List[str]) -> int:
+        """
+        Index a tokenized document.
+
+        Args:
+            tokens: Document tokens
+
+        Returns:
+            Position of the document in the index
+        """
+        self._materialize()
+        doc_idx = self.num_docs
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append((doc_idx, tf))
+
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        self._norms_dirty = True
+        self._weights = None
+        return doc_idx
+
+    def _materialize(self) -> None:
+        """Turn loaded postings arrays into mutable lists before a write."""
+        if isinstance(self.postings, PostingsArrays):
+            self.postings = dict(self.postings.items())
+
+    def doc_freq(self, term: str) -> int:
+        """Number of documents containing the term."""
+        if isinstance(self.postings, PostingsArrays):
+            return self.postings.doc_freq(term)
+        return len(self.postings.get(term, ()))
+
+    def doc_freqs(self) -> Dict[str, int]:
+        """Number of documents containing each term."""
+        if isinstance(self.postings, PostingsArrays):
+            return self.postings.doc_freqs()
+        return {term: len(postings) for term, postings in self.postings.items()}
+
+    def _refresh_norms(self) -> None:
+        avg_doc_length = self.avg_doc_length or 1.0
+        self._doc_norms = [
+            self.k1 * (1 - self.b + self.b * (length / avg_doc_length))
+            for length in self.doc_lengths
+        ]
+        self._norms_dirty = False
+
+    def doc_norms(self) -> List[float]:
+        """Per-document BM25 length norms for the current avgdl."""
+        if self._norms_dirty:
+            self._refresh_norms()
+        return self._doc_norms
+
+    def score(
+        self, query_tokens: Iterable[str], idf_scores: Dict[str, float]
+    ) -> Dict[int, float]:
+        """
+        Accumulate BM25 scores over the postings of the query terms.
+
+        Args:
+            query_tokens: Query tokens (repeated terms count repeatedly)
+            idf_scores: IDF value per term
+
+        Returns:
+            Mapping of document position to score for matched documents
+        """
+        norms = self.doc_norms()
+        scores: Dict[int, float] = {}
+
+        for term, qtf in Counter(query_tokens).items():
+            postings = self.postings.get(term)
+            idf = idf_scores.get(term)
+            if not postings or idf is None:
+                continue
+
+            weight = qtf * idf * (self.k1 + 1)
+            for doc_idx, tf in postings:
+                contribution = weight * tf / (tf + norms[doc_idx])
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + contribution
+
+        return scores
+
+    def top_k(
+        self,
+        query_tokens: Iterable[str],
+        idf_scores: Dict[str, float],
+        k: int,
+        candidates: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the k best documents, highest score first.
+
+        Ties are broken by document position. When fewer than k documents
+        match, the remainder is filled with zero-score documents in order.
+
+        Args:
+            query_tokens: Query tokens
+            idf_scores: IDF value per term
+            k: Number of documents to return
+            candidates: Boolean mask over positions; only documents set in
+                it are scored or used as padding
+        """
+        if candidates is not None:
+            candidates = candidates[: self.num_docs]
+            k = min(k, int(np.count_nonzero(candidates)))
+        k = min(k, self.num_docs)
+        if k <= 0:
+            return []
+
+        scores = self.score(query_tokens, idf_scores)
+        if candidates is not None:
+            scores = {
+                doc_idx: score
+                for doc_idx, score in scores.items()
+                if doc_idx < len(candidates) and candidates[doc_idx]
+            }
+        results = heapq.nlargest(
+            k, scores.items(), key=lambda item: (item[1], -item[0])
+        )
+
+        if len(results) < k:
+            positions = (
+                np.flatnonzero(candidates).tolist()
+                if candidates is not None
+                else range(self.num_docs)
+            )
+            for doc_idx in positions:
+                if doc_idx not in scores:
+                    results.append((doc_idx, 0.0))
+                    if len(results) == k:
+                        break
+
+        return results
+
+    def weight_matrix(
+        self, idf_scores: Dict[str, float]
+    ) -> Tuple[Dict[str, int], csr_matrix]:
+        """
+        Term x document CSR matrix of BM25 weights.
+
+        Entry (t, d) holds ``idf(t) * tf * (k1 + 1) / (tf + norm(d))``, so
+        a query's scores are its term-count row times this matrix. The
+        matrix is built once and cached until the next ``add``.
+
+        Args:
+            idf_scores: IDF value per term
+
+        Returns:
+            Tuple containing:
+            - Mapping of term to matrix row
+            - Weight matrix of shape (vocabulary size, num docs)
+        """
+        if self._weights is not None:
+            return self._vocabulary, self._weights
+
+        terms, arrays = self.to_arrays()
+        vocabulary = {term: row for row, term in enumerate(terms)}
+        idfs = [idf_scores.get(term, 0.0) for term in terms]
+
+        indptr_arr = np.asarray(arrays["offsets"], dtype=np.int64)
+        doc_arr = np.asarray(arrays["docs"], dtype=np.int64)
+        tf_arr = np.asarray(arrays["tfs"], dtype=np.float32)
+        norms = np.asarray(self.doc_norms(), dtype=np.float32)
+        idf_arr = np.repeat(
+            np.asarray(idfs, dtype=np.float32), np.diff(indptr_arr)
+        )
+
+        data = idf_arr * (self.k1 + 1) * tf_arr / (tf_arr + norms[doc_arr])
+
+        self._vocabulary = vocabulary
+        self._weights = csr_matrix(
+            (data, doc_arr, indptr_arr),
+            shape=(len(vocabulary), self.num_docs),
+            dtype=np.float32,
+        )
+        return self._vocabulary, self._weights
+
+    def compact(self, keep: np.ndarray) -> "InvertedIndex":
+        """
+        Copy of the index without the dropped documents.
+
+        Postings are filtered and renumbered rather than rebuilt, so the
+        corpus does not need to be re-tokenized.
+
+        Args:
+            keep: Boolean mask over document positions; kept documents are
+                renumbered in order
+        """
+        keep_list = np.asarray(keep, dtype=bool)[: self.num_docs].tolist()
+        keep_list += [False] * (self.num_docs - len(keep_list))
+        new_positions = (np.cumsum(keep_list) - 1).tolist()
+
+        index = InvertedIndex(k1=self.k1, b=self.b)
+        for term, postings in self.postings.items():
+            kept = [(new_positions[doc_idx], tf) for doc_idx, tf in postings if keep_list[doc_idx]]
+            if kept:
+                index.postings[term] = kept
+
+        index.doc_lengths = [
+            length for length, kept in zip(self.doc_lengths, keep_list) if kept
+        ]
+        index.total_length = sum(index.doc_lengths)
+        index._norms_dirty = True
+        return index
+
+    def to_arrays(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Flatten postings into arrays for persistence.
+
+        Returns:
+            Tuple containing:
+            - Terms in postings order
+            - Arrays ``offsets`` (per term, n + 1), ``docs`` and ``tfs``
+              (per posting) and ``doc_lengths`` (per document)
+        """
+        if isinstance(self.postings, PostingsArrays):
+            # Not written to since loading: the loaded arrays are current
+            return self.postings.terms, {
+                "offsets": self.postings.offsets,
+                "docs": self.postings.docs,
+                "tfs": self.postings.tfs,
+                "doc_lengths": np.asarray(self.doc_lengths, dtype=np.int32),
+            }
+
+        terms = list(self.postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        docs: List[int] = []
+        tfs: List[int] = []
+
+        for i, term in enumerate(terms):
+            for doc_idx, tf in self.postings[term]:
+                docs.append(doc_idx)
+                tfs.append(tf)
+            offsets[i + 1] = len(docs)
+
+        return terms, {
+            "offsets": offsets,
+            "docs": np.asarray(docs, dtype=np.int32),
+            "tfs": np.asarray(tfs, dtype=np.int32),
+            "doc_lengths": np.asarray(self.doc_lengths, dtype=np.int32),
+        }
+
+    @classmethod
+    def from_arrays(
+        cls,
+        terms: List[str],
+        arrays: Dict[str, np.ndarray],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "InvertedIndex":
+        """
+        Open an index from the output of ``to_arrays``.
+
+        Postings stay in the given (possibly memory-mapped) arrays until
+        the first ``add``; only document lengths are read eagerly.
+        """
+        index = cls(k1=k1, b=b)
+        index.postings = PostingsArrays(
+            terms, arrays["offsets"], arrays["docs"], arrays["tfs"]
+        )
+        index.doc_lengths = arrays["doc_lengths"].tolist()
+        index.total_length = sum(index.doc_lengths)
+        index._norms_dirty = True
+        return index
@@ -0,0 +1,214 @@
+import os
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from .base import BaseEmbedder
+from .pooling import pool_embeddings
+from ..metrics import stage
+
+
+def length_buckets(lengths: List[int], batch_size: int) -> List[np.ndarray]:
+    """
+    Split text indices into batches of similar token length.
+
+    Texts are sorted by length, so each batch is padded only to the
+    longest of its neighbours instead of the longest text overall.
+
+    Args:
+        lengths: Token length of every text
+        batch_size: Maximum texts per batch
+
+    Returns:
+        Indices into ``lengths``, one array per batch
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+class _LastHiddenState(torch.nn.Module):
+    """Model wrapper exporting only ``last_hidden_state``."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        kwargs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if token_type_ids is not None:
+            kwargs["token_type_ids"] = token_type_ids
+        return self.model(**kwargs).last_hidden_state
+
+
+class ONNXEmbedder(BaseEmbedder):
+    """
+    Hugging Face model exported to ONNX and run with onnxruntime on CPU.
+
+    The model is exported once into ``cache_dir`` and, with ``quantize``,
+    converted to int8 weights by dynamic quantization. Texts are tokenized
+    up front and batched by token length to reduce padding. Pooling and
+    normalization match ``HuggingFaceEmbedder``.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str,
+        max_length: int = 512,
+        pooling_strategy: str = "mean",
+        normalize: bool = True,
+        quantize: bool = False,
+        length_bucketing: bool = True,
+    ):
+        """
+        Initialize ONNX embedder, exporting the model if needed.
+
+        Args:
+            model_name: Hugging Face model name or local path
+            cache_dir: Directory for exported ONNX models
+            max_length: Maximum tokens per text
+            pooling_strategy: "mean", "cls" or "max"
+            normalize: L2-normalize embeddings
+            quantize: Run an int8 dynamically quantized copy of the model
+            length_bucketing: Batch texts of similar token length together
+        """
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "onnxruntime is required for the ONNX embedder: pip install onnxruntime onnx"
+            ) from e
+
+        self.model_name: str = model_name
+        self.max_length: int = max_length
+        self.pooling_strategy: str = pooling_strategy
+        self.normalize: bool = normalize
+        self.quantize: bool = quantize
+        self.length_bucketing: bool = length_bucketing
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model_dir = os.path.join(cache_dir, model_name.replace("/", "--"))
+        self.model_path: str = self._export()
+        self._load_session()
+
+    def _load_session(self) -> None:
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(
+            self.model_path, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension: int = self.session.get_outputs()[0].shape[-1]
+
+    def __getstate__(self):
+        # Sessions do not pickle; worker processes reopen the exported model
+        state = self.__dict__.copy()
+        del state["session"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_session()
+
+    def _export(self) -> str:
+        """Path of the ONNX model to run, exported and quantized on first use."""
+        fp32_path = os.path.join(self.model_dir, "model.onnx")
+        int8_path = os.path.join(self.model_dir, "model.int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            os.makedirs(self.model_dir, exist_ok=True)
+            # Eager attention traces to plain MatMul/Softmax that onnxruntime
+            # fuses; the SDPA path exports a slower mask computation
+            model = AutoModel.from_pretrained(self.model_name, attn_implementation="eager")
+            model.eval()
+
+            dummy = self.tokenizer(["export"], return_tensors="pt")
+            input_names = [
+                name
+                for name in ("input_ids", "attention_mask", "token_type_ids")
+                if name in dummy
+            ]
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+            # Exported to a temporary file so that a failed export is retried
+            tmp_path = f"{fp32_path}.tmp"
+            torch.onnx.export(
+                _LastHiddenState(model),
+                tuple(dummy[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                dynamo=False,
+            )
+            os.replace(tmp_path, fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            tmp_path = f"{int8_path}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return int8_path
+
+    def _pad(self, input_ids: List[List[int]]) -> Dict[str, np.ndarray]:
+        """Model inputs for a batch, padded to its longest text."""
+        width = max(len(ids) for ids in input_ids)
+        padded = np.full(
+            (len(input_ids), width), self.tokenizer.pad_token_id or 0, dtype=np.int64
+        )
+        attention_mask = np.zeros((len(input_ids), width), dtype=np.int64)
+        for row, ids in enumerate(input_ids):
+            padded[row, : len(ids)] = ids
+            attention_mask[row, : len(ids)] = 1
+
+        inputs = {
+            "input_ids": padded,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(padded),
+        }
+        return {name: value for name, value in inputs.items() if name in self._input_names}
+
+    def encode(
+        self, texts: Union[str, List[str]], batch_size: int = 32, **kwargs
+    ) -> np.ndarray:
+        """Encode texts into embeddings."""
+        if isinstance(texts, str):
+            texts = [texts]
+
+        with stage("tokenize", "onnx"):
+            input_ids = self.tokenizer(
+                texts, truncation=True, max_length=self.max_length
+            )["input_ids"]
+
+        if self.length_bucketing:
+            batches = length_buckets([len(ids) for ids in input_ids], batch_size)
+        else:
+            order = np.arange(len(texts))
+            batches = [order[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+        embeddings = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for batch in batches:
+            inputs = self._pad([input_ids[i] for i in batch])
+            (hidden_state,) = self.session.run(["last_hidden_state"], inputs)
+
+            pooled = pool_embeddings(
+                torch.from_numpy(hidden_state),
+                torch.from_numpy(inputs["attention_mask"]),
+                self.pooling_strategy,
+            )
+            if self.normalize:
+                pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+            embeddings[batch] = pooled.numpy()
+
+        return embeddings
+
+    def get_dimension(self) -> int:
+        return self._dimension
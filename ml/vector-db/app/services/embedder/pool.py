@@ -0,0 +1,299 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+import itertools
+from concurrent.futures import Executor, Future
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from .base import BaseEmbedder
+from ..metrics import EMBEDDER_BATCH_TEXTS
+
+logger = logging.getLogger(__name__)
+
+# A chunk of one encode call waiting to be batched: texts and their result
+_Request = Tuple[List[str], Future]
+
+
+def _worker(
+    embedder: BaseEmbedder, tasks: "mp.Queue", results: "mp.Queue", num_threads: int
+) -> None:
+    """Worker process loop: encode batches until a ``None`` task arrives."""
+    torch.set_num_threads(num_threads)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        batch_id, texts = task
+        try:
+            embeddings = embedder.encode(texts, batch_size=len(texts))
+            results.put((batch_id, np.asarray(embeddings, dtype=np.float32), None))
+        except Exception as e:
+            # Exceptions may not pickle; the message is enough for the caller
+            results.put((batch_id, None, f"{type(e).__name__}: {e}"))
+
+
+class EmbedderPool(BaseEmbedder):
+    """
+    Run a local embedder in a pool of worker processes.
+
+    Concurrent ``encode`` calls are split into chunks of at most
+    ``max_batch_size`` texts and queued. A dispatcher thread waits for a
+    free worker, then coalesces queued chunks into one micro-batch, waiting
+    up to ``max_wait_ms`` after the first chunk for more to arrive. Results
+    are returned through futures, so callers only block on their own texts.
+
+    The embedder is loaded once in this process. Torch model weights are
+    moved to shared memory before the workers are spawned, so every worker
+    maps the same weights instead of holding a copy. Other embedders must
+    be picklable and are copied into each worker.
+    """
+
+    def __init__(
+        self,
+        embedder: BaseEmbedder,
+        num_workers: int = 2,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        threads_per_worker: Optional[int] = None,
+    ):
+        """
+        Initialize embedder pool and start its workers.
+
+        Args:
+            embedder: Embedder to run in the workers
+            num_workers: Number of worker processes
+            max_batch_size: Maximum texts per micro-batch
+            max_wait_ms: How long a batch waits for more requests
+            threads_per_worker: Torch threads per worker (defaults to an
+                even share of the CPU cores)
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.model_name = getattr(embedder, "model_name", type(embedder).__name__)
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._dimension = embedder.get_dimension()
+
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+
+        model = getattr(embedder, "model", None)
+        if isinstance(model, torch.nn.Module):
+            model.share_memory()
+
+        # Spawn rather than fork: forking a process with running threads
+        # (event loop, executors, OpenMP) can deadlock the child
+        context = mp.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._processes = [
+            context.Process(
+                target=_worker,
+                args=(embedder, self._tasks, self._results, threads),
+                daemon=True,
+                name=f"embedder-{i}",
+            )
+            for i in range(num_workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._requests: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        # One slot per worker: batches keep coalescing while all are busy
+        self._slots = threading.Semaphore(num_workers)
+        self._batch_ids = itertools.count()
+        self._in_flight: Dict[int, List[_Request]] = {}
+        self._in_flight_lock = threading.Lock()
+        self._closed = False
+        self._broken = False
+
+        self.batches = 0
+        self.batched_texts = 0
+
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="embedder-dispatch", daemon=True
+        )
+        self._collector = threading.Thread(
+            target=self._collect, name="embedder-collect", daemon=True
+        )
+        self._dispatcher.start()
+        self._collector.start()
+
+    def submit(self, texts: Union[str, List[str]]) -> List[Future]:
+        """
+        Queue texts for embedding.
+
+        Returns:
+            One future per chunk of at most ``max_batch_size`` texts, in order
+        """
+        if self._closed or self._broken:
+            raise RuntimeError("Embedder pool is closed")
+        if isinstance(texts, str):
+            texts = [texts]
+
+        futures = []
+        for i in range(0, len(texts), self.max_batch_size):
+            future: Future = Future()
+            self._requests.put((list(texts[i : i + self.max_batch_size]), future))
+            futures.append(future)
+        return futures
+
+    def _stack(self, chunks: List[np.ndarray]) -> np.ndarray:
+        if not chunks:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        return np.vstack(chunks)
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Encode texts, blocking until the workers return them."""
+        return self._stack([future.result() for future in self.submit(texts)])
+
+    async def aencode(
+        self,
+        texts: Union[str, List[str]],
+        executor: Optional[Executor] = None,
+        **kwargs
+    ) -> np.ndarray:
+        """Await the pool's futures; no executor thread is held while waiting."""
+        futures = [asyncio.wrap_future(future) for future in self.submit(texts)]
+        return self._stack(list(await asyncio.gather(*futures)))
+
+    def _next_batch(self, first: _Request) -> Tuple[List[_Request], Optional[_Request]]:
+        """
+        Coalesce queued requests into a micro-batch (dispatcher thread).
+
+        Args:
+            first: Request opening the batch
+
+        Returns:
+            Tuple containing:
+            - Requests of the batch
+            - Request that did not fit and opens the next batch, if any
+        """
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            try:
+                request = self._requests.get(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except queue.Empty:
+                break
+            if request is None:
+                # Closing: send this batch, stop on the next loop
+                self._requests.put(None)
+                return batch, None
+            if size + len(request[0]) > self.max_batch_size:
+                return batch, request
+            batch.append(request)
+            size += len(request[0])
+        return batch, None
+
+    def _dispatch(self) -> None:
+        """Send micro-batches to the workers as they become free."""
+        carried: Optional[_Request] = None
+        while True:
+            # Waiting for a worker first lets requests pile up meanwhile
+            self._slots.acquire()
+            first = carried if carried is not None else self._requests.get()
+            if first is None:
+                break
+            batch, carried = self._next_batch(first)
+
+            batch = [
+                (texts, future)
+                for texts, future in batch
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch or self._broken:
+                for _, future in batch:
+                    future.set_exception(RuntimeError("Embedding worker exited"))
+                self._slots.release()
+                continue
+
+            batch_id = next(self._batch_ids)
+            texts = [text for chunk, _ in batch for text in chunk]
+            with self._in_flight_lock:
+                self._in_flight[batch_id] = batch
+                self.batches += 1
+                self.batched_texts += len(texts)
+            EMBEDDER_BATCH_TEXTS.observe(len(texts), model=self.model_name)
+            self._tasks.put((batch_id, texts))
+
+    def _collect(self) -> None:
+        """Resolve futures from worker results (collector thread)."""
+        while True:
+            try:
+                item = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if item is None:
+                break
+
+            batch_id, embeddings, error = item
+            with self._in_flight_lock:
+                batch = self._in_flight.pop(batch_id, [])
+            self._slots.release()
+
+            start = 0
+            for texts, future in batch:
+                if error is not None:
+                    future.set_exception(RuntimeError(f"Embedding worker failed: {error}"))
+                else:
+                    future.set_result(embeddings[start : start + len(texts)])
+                start += len(texts)
+
+    def _check_workers(self) -> None:
+        """Fail all requests once a worker process has died (collector thread)."""
+        if self._closed or self._broken:
+            return
+        dead = [p.name for p in self._processes if not p.is_alive()]
+        if not dead:
+            return
+        logger.error(f"Embedding workers exited unexpectedly: {dead}")
+        self._broken = True
+        with self._in_flight_lock:
+            batches, self._in_flight = list(self._in_flight.values()), {}
+        for batch in batches:
+            for _, future in batch:
+                future.set_exception(RuntimeError("Embedding worker exited"))
+        # Unblock the dispatcher so it fails queued requests too
+        for _ in range(self.num_workers):
+            self._slots.release()
+
+    def close(self) -> None:
+        """Finish queued requests and stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        self._requests.put(None)
+        self._dispatcher.join()
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=30)
+        self._results.put(None)
+        self._collector.join()
+
+    def get_dimension(self) -> int:
+        return self._dimension
+
+    def get_stats(self) -> Dict:
+        """Micro-batching counters."""
+        return {
+            "workers": self.num_workers,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_texts / self.batches if self.batches else 0.0,
+        }
+
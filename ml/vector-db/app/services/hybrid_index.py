@@ -0,0 +1,277 @@
+import os
+import json
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import VectorDBConfig, DistanceMetric, FusionMethod
+from .document import Document
+from .vector_db import VectorDB
+from .bm25_index import BM25Index
+from .metrics import stage
+
+
+HYBRID_SUFFIX = ".hybrid"
+
+# Ranked (score, document) pairs from one retriever
+Ranking = List[Tuple[float, Document]]
+
+
+def hybrid_path(path: str) -> str:
+    """Directory holding both parts of a hybrid index."""
+    return f"{path}{HYBRID_SUFFIX}"
+
+
+def hybrid_exists(path: str) -> bool:
+    """Check whether a hybrid index was saved for an index path."""
+    return os.path.exists(os.path.join(hybrid_path(path), "manifest.json"))
+
+
+def _min_max(scores: Sequence[float]) -> List[float]:
+    """Scale scores to [0, 1]; equal scores all map to 1."""
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0] * len(scores)
+    return [(score - low) / (high - low) for score in scores]
+
+
+class HybridIndex:
+    """
+    BM25 and dense retrieval over the same documents, with fused results.
+
+    Documents are added to both a ``BM25Index`` and a ``VectorDB``. A query
+    is run against both, each returning ``fusion_candidates * k`` results,
+    and the two rankings are merged by reciprocal-rank fusion or by a
+    weighted sum of min-max normalized scores.
+    """
+
+    def __init__(self, config: VectorDBConfig):
+        """
+        Initialize hybrid index.
+
+        Args:
+            config: Dense index config; ``bm25_*`` configure the BM25 part
+                and ``fusion``/``rrf_k``/``dense_weight`` the fusion
+        """
+        self.config = config
+        self.index_path = config.index_path
+
+        dense_config = copy.copy(config)
+        dense_config.index_path = self._part_path(config.index_path, "dense")
+        self.vector = VectorDB(dense_config)
+        self.bm25 = BM25Index(
+            k1=config.bm25_k1,
+            b=config.bm25_b,
+            epsilon=config.bm25_epsilon,
+            index_path=self._part_path(config.index_path, "sparse"),
+        )
+
+    @staticmethod
+    def _part_path(path: Optional[str], part: str) -> Optional[str]:
+        return os.path.join(hybrid_path(path), part) if path else None
+
+    @property
+    def documents(self):
+        return self.vector.documents
+
+    @property
+    def dimension(self) -> int:
+        return self.vector.dimension
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """
+        Add documents to both retrievers; existing ids are replaced.
+
+        Args:
+            documents: Documents with content and vector
+        """
+        for doc in documents:
+            if not doc.content:
+                raise ValueError(f"Document {doc.id} doesn't have content")
+
+        self.vector.add_documents(documents)
+        self.bm25.add_documents(documents)
+
+    def delete_documents(self, doc_ids: Iterable[str]) -> List[str]:
+        """
+        Delete documents from both retrievers.
+
+        Returns:
+            Ids that were found and deleted
+        """
+        doc_ids = list(doc_ids)
+        self.bm25.delete_documents(doc_ids)
+        return self.vector.delete_documents(doc_ids)
+
+    def compaction_due(self, threshold: float) -> bool:
+        """Whether either retriever has accumulated enough garbage to compact."""
+        return self.vector.compaction_due(threshold) or self.bm25.compaction_due(threshold)
+
+    def compact(self) -> None:
+        """Compact both retrievers."""
+        self.vector.compact()
+        self.bm25.compact()
+
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        """Get document by ID."""
+        return self.vector.get_document(doc_id)
+
+    def candidates(self, k: int) -> int:
+        """Number of results each retriever returns for k fused results."""
+        return k * max(self.config.fusion_candidates, 1)
+
+    def search_sparse(
+        self, query_texts: List[str], k: int, **kwargs
+    ) -> List[Ranking]:
+        """BM25 rankings per query, without zero-score or padding results."""
+        all_scores, all_documents = self.bm25.search_batch(
+            query_texts, k=self.candidates(k), **kwargs
+        )
+        return [
+            [
+                (score, doc)
+                for score, doc in zip(scores, documents)
+                if score > 0 and doc.id in self.documents
+            ]
+            for scores, documents in zip(all_scores, all_documents)
+        ]
+
+    def search_dense(
+        self, query_vectors: np.ndarray, k: int, **kwargs
+    ) -> List[Ranking]:
+        """Dense rankings per query, scored so that higher is better."""
+        distances, all_documents = self.vector.search_batch(
+            query_vectors, k=self.candidates(k), **kwargs
+        )
+        sign = -1.0 if self.config.distance_metric == DistanceMetric.L2 else 1.0
+        return [
+            [
+                (sign * float(distance), doc)
+                for distance, doc in zip(row, documents)
+                if doc.id in self.documents
+            ]
+            for row, documents in zip(distances, all_documents)
+        ]
+
+    def fuse(
+        self, sparse: Ranking, dense: Ranking, k: int
+    ) -> Tuple[List[float], List[Document]]:
+        """
+        Merge one query's BM25 and dense rankings.
+
+        Returns:
+            Tuple containing:
+            - Fused scores, highest first
+            - Matching documents
+        """
+        scores: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+
+        if self.config.fusion == FusionMethod.RRF:
+            weighted = [(sparse, 1.0), (dense, 1.0)]
+            for ranking, weight in weighted:
+                for rank, (_, doc) in enumerate(ranking, start=1):
+                    scores[doc.id] = scores.get(doc.id, 0.0) + weight / (
+                        self.config.rrf_k + rank
+                    )
+                    documents[doc.id] = doc
+        else:
+            weighted = [
+                (sparse, 1.0 - self.config.dense_weight),
+                (dense, self.config.dense_weight),
+            ]
+            for ranking, weight in weighted:
+                normalized = _min_max([score for score, _ in ranking])
+                for score, (_, doc) in zip(normalized, ranking):
+                    scores[doc.id] = scores.get(doc.id, 0.0) + weight * score
+                    documents[doc.id] = doc
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [score for _, score in ranked], [documents[doc_id] for doc_id, _ in ranked]
+
+    def search_batch(
+        self,
+        query_texts: List[str],
+        query_vectors: np.ndarray,
+        k: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Tuple[List[List[float]], List[List[Document]]]:
+        """
+        Search both retrievers and fuse their rankings per query.
+
+        Args:
+            query_texts: Query texts for BM25
+            query_vectors: Embedded queries of shape (n, dimension)
+            k: Number of fused results per query
+            metadata_filter: Restrict both retrievers to matching documents
+            **kwargs: Dense search parameters (``nprobe``, ``ef_search``)
+
+        Returns:
+            Tuple containing:
+            - Per-query fused scores
+            - Per-query documents
+        """
+        sparse = self.search_sparse(query_texts, k, metadata_filter=metadata_filter)
+        dense = self.search_dense(
+            query_vectors, k, metadata_filter=metadata_filter, **kwargs
+        )
+
+        all_scores, all_documents = [], []
+        with stage("fuse", self.config.fusion.value):
+            for sparse_ranking, dense_ranking in zip(sparse, dense):
+                scores, documents = self.fuse(sparse_ranking, dense_ranking, k)
+                all_scores.append(scores)
+                all_documents.append(documents)
+        return all_scores, all_documents
+
+    def search(
+        self,
+        query_text: str,
+        query_vector: np.ndarray,
+        k: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Tuple[List[float], List[Document]]:
+        """Hybrid search for a single query."""
+        all_scores, all_documents = self.search_batch(
+            [query_text],
+            np.asarray(query_vector, dtype=np.float32).reshape(1, -1),
+            k=k,
+            metadata_filter=metadata_filter,
+            **kwargs
+        )
+        return all_scores[0], all_documents[0]
+
+    def save(self, path: str) -> None:
+        """
+        Save both parts under ``{path}.hybrid``.
+
+        Args:
+            path: Path to save the index
+        """
+        directory = hybrid_path(path)
+        os.makedirs(directory, exist_ok=True)
+
+        self.vector.save(self._part_path(path, "dense"))
+        self.bm25.save(self._part_path(path, "sparse"))
+
+        config = self.config.to_dict()
+        config["index_path"] = None
+        tmp_path = os.path.join(directory, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"kind": "hybrid", "config": config}, f)
+        os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+
+    def get_stats(self) -> Dict:
+        """Get index statistics."""
+        bm25_stats = self.bm25.get_stats()
+        return {
+            "num_documents": len(self.documents),
+            "vector_count": self.vector.ntotal,
+            "vocabulary_size": bm25_stats["vocabulary_size"],
+            "fusion": self.config.fusion.value,
+        }
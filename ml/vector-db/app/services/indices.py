@@ -1,41 +1,212 @@
+import hashlib
 from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
 import faiss
+import numpy as np
 from .config import VectorDBConfig, DistanceMetric, IndexType
 
 
+def _metric_type(config: VectorDBConfig) -> int:
+    """FAISS metric for the configured distance (cosine uses normalized IP)."""
+    if config.distance_metric == DistanceMetric.L2:
+        return faiss.METRIC_L2
+    elif config.distance_metric in (DistanceMetric.IP, DistanceMetric.COSINE):
+        return faiss.METRIC_INNER_PRODUCT
+    else:
+        raise ValueError(f"Unsupported distance metric: {config.distance_metric}")
+
+
+def _quantizer(config: VectorDBConfig) -> faiss.Index:
+    """Coarse quantizer for IVF indices."""
+    if _metric_type(config) == faiss.METRIC_L2:
+        return faiss.IndexFlatL2(config.dimension)
+    return faiss.IndexFlatIP(config.dimension)
+
+
+def document_faiss_id(doc_id: str, generation: int = 0) -> int:
+    """
+    Stable non-negative int64 FAISS id hashed from a document id.
+
+    Args:
+        doc_id: Document id
+        generation: Version of the document's vector; generation 0 hashes
+            the document id alone
+    """
+    key = str(doc_id) if not generation else f"{doc_id}\x00{generation}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def document_faiss_ids(doc_ids: Iterable[str]) -> np.ndarray:
+    """``document_faiss_id`` of every id, as an int64 array."""
+    return np.fromiter(
+        (document_faiss_id(doc_id) for doc_id in doc_ids), dtype=np.int64
+    )
+
+
+def enable_reconstruct(index: faiss.Index) -> faiss.Index:
+    """
+    Let an IVF index reconstruct vectors by id through a hashtable.
+
+    IVF lists are only searchable by default; the direct map is saved with
+    the index and rebuilt here for indices saved without one.
+    """
+    if isinstance(index, faiss.IndexIVF) and (
+        index.direct_map.type != faiss.DirectMap.Hashtable
+    ):
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
 class VectorIndex(ABC):
     """Abstract base class for vector indices."""
 
+    # IVF lists store arbitrary ids; other indices need an IndexIDMap2
+    native_ids: bool = False
+    # Whether vectors can be removed; HNSW graphs can only be rebuilt
+    supports_removal: bool = True
+    # Whether vectors reconstructed from the index equal the added ones;
+    # quantized indices keep a copy of the raw vectors for retraining
+    exact_vectors: bool = True
+
     @abstractmethod
     def build_index(self, config: VectorDBConfig) -> faiss.Index:
         """Build and return the FAISS index."""
         pass
 
+    def search_params(
+        self,
+        config: VectorDBConfig,
+        selector: Optional[faiss.IDSelector] = None,
+        **kwargs
+    ) -> Optional[faiss.SearchParameters]:
+        """Per-call search parameters, with kwargs overriding the config."""
+        return faiss.SearchParameters(sel=selector) if selector is not None else None
+
+    def min_training_points(self, config: VectorDBConfig) -> int:
+        """Vectors to collect before training (only used if training is needed)."""
+        return 1
+
 
 class FlatIndex(VectorIndex):
     """Flat index implementation."""
 
     def build_index(self, config: VectorDBConfig) -> faiss.Index:
-        if config.distance_metric == DistanceMetric.L2:
+        if _metric_type(config) == faiss.METRIC_L2:
             return faiss.IndexFlatL2(config.dimension)
-        elif config.distance_metric == DistanceMetric.IP:
-            return faiss.IndexFlatIP(config.dimension)
-        else:
-            raise ValueError(f"Unsupported distance metric: {config.distance_metric}")
+        return faiss.IndexFlatIP(config.dimension)
 
 
-class IVFFlatIndex(VectorIndex):
+class IVFIndex(VectorIndex):
+    """Base for inverted-file indices; ``nprobe`` is set per search."""
+
+    native_ids = True
+
+    def search_params(
+        self,
+        config: VectorDBConfig,
+        selector: Optional[faiss.IDSelector] = None,
+        **kwargs
+    ) -> Optional[faiss.SearchParameters]:
+        return faiss.SearchParametersIVF(
+            nprobe=kwargs.get("nprobe") or config.nprobe, sel=selector
+        )
+
+    def min_training_points(self, config: VectorDBConfig) -> int:
+        return config.train_points_per_centroid * config.nlist
+
+
+class IVFFlatIndex(IVFIndex):
     """IVF Flat index implementation."""
 
     def build_index(self, config: VectorDBConfig) -> faiss.Index:
-        if config.distance_metric == DistanceMetric.L2:
-            quantizer = faiss.IndexFlatL2(config.dimension)
-        elif config.distance_metric == DistanceMetric.IP:
-            quantizer = faiss.IndexFlatIP(config.dimension)
-        else:
-            raise ValueError(f"Unsupported distance metric: {config.distance_metric}")
+        return faiss.IndexIVFFlat(
+            _quantizer(config), config.dimension, config.nlist, _metric_type(config)
+        )
+
+
+class IVFPQIndex(IVFIndex):
+    """IVF index storing product-quantized codes instead of raw vectors."""
+
+    exact_vectors = False
+
+    @staticmethod
+    def num_subquantizers(config: VectorDBConfig) -> int:
+        """Configured ``pq_m``, or the largest divisor of the dimension <= d / 8."""
+        if config.pq_m:
+            if config.dimension % config.pq_m:
+                raise ValueError(
+                    f"Dimension {config.dimension} is not divisible by pq_m={config.pq_m}"
+                )
+            return config.pq_m
+
+        m = max(config.dimension // 8, 1)
+        while config.dimension % m:
+            m -= 1
+        return m
+
+    def min_training_points(self, config: VectorDBConfig) -> int:
+        # The PQ codebooks are k-means with 2 ** pq_nbits centroids each
+        return config.train_points_per_centroid * max(
+            config.nlist, 2**config.pq_nbits
+        )
+
+    def build_index(self, config: VectorDBConfig) -> faiss.Index:
+        return faiss.IndexIVFPQ(
+            _quantizer(config),
+            config.dimension,
+            config.nlist,
+            self.num_subquantizers(config),
+            config.pq_nbits,
+            _metric_type(config),
+        )
+
 
-        return faiss.IndexIVFFlat(quantizer, config.dimension, config.nlist)
+class HNSWIndex(VectorIndex):
+    """HNSW graph index; needs no training, ``ef_search`` is set per search."""
+
+    supports_removal = False
+
+    def build_index(self, config: VectorDBConfig) -> faiss.Index:
+        index = faiss.IndexHNSWFlat(config.dimension, config.hnsw_m, _metric_type(config))
+        index.hnsw.efConstruction = config.ef_construction
+        index.hnsw.efSearch = config.ef_search
+        return index
+
+    def search_params(
+        self,
+        config: VectorDBConfig,
+        selector: Optional[faiss.IDSelector] = None,
+        **kwargs
+    ) -> Optional[faiss.SearchParameters]:
+        return faiss.SearchParametersHNSW(
+            efSearch=kwargs.get("ef_search") or config.ef_search, sel=selector
+        )
+
+
+class ScalarQuantizerIndex(VectorIndex):
+    """Flat scan over scalar-quantized vectors."""
+
+    quantizer_type: int = faiss.ScalarQuantizer.QT_8bit
+    exact_vectors = False
+
+    def build_index(self, config: VectorDBConfig) -> faiss.Index:
+        return faiss.IndexScalarQuantizer(
+            config.dimension, self.quantizer_type, _metric_type(config)
+        )
+
+
+class SQ8Index(ScalarQuantizerIndex):
+    """One byte per dimension (4x smaller than float32)."""
+
+    quantizer_type = faiss.ScalarQuantizer.QT_8bit
+
+
+class SQFP16Index(ScalarQuantizerIndex):
+    """Half-precision floats (2x smaller than float32)."""
+
+    quantizer_type = faiss.ScalarQuantizer.QT_fp16
 
 
 class IndexFactory:
@@ -44,13 +215,67 @@ class IndexFactory:
     _index_map = {
         IndexType.FLAT: FlatIndex,
         IndexType.IVF_FLAT: IVFFlatIndex,
+        IndexType.IVF_PQ: IVFPQIndex,
+        IndexType.HNSW: HNSWIndex,
+        IndexType.SQ8: SQ8Index,
+        IndexType.SQ_FP16: SQFP16Index,
     }
 
     @classmethod
-    def create_index(cls, config: VectorDBConfig) -> faiss.Index:
-        """Create an index based on configuration."""
+    def _builder(cls, config: VectorDBConfig) -> VectorIndex:
         if config.index_type not in cls._index_map:
             raise ValueError(f"Unsupported index type: {config.index_type}")
+        return cls._index_map[config.index_type]()
 
-        index_builder: VectorIndex = cls._index_map[config.index_type]()
-        return index_builder.build_index(config)
+    @classmethod
+    def create_index(cls, config: VectorDBConfig) -> faiss.Index:
+        """Create an index based on configuration."""
+        return cls._builder(config).build_index(config)
+
+    @classmethod
+    def create_id_index(cls, config: VectorDBConfig) -> faiss.Index:
+        """
+        Create an index addressed by caller-provided int64 ids.
+
+        IVF indices store ids in their inverted lists. Other types are
+        wrapped in an ``IndexIDMap2``; it must not wrap IVF indices, whose
+        ``remove_ids`` does not renumber the positions the map relies on.
+        """
+        builder = cls._builder(config)
+        index = builder.build_index(config)
+        if builder.native_ids:
+            return enable_reconstruct(index)
+        return faiss.IndexIDMap2(index)
+
+    @classmethod
+    def supports_removal(cls, config: VectorDBConfig) -> bool:
+        """Whether vectors can be removed from an index of this type."""
+        return cls._builder(config).supports_removal
+
+    @classmethod
+    def exact_vectors(cls, config: VectorDBConfig) -> bool:
+        """Whether an index of this type reconstructs vectors losslessly."""
+        return cls._builder(config).exact_vectors
+
+    @classmethod
+    def search_params(
+        cls,
+        config: VectorDBConfig,
+        selector: Optional[faiss.IDSelector] = None,
+        **kwargs
+    ) -> Optional[faiss.SearchParameters]:
+        """
+        Search parameters for an index type (``nprobe``, ``ef_search``),
+        restricted to the ids accepted by ``selector`` if given.
+        """
+        return cls._builder(config).search_params(config, selector=selector, **kwargs)
+
+    @classmethod
+    def min_training_points(cls, config: VectorDBConfig) -> int:
+        """Vectors needed before an index of this type is trained."""
+        return cls._builder(config).min_training_points(config)
+
+    @classmethod
+    def create_staging_index(cls, config: VectorDBConfig) -> faiss.Index:
+        """Exact index holding vectors until the main index can be trained."""
+        return faiss.IndexIDMap2(FlatIndex().build_index(config))
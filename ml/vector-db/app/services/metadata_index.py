@@ -0,0 +1,178 @@
+import json
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# Filter operators; a bare value (or list of values) means $eq ($in)
+FILTER_OPERATORS = ("$eq", "$ne", "$in", "$nin")
+
+
+def _values(value: Any) -> Iterator[Hashable]:
+    """Indexable values of a metadata field; lists index every element."""
+    items = value if isinstance(value, (list, tuple)) else [value]
+    for item in items:
+        if isinstance(item, (str, int, float, bool)) or item is None:
+            yield item
+
+
+class MetadataIndex:
+    """
+    Per-field bitmap indexes over document metadata.
+
+    For every (field, value) pair a packed bitmap marks the index positions
+    whose metadata has that value; list-valued fields set a bit for every
+    element. Filters are evaluated with bitwise operations, and the
+    resulting bitmap is in the layout expected by ``faiss.IDSelectorBitmap``
+    (bit ``i % 8`` of byte ``i // 8``).
+    """
+
+    def __init__(self):
+        self.size: int = 0
+        self._bitmaps: Dict[str, Dict[Hashable, bytearray]] = {}
+
+    def clear(self) -> None:
+        """Drop all bitmaps."""
+        self.size = 0
+        self._bitmaps = {}
+
+    def add(self, position: int, metadata: Optional[Dict[str, Any]]) -> None:
+        """
+        Index the metadata of a document.
+
+        Args:
+            position: Index position of the document
+            metadata: Document metadata
+        """
+        self.size = max(self.size, position + 1)
+        byte, bit = divmod(position, 8)
+
+        for field, value in (metadata or {}).items():
+            field_bitmaps = self._bitmaps.setdefault(field, {})
+            for item in _values(value):
+                bitmap = field_bitmaps.setdefault(item, bytearray())
+                if len(bitmap) <= byte:
+                    bitmap.extend(bytes(byte + 1 - len(bitmap)))
+                bitmap[byte] |= 1 << bit
+
+    def _nbytes(self) -> int:
+        return (self.size + 7) // 8
+
+    def _all(self) -> np.ndarray:
+        """Bitmap with every position set."""
+        return np.packbits(np.ones(self.size, dtype=bool), bitorder="little")
+
+    def _lookup(self, field: str, value: Any) -> np.ndarray:
+        """Bitmap of positions where ``field`` has ``value``."""
+        result = np.zeros(self._nbytes(), dtype=np.uint8)
+        field_bitmaps = self._bitmaps.get(field, {})
+        for item in _values(value):
+            bitmap = field_bitmaps.get(item)
+            if bitmap is not None:
+                result[: len(bitmap)] |= np.frombuffer(bitmap, dtype=np.uint8)
+        return result
+
+    def _condition(self, field: str, condition: Any) -> np.ndarray:
+        if not isinstance(condition, dict):
+            return self._lookup(field, condition)
+
+        result = self._all()
+        for operator, operand in condition.items():
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(
+                    f"Unsupported filter operator '{operator}' for field '{field}'"
+                )
+            if operator in ("$in", "$nin") and not isinstance(operand, list):
+                raise ValueError(f"Filter operator '{operator}' expects a list")
+
+            matches = self._lookup(field, operand)
+            if operator in ("$ne", "$nin"):
+                matches = ~matches
+            result &= matches
+        return result
+
+    def bitmap(self, metadata_filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Evaluate a filter into a packed bitmap of matching positions.
+
+        Conditions on different fields are combined with AND. A condition
+        is a value (``{"Difficulty Level": "Beginner"}``), a list of values
+        matching any of them, or an operator dict with ``$eq``, ``$ne``,
+        ``$in`` or ``$nin``.
+
+        Args:
+            metadata_filter: Mapping of metadata field to condition
+
+        Returns:
+            uint8 bitmap of ``ceil(size / 8)`` bytes
+        """
+        if not isinstance(metadata_filter, dict):
+            raise ValueError("Filter must be an object mapping fields to conditions")
+
+        result = self._all()
+        for field, condition in metadata_filter.items():
+            result &= self._condition(field, condition)
+        return result
+
+    def mask(self, metadata_filter: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a filter into a boolean mask over positions."""
+        bits = np.unpackbits(self.bitmap(metadata_filter), bitorder="little")
+        return bits[: self.size].astype(bool)
+
+    def compact(self, keep: np.ndarray) -> "MetadataIndex":
+        """
+        Copy of the index without the dropped positions.
+
+        Args:
+            keep: Boolean mask over positions; kept positions are renumbered
+                in order
+        """
+        keep = np.asarray(keep, dtype=bool)[: self.size]
+        index = MetadataIndex()
+        index.size = int(np.count_nonzero(keep))
+
+        for field, field_bitmaps in self._bitmaps.items():
+            for value, bitmap in field_bitmaps.items():
+                bits = np.unpackbits(
+                    np.frombuffer(bitmap, dtype=np.uint8),
+                    count=self.size,
+                    bitorder="little",
+                )
+                kept = np.packbits(bits[: len(keep)][keep].astype(bool), bitorder="little")
+                if kept.any():
+                    index._bitmaps.setdefault(field, {})[value] = bytearray(kept.tobytes())
+        return index
+
+    def to_arrays(self) -> Tuple[List[bytes], np.ndarray]:
+        """
+        Flatten the bitmaps for persistence.
+
+        Returns:
+            Tuple containing:
+            - JSON-encoded ``[field, value]`` key per bitmap
+            - uint8 matrix with one padded bitmap per row
+        """
+        keys: List[bytes] = []
+        rows = np.zeros(
+            (sum(len(values) for values in self._bitmaps.values()), self._nbytes()),
+            dtype=np.uint8,
+        )
+
+        for field, field_bitmaps in self._bitmaps.items():
+            for value, bitmap in field_bitmaps.items():
+                rows[len(keys), : len(bitmap)] = np.frombuffer(bitmap, dtype=np.uint8)
+                keys.append(json.dumps([field, value], ensure_ascii=False).encode("utf-8"))
+
+        return keys, rows
+
+    @classmethod
+    def from_arrays(
+        cls, keys: List[str], rows: np.ndarray, size: int
+    ) -> "MetadataIndex":
+        """Rebuild an index from the output of ``to_arrays``."""
+        index = cls()
+        index.size = size
+        for key, row in zip(keys, rows):
+            field, value = json.loads(key)
+            index._bitmaps.setdefault(field, {})[value] = bytearray(row.tobytes())
+        return index
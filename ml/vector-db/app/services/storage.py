@@ -0,0 +1,471 @@
+import os
+import sys
+import json
+import bisect
+import shutil
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
+
+import numpy as np
+
+from .document import Document
+from .metadata_index import MetadataIndex
+
+
+STORE_SUFFIX = ".store"
+STORE_VERSION = 1
+
+
+def store_path(path: str) -> str:
+    """Directory holding the columnar store for an index path."""
+    return f"{path}{STORE_SUFFIX}"
+
+
+def store_exists(path: str) -> bool:
+    """Check whether a columnar store was saved for an index path."""
+    return os.path.exists(os.path.join(store_path(path), "manifest.json"))
+
+
+def _write_blobs(directory: str, name: str, values: List[bytes]) -> None:
+    """Write values as one byte blob plus int64 offsets (n + 1 entries)."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    if values:
+        offsets[1:] = np.cumsum([len(value) for value in values])
+
+    np.save(os.path.join(directory, f"{name}.off.npy"), offsets)
+    np.save(
+        os.path.join(directory, f"{name}.bin.npy"),
+        np.frombuffer(b"".join(values), dtype=np.uint8),
+    )
+
+
+class MappedBlobs:
+    """Read-only sequence of byte strings stored as offsets plus a blob."""
+
+    def __init__(self, directory: str, name: str):
+        self._offsets = np.load(
+            os.path.join(directory, f"{name}.off.npy"), mmap_mode="r"
+        )
+        self._data = np.load(os.path.join(directory, f"{name}.bin.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position: int) -> bytes:
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._data[start:end].tobytes()
+
+    def decode_all(self) -> List[str]:
+        """Decode every entry as UTF-8."""
+        blob = self._data.tobytes()
+        offsets = self._offsets.tolist()
+        return [
+            blob[offsets[i] : offsets[i + 1]].decode("utf-8")
+            for i in range(len(offsets) - 1)
+        ]
+
+
+def write_store(
+    path: str,
+    ids: List[str],
+    documents: List[Document],
+    vectors: Optional[np.ndarray] = None,
+    manifest: Optional[Dict[str, Any]] = None,
+    arrays: Optional[Dict[str, np.ndarray]] = None,
+    blobs: Optional[Dict[str, List[bytes]]] = None,
+) -> None:
+    """
+    Write documents in columnar form next to an index.
+
+    Row i of every column belongs to index position i. The store is
+    written to a temporary directory and swapped in, so readers that
+    still map the previous files keep a consistent view.
+
+    Args:
+        path: Index path; files go to ``{path}.store``
+        ids: Document id per position
+        documents: Document per position
+        vectors: Vector per position, None to skip the vector column
+        manifest: Extra manifest entries (index config)
+        arrays: Extra numpy columns to store
+        blobs: Extra byte-string columns to store
+    """
+    target = store_path(path)
+    tmp_dir = f"{target}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    _write_blobs(tmp_dir, "ids", [str(doc_id).encode("utf-8") for doc_id in ids])
+    _write_blobs(
+        tmp_dir, "content", [(doc.content or "").encode("utf-8") for doc in documents]
+    )
+    _write_blobs(
+        tmp_dir,
+        "metadata",
+        [json.dumps(doc.metadata, ensure_ascii=False).encode("utf-8") for doc in documents],
+    )
+
+    dimension = 0
+    if vectors is not None:
+        dimension = vectors.shape[1]
+        np.save(os.path.join(tmp_dir, "vectors.npy"), vectors.astype(np.float32))
+
+    for name, values in (arrays or {}).items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+    for name, values in (blobs or {}).items():
+        _write_blobs(tmp_dir, name, values)
+
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(
+            {
+                "version": STORE_VERSION,
+                "count": len(ids),
+                "dimension": dimension,
+                **(manifest or {}),
+            },
+            f,
+        )
+
+    old_dir = f"{target}.old"
+    if os.path.exists(target):
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        os.rename(target, old_dir)
+    os.rename(tmp_dir, target)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+
+class MappedDocumentStore:
+    """Read-only documents backed by memory-mapped columnar files."""
+
+    def __init__(self, path: str):
+        """
+        Open a store written by ``write_store``.
+
+        Args:
+            path: Index path the store was written for
+        """
+        self.directory = store_path(path)
+
+        with open(os.path.join(self.directory, "manifest.json")) as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+
+        if self.manifest["version"] != STORE_VERSION:
+            raise ValueError(
+                f"Unsupported store version: {self.manifest['version']}"
+            )
+
+        self.count: int = self.manifest["count"]
+        self.dimension: int = self.manifest["dimension"]
+
+        self.ids: List[str] = MappedBlobs(self.directory, "ids").decode_all()
+        self.positions: Dict[str, int] = {
+            doc_id: position for position, doc_id in enumerate(self.ids)
+        }
+
+        self._contents = MappedBlobs(self.directory, "content")
+        self._metadata = MappedBlobs(self.directory, "metadata")
+        self.vectors: Optional[np.ndarray] = (
+            self.array("vectors") if self.dimension else None
+        )
+
+    def array(self, name: str) -> np.ndarray:
+        """Memory-map an extra numpy column."""
+        return np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+    def blobs(self, name: str) -> MappedBlobs:
+        """Open an extra byte-string column."""
+        return MappedBlobs(self.directory, name)
+
+    def content(self, position: int) -> str:
+        return self._contents[position].decode("utf-8")
+
+    def metadata(self, position: int) -> Optional[Dict[str, Any]]:
+        return json.loads(self._metadata[position])
+
+    def document(self, position: int) -> Document:
+        """Materialize the document stored at a position."""
+        return Document(
+            id=self.ids[position],
+            content=self.content(position),
+            metadata=self.metadata(position),
+        )
+
+
+class ArrayColumn:
+    """Append-only numpy column that doubles its capacity as it grows."""
+
+    def __init__(self, dtype: Any, values: Optional[np.ndarray] = None):
+        values = np.asarray(values if values is not None else [], dtype=dtype)
+        # Copied so that read-only memory-mapped values can be extended
+        self._data = values.copy()
+        self._size = len(values)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        """Writable view of the filled rows."""
+        return self._data[: self._size]
+
+    def extend(self, values: Any) -> None:
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.empty(
+                (max(end, 2 * len(self._data), 16),) + self._data.shape[1:],
+                dtype=self._data.dtype,
+            )
+            grown[: self._size] = self._data[: self._size]
+            self._data = grown
+        self._data[self._size : end] = values
+        self._size = end
+
+
+# Compact metadata: a shared tuple of keys plus a tuple of values
+MetadataRecord = Tuple[Tuple[str, ...], Tuple[Any, ...]]
+
+
+class DocumentStore(Mapping):
+    """
+    Documents addressed by position and stored column by column.
+
+    Rows of a memory-mapped base store are decoded on access; documents
+    added later are appended to in-memory content and metadata columns.
+    ``rows`` maps every position to its row, so deleting a document only
+    marks its position dead and ``compact`` renumbers positions without
+    moving any content. Metadata keys and string values are interned, so
+    documents sharing a field or value share one string object. Vectors
+    are not stored here; they live in the FAISS index.
+
+    ``page`` lists documents in id order, which unlike positions survives
+    upserts and compaction, so an id is a stable pagination cursor.
+    """
+
+    def __init__(self, base: Optional[MappedDocumentStore] = None):
+        self.base = base
+        self.base_count: int = base.count if base is not None else 0
+
+        # Document id per position, None once deleted
+        self.ids: List[Optional[str]] = list(base.ids) if base is not None else []
+        self.positions: Dict[str, int] = dict(base.positions) if base is not None else {}
+        self._rows = ArrayColumn(np.int64, np.arange(self.base_count))
+        self._live = ArrayColumn(bool, np.ones(self.base_count, dtype=bool))
+
+        # Appended rows, starting at ``base_count``
+        self._contents: List[Optional[str]] = []
+        self._metadata: List[Optional[MetadataRecord]] = []
+        self._schemas: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        # Ids in sorted order, built on the first ``page`` call
+        self._sorted_ids: Optional[List[str]] = None
+
+    @property
+    def size(self) -> int:
+        """Number of positions, including deleted ones."""
+        return len(self.ids)
+
+    @property
+    def dead(self) -> int:
+        """Number of deleted positions not yet compacted."""
+        return len(self.ids) - len(self.positions)
+
+    @property
+    def live(self) -> np.ndarray:
+        """Boolean mask of positions holding a document."""
+        return self._live.values
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Row of every position; rows below ``base_count`` are in the base store."""
+        return self._rows.values
+
+    def _pack_metadata(self, metadata: Optional[Dict[str, Any]]) -> Optional[MetadataRecord]:
+        if metadata is None:
+            return None
+        keys = tuple(sys.intern(str(key)) for key in metadata)
+        keys = self._schemas.setdefault(keys, keys)
+        return keys, tuple(_intern_value(value) for value in metadata.values())
+
+    @staticmethod
+    def _unpack_metadata(record: Optional[MetadataRecord]) -> Optional[Dict[str, Any]]:
+        if record is None:
+            return None
+        keys, values = record
+        return {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in zip(keys, values)
+        }
+
+    def extend(self, documents: Iterable[Document]) -> range:
+        """
+        Append documents at new positions; stored ids are deleted first.
+
+        Returns:
+            Positions of the appended documents
+        """
+        start = len(self.ids)
+        row = self.base_count + len(self._contents)
+        for doc in documents:
+            doc_id = str(doc.id)
+            self.delete(doc_id)
+            self.positions[doc_id] = len(self.ids)
+            self.ids.append(doc_id)
+            self._contents.append(doc.content)
+            self._metadata.append(self._pack_metadata(doc.metadata))
+
+        added = len(self.ids) - start
+        self._rows.extend(np.arange(row, row + added))
+        self._live.extend(np.ones(added, dtype=bool))
+
+        if self._sorted_ids is not None:
+            if added * 16 > len(self._sorted_ids):
+                # Cheaper to sort again on the next page than to insert
+                self._sorted_ids = None
+            else:
+                for doc_id in self.ids[start:]:
+                    bisect.insort(self._sorted_ids, doc_id)
+        return range(start, start + added)
+
+    def delete(self, doc_id: str) -> Optional[int]:
+        """
+        Delete a document, leaving its position dead until ``compact``.
+
+        Returns:
+            Position of the deleted document, None if it is not stored
+        """
+        position = self.positions.pop(doc_id, None)
+        if position is None:
+            return None
+
+        self.ids[position] = None
+        self.live[position] = False
+        if self._sorted_ids is not None:
+            del self._sorted_ids[bisect.bisect_left(self._sorted_ids, doc_id)]
+        row = int(self.rows[position]) - self.base_count
+        if row >= 0:
+            self._contents[row] = None
+            self._metadata[row] = None
+        return position
+
+    def compact(self) -> np.ndarray:
+        """
+        Drop dead positions and renumber the remaining ones in order.
+
+        Returns:
+            Mask of the kept positions, for compacting aligned columns
+        """
+        keep = self.live.copy()
+        self._rows = ArrayColumn(np.int64, self.rows[keep])
+        self._live = ArrayColumn(bool, np.ones(int(keep.sum()), dtype=bool))
+        self.ids = [doc_id for doc_id in self.ids if doc_id is not None]
+        self.positions = {doc_id: position for position, doc_id in enumerate(self.ids)}
+        return keep
+
+    def page(
+        self, limit: int, after: Optional[str] = None, offset: int = 0
+    ) -> Tuple[List[Document], Optional[str]]:
+        """
+        A page of documents in id order.
+
+        Args:
+            limit: Maximum number of documents
+            after: Start after this id (keyset cursor); it need not be stored
+            offset: Documents to skip, used when ``after`` is not given
+
+        Returns:
+            Tuple containing:
+            - Documents of the page
+            - Cursor for the next page, None on the last page
+        """
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self.positions)
+        ids = self._sorted_ids
+
+        start = bisect.bisect_right(ids, after) if after is not None else offset
+        page_ids = ids[start : start + limit]
+        next_cursor = page_ids[-1] if page_ids and start + limit < len(ids) else None
+        return [self[doc_id] for doc_id in page_ids], next_cursor
+
+    def content(self, position: int) -> str:
+        row = int(self.rows[position])
+        if row < self.base_count:
+            return self.base.content(row)
+        return self._contents[row - self.base_count]
+
+    def metadata(self, position: int) -> Optional[Dict[str, Any]]:
+        row = int(self.rows[position])
+        if row < self.base_count:
+            return self.base.metadata(row)
+        return self._unpack_metadata(self._metadata[row - self.base_count])
+
+    def document(self, position: int) -> Document:
+        """Materialize the document at a live position, without its vector."""
+        return Document(
+            id=self.ids[position],
+            content=self.content(position),
+            metadata=self.metadata(position),
+        )
+
+    def __getitem__(self, doc_id: str) -> Document:
+        return self.document(self.positions[doc_id])
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self.positions
+
+    def __iter__(self) -> Iterator[str]:
+        return (doc_id for doc_id in self.ids if doc_id is not None)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+def _intern_value(value: Any) -> Any:
+    """Intern strings, and lists of them as tuples."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(_intern_value(item) for item in value)
+    return value
+
+
+def legacy_document_store(
+    documents: Mapping[str, Document], index_to_id: Dict[int, str], count: int
+) -> DocumentStore:
+    """Document store for the position maps of a legacy pickle."""
+    store = DocumentStore()
+    for position in range(count):
+        doc_id = index_to_id.get(position)
+        if doc_id is not None and doc_id in documents:
+            store.extend([documents[doc_id]])
+        else:
+            # Keep later documents at their positions
+            store.extend([Document(id=f"__missing_{position}", content="")])
+            store.delete(f"__missing_{position}")
+    return store
+
+
+def build_metadata_index(store: DocumentStore) -> MetadataIndex:
+    """Index the metadata of every live position of a store."""
+    metadata_index = MetadataIndex()
+    for position in np.flatnonzero(store.live).tolist():
+        metadata_index.add(position, store.metadata(position))
+    metadata_index.size = store.size
+    return metadata_index
+
+
+def load_metadata_index(store: MappedDocumentStore) -> MetadataIndex:
+    """Metadata bitmaps saved in a store, rebuilt for stores saved without them."""
+    if "metadata_size" not in store.manifest:
+        metadata_index = MetadataIndex()
+        for position in range(store.count):
+            metadata_index.add(position, store.metadata(position))
+        return metadata_index
+
+    return MetadataIndex.from_arrays(
+        store.blobs("metadata_keys").decode_all(),
+        store.array("metadata_bitmaps"),
+        store.manifest["metadata_size"],
+    )
@@ -1,17 +1,46 @@
 import os
 import pickle
-from typing import List, Tuple, Optional, Dict
+from typing import Any, Iterable, List, Tuple, Optional, Dict, Set
 
 import faiss
 import numpy as np
 
 from .config import VectorDBConfig, DistanceMetric
 from .document import Document
-from .indices import IndexFactory
+from .indices import (
+    IndexFactory,
+    document_faiss_id,
+    document_faiss_ids,
+    enable_reconstruct,
+)
+from .metadata_index import MetadataIndex
+from .metrics import stage
+from .storage import (
+    ArrayColumn,
+    DocumentStore,
+    MappedDocumentStore,
+    build_metadata_index,
+    legacy_document_store,
+    load_metadata_index,
+    store_exists,
+    write_store,
+)
 
 
 class VectorDB:
-    """Vector database implementation using FAISS with document storage."""
+    """
+    Vector database implementation using FAISS with document storage.
+
+    Vectors are stored in FAISS under an int64 id hashed from the document
+    id (``document_faiss_id``), so they can be removed or replaced without
+    renumbering. A new version of a document whose old vector cannot be
+    removed yet (HNSW) is hashed with the next generation instead, so the
+    old id stays excluded from searches until ``compact``. Documents occupy append-only positions in the document
+    store and metadata bitmaps; deleted positions are dropped on save and
+    on ``compact``. Vectors are only kept by FAISS and reconstructed from
+    it when needed, except for quantized indices, which keep the raw
+    vectors to retrain on.
+    """
 
     def __init__(self, config: VectorDBConfig) -> None:
         """
@@ -22,13 +51,27 @@ class VectorDB:
         """
         self.config: VectorDBConfig = config
         self.dimension: int = config.dimension
-        self.index: faiss.Index = IndexFactory.create_index(config)
+        self.index: faiss.Index = IndexFactory.create_id_index(config)
+        # Vectors waiting for the main index to be trained
+        self.staging: faiss.Index = IndexFactory.create_staging_index(config)
+        # Number of vectors the main index was last trained on
+        self._trained_size: int = 0
+        # Removed vectors still held by indices that cannot remove them
+        # (HNSW): their FAISS ids are excluded from searches, and every such
+        # stale vector counts as a tombstone until the next compaction
+        self.excluded_ids: Set[int] = set()
+        self.tombstones: int = 0
 
         # Document storage
-        self.documents: Dict[str, Document] = {}
-        self.id_to_index: Dict[str, int] = {}
-        self.index_to_id: Dict[int, str] = {}
-        self._next_index: int = 0
+        self.documents = DocumentStore()
+        self.metadata_index = MetadataIndex()
+        # FAISS id per position, and FAISS id -> document id
+        self._position_ids = ArrayColumn(np.int64)
+        self.faiss_to_id: Dict[int, str] = {}
+        # Raw vectors by store row for quantized indices: rows of the
+        # loaded store are memory-mapped, later rows appended in memory
+        self._raw_base: Optional[np.ndarray] = None
+        self._raw = ArrayColumn(np.float32, np.zeros((0, self.dimension)))
 
         if config.index_path and os.path.exists(f"{config.index_path}.index"):
             self.load(config.index_path)
@@ -44,6 +87,86 @@ class VectorDB:
         """Check if index requires training."""
         return hasattr(self.index, "is_trained") and not self.index.is_trained
 
+    @property
+    def ntotal(self) -> int:
+        """Number of indexed vectors, staged or not."""
+        return self.index.ntotal + self.staging.ntotal
+
+    def _retrain_due(self) -> bool:
+        factor = self.config.retrain_growth_factor
+        return (
+            factor > 1
+            and self._trained_size > 0
+            and self.index.ntotal >= self._trained_size * factor
+        )
+
+    @property
+    def dead_positions(self) -> int:
+        """Positions of deleted or replaced documents not yet compacted."""
+        return self.documents.dead
+
+    def _vectors(self, positions: np.ndarray) -> np.ndarray:
+        """Normalized vectors of live positions, as they were indexed."""
+        if IndexFactory.exact_vectors(self.config):
+            if not len(positions):
+                return np.zeros((0, self.dimension), dtype=np.float32)
+            source = self.staging if self._requires_training() else self.index
+            return source.reconstruct_batch(self._position_ids.values[positions])
+
+        rows = self.documents.rows[positions]
+        vectors = np.empty((len(rows), self.dimension), dtype=np.float32)
+        in_base = rows < self.documents.base_count
+        if in_base.any():
+            vectors[in_base] = self._raw_base[rows[in_base]]
+        vectors[~in_base] = self._raw.values[rows[~in_base] - self.documents.base_count]
+        return self._normalize_vectors(vectors)
+
+    def _stored_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalized vectors and FAISS ids of the live documents, in position order."""
+        positions = np.flatnonzero(self.documents.live)
+        return self._vectors(positions), self._position_ids.values[positions]
+
+    def get_vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """Vector of a stored document as indexed (normalized for cosine)."""
+        position = self.documents.positions.get(doc_id)
+        if position is None:
+            return None
+        return self._vectors(np.array([position]))[0]
+
+    @staticmethod
+    def _staged(staging: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectors and ids held by a staging index."""
+        vectors = staging.index.reconstruct_n(0, staging.ntotal)
+        return vectors, faiss.vector_to_array(staging.id_map).astype(np.int64)
+
+    def _build_trained(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Replace the main index with one trained on and holding ``vectors``."""
+        index = IndexFactory.create_id_index(self.config)
+        index.train(vectors)
+        index.add_with_ids(vectors, ids)
+
+        self.index = index
+        self.staging.reset()
+        self._trained_size = len(vectors)
+        self.excluded_ids.clear()
+        self.tombstones = 0
+
+    def _rebuild_index(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Rebuild the FAISS indices holding only ``vectors``."""
+        self.index = IndexFactory.create_id_index(self.config)
+        self.staging = IndexFactory.create_staging_index(self.config)
+        self._trained_size = 0
+        self.excluded_ids.clear()
+        self.tombstones = 0
+
+        if not self._requires_training():
+            if len(ids):
+                self.index.add_with_ids(vectors, ids)
+        elif len(ids) >= IndexFactory.min_training_points(self.config):
+            self._build_trained(vectors, ids)
+        elif len(ids):
+            self.staging.add_with_ids(vectors, ids)
+
     def train(self, vectors: np.ndarray) -> None:
         """
         Train the index with vectors.
@@ -55,15 +178,28 @@ class VectorDB:
             normalized_vectors = self._normalize_vectors(vectors)
             self.index.train(normalized_vectors)
 
+            # Move staged vectors over with their ids
+            if self.staging.ntotal:
+                self.index.add_with_ids(*self._staged(self.staging))
+                self.staging.reset()
+            self._trained_size = max(self.index.ntotal, len(vectors))
+
     def add_documents(self, documents: List[Document]) -> None:
         """
         Add documents to the database.
 
+        Documents whose id is already stored replace the old version
+        (upsert). Indices that need training buffer vectors in a flat
+        staging index, searched exactly, until
+        ``IndexFactory.min_training_points`` are available. They are then
+        trained on and moved into the main index in bulk, and the index is
+        retrained from the stored vectors every time the corpus grows by
+        ``config.retrain_growth_factor``.
+
         Args:
             documents (List[Document]): Documents to add
         """
-        vectors: List[np.ndarray] = []
-
+        latest: Dict[str, Document] = {}
         for doc in documents:
             if doc.vector is None:
                 raise ValueError(f"Document {doc.id} doesn't have a vector")
@@ -74,26 +210,137 @@ class VectorDB:
                     f"expected dimension {self.dimension}"
                 )
 
-            vectors.append(doc.vector)
+            doc_id = str(doc.id)
+            # The last version of an id within the batch wins
+            latest.pop(doc_id, None)
+            latest[doc_id] = doc
 
-            # Store document
-            self.documents[str(doc.id)] = doc
-            self.id_to_index[doc.id] = self._next_index
-            self.index_to_id[self._next_index] = doc.id
-            self._next_index += 1
+        if not latest:
+            return
 
-        vectors_array = np.array(vectors).astype("float32")
+        self.delete_documents([doc_id for doc_id in latest if doc_id in self.documents])
 
-        # Train if necessary
-        if self._requires_training():
-            self.train(vectors_array)
+        ids = self._new_faiss_ids(latest)
+        positions = self.documents.extend(latest.values())
+        for position, doc in zip(positions, latest.values()):
+            self.metadata_index.add(position, doc.metadata)
+
+        self._position_ids.extend(ids)
+        self.faiss_to_id.update(zip(ids.tolist(), latest))
 
-        # Add vectors to index
+        vectors_array = np.array([doc.vector for doc in latest.values()]).astype("float32")
         normalized_vectors = self._normalize_vectors(vectors_array)
-        self.index.add(normalized_vectors)
+        if not IndexFactory.exact_vectors(self.config):
+            self._raw.extend(normalized_vectors)
+
+        if not self._requires_training():
+            self.index.add_with_ids(normalized_vectors, ids)
+            if self._retrain_due():
+                self._build_trained(*self._stored_vectors())
+            return
+
+        # Stage vectors until there are enough to train on
+        self.staging.add_with_ids(normalized_vectors, ids)
+        if self.staging.ntotal >= IndexFactory.min_training_points(self.config):
+            self._build_trained(*self._staged(self.staging))
+
+    def _new_faiss_ids(self, doc_ids: Iterable[str]) -> np.ndarray:
+        """
+        Unused FAISS ids for new document versions.
+
+        A document gets ``document_faiss_id(doc_id)`` unless that id is
+        still held, by the stale vector of a replaced or deleted version
+        awaiting compaction or by another document's hash; then the next
+        free generation is used.
+        """
+        ids: List[int] = []
+        taken: Set[int] = set()
+        for doc_id in doc_ids:
+            generation = 0
+            faiss_id = document_faiss_id(doc_id)
+            while faiss_id in self.faiss_to_id or faiss_id in self.excluded_ids or faiss_id in taken:
+                generation += 1
+                faiss_id = document_faiss_id(doc_id, generation)
+            taken.add(faiss_id)
+            ids.append(faiss_id)
+        return np.array(ids, dtype=np.int64)
+
+    def delete_documents(self, doc_ids: Iterable[str]) -> List[str]:
+        """
+        Delete documents and remove their vectors.
+
+        Indices that cannot remove vectors (HNSW) keep them as tombstones:
+        their ids are excluded from searches until ``compact`` rebuilds
+        the index.
+
+        Args:
+            doc_ids: Ids of the documents to delete
+
+        Returns:
+            Ids that were found and deleted
+        """
+        deleted: List[str] = []
+        removed_ids: List[int] = []
+        for doc_id in dict.fromkeys(str(doc_id) for doc_id in doc_ids):
+            position = self.documents.delete(doc_id)
+            if position is None:
+                continue
+            faiss_id = int(self._position_ids.values[position])
+            del self.faiss_to_id[faiss_id]
+            deleted.append(doc_id)
+            removed_ids.append(faiss_id)
+
+        if deleted:
+            self._remove_vectors(np.array(removed_ids, dtype=np.int64))
+        return deleted
+
+    def _remove_vectors(self, ids: np.ndarray) -> None:
+        # IVF direct maps only remove through an IDSelectorArray
+        selector = faiss.IDSelectorArray(len(ids), faiss.swig_ptr(ids))
+        if self.staging.ntotal:
+            self.staging.remove_ids(selector)
+        if not self.index.ntotal:
+            return
+
+        if IndexFactory.supports_removal(self.config):
+            self.index.remove_ids(selector)
+        else:
+            self.excluded_ids.update(ids.tolist())
+            self.tombstones += len(ids)
+
+    def compaction_due(self, threshold: float) -> bool:
+        """
+        Whether tombstones and dead positions exceed a share of the documents.
+
+        Args:
+            threshold: Maximum share of garbage, relative to live documents
+        """
+        garbage = self.tombstones + self.dead_positions
+        return garbage > 0 and garbage > threshold * max(len(self.documents), 1)
+
+    def compact(self) -> None:
+        """
+        Drop deleted positions and rebuild indices holding stale vectors.
+
+        FAISS ids do not depend on positions, so renumbering positions
+        leaves the FAISS index untouched unless it holds tombstones.
+        """
+        if self.tombstones:
+            self._rebuild_index(*self._stored_vectors())
+
+        if not self.dead_positions:
+            return
+
+        keep = self.documents.compact()
+        self.metadata_index = self.metadata_index.compact(keep)
+        self._position_ids = ArrayColumn(np.int64, self._position_ids.values[keep])
 
     def search(
-        self, query_vector: np.ndarray, k: int = 5, **kwargs
+        self,
+        query_vector: np.ndarray,
+        k: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        **kwargs
     ) -> Tuple[np.ndarray, List[Document]]:
         """
         Search for similar vectors.
@@ -101,6 +348,8 @@ class VectorDB:
         Args:
             query_vector (np.ndarray): Query vector of shape (dimension,)
             k (int): Number of nearest neighbors to return
+            metadata_filter (Optional[Dict[str, Any]]): Restrict results to
+                documents matching this filter (see ``MetadataIndex.bitmap``)
             **kwargs: Additional search parameters
 
         Returns:
@@ -108,25 +357,102 @@ class VectorDB:
             - Distances to nearest neighbors
             - Documents of nearest neighbors
         """
-        if query_vector.ndim == 1:
-            query_vector = query_vector.reshape(1, -1)
+        distances, documents = self.search_batch(
+            query_vector, k=k, metadata_filter=metadata_filter, **kwargs
+        )
+        return distances[0], documents[0]
+
+    def search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 5,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Tuple[List[np.ndarray], List[List[Document]]]:
+        """
+        Search for similar vectors for many queries in one FAISS call.
 
-        if hasattr(self.index, "nprobe"):
-            nprobe = kwargs.get("nprobe", self.config.nprobe)
-            self.index.nprobe = nprobe
+        A metadata filter is evaluated against the bitmap indexes and the
+        FAISS ids of the matching documents are passed to FAISS as an
+        ``IDSelectorBatch``, so non-matching documents are skipped during
+        the search rather than discarded afterwards. Tombstoned vectors are
+        excluded the same way.
 
-        normalized_query = self._normalize_vectors(query_vector)
-        distances, indices = self.index.search(normalized_query, k)
+        Args:
+            query_vectors (np.ndarray): Query vectors of shape (n, dimension)
+            k (int): Number of nearest neighbors to return per query
+            metadata_filter (Optional[Dict[str, Any]]): Restrict results to
+                documents matching this filter
+            **kwargs: Search-time parameters of the index type
+                (``nprobe`` for IVF indices, ``ef_search`` for HNSW)
 
-        documents = []
-        for idx in indices[0]:
-            if idx != -1 and idx in self.index_to_id:
-                doc_id = self.index_to_id[idx]
-                documents.append(self.documents[doc_id])
+        Returns:
+            Tuple containing:
+            - Per-query distances, at most k each
+            - Per-query lists of nearest neighbor documents; a query gets
+              fewer than k when fewer documents match
+        """
+        if query_vectors.ndim == 1:
+            query_vectors = query_vectors.reshape(1, -1)
+
+        normalized_query = self._normalize_vectors(query_vectors)
+
+        # Selectors and the id arrays they point to must outlive the search
+        selector = None
+        if metadata_filter:
+            mask = self.metadata_index.mask(metadata_filter)
+            live = self.documents.live[: len(mask)]
+            allowed = self._position_ids.values[: len(mask)][mask & live]
+            selector = faiss.IDSelectorBatch(len(allowed), faiss.swig_ptr(allowed))
+        elif self.excluded_ids:
+            excluded = np.fromiter(self.excluded_ids, dtype=np.int64)
+            excluded_selector = faiss.IDSelectorBatch(
+                len(excluded), faiss.swig_ptr(excluded)
+            )
+            selector = faiss.IDSelectorNot(excluded_selector)
+
+        kind = self.config.index_type.name
+        with stage("index_search", kind):
+            if self.staging.ntotal or self._requires_training():
+                # Untrained: the staged vectors are the whole corpus, search exactly
+                params = faiss.SearchParameters(sel=selector) if selector else None
+                distances, labels = self.staging.search(normalized_query, k, params=params)
             else:
-                documents.append(Document(id=None, content="empty doc", metadata={}))
+                # Per-call parameters instead of mutating the shared index, so
+                # concurrent searches with different nprobe/ef_search do not interfere
+                params = IndexFactory.search_params(self.config, selector=selector, **kwargs)
+                distances, labels = self.index.search(normalized_query, k, params=params)
+
+        with stage("materialize", kind):
+            return self._materialize(distances, labels)
 
-        return distances[0], documents
+    def _materialize(
+        self, distances: np.ndarray, labels: np.ndarray
+    ) -> Tuple[List[np.ndarray], List[List[Document]]]:
+        """
+        Documents of FAISS results, dropping duplicates and padding rows.
+
+        FAISS pads a row with label -1 when fewer than k vectors pass the
+        selector; those entries are left out, so rows can be shorter than k.
+        """
+        all_distances: List[np.ndarray] = []
+        documents: List[List[Document]] = []
+        for row_distances, row in zip(distances, labels):
+            kept = []
+            row_documents = []
+            seen: Set[str] = set()
+            for i, label in enumerate(row.tolist()):
+                doc_id = self.faiss_to_id.get(label)
+                if doc_id is None or doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                kept.append(i)
+                row_documents.append(self.documents[doc_id])
+
+            all_distances.append(row_distances[kept])
+            documents.append(row_documents)
+
+        return all_distances, documents
 
     def get_document(self, doc_id: str) -> Optional[Document]:
         """Get document by ID."""
@@ -136,35 +462,127 @@ class VectorDB:
         """
         Save the index and documents to disk.
 
+        Documents are written in columnar form to ``{path}.store`` so
+        that ``load`` can memory-map them instead of unpickling. Deleted
+        positions are left out; FAISS ids do not depend on positions and
+        are saved per document.
+
         Args:
             path (str): Path to save the database
         """
         faiss.write_index(self.index, f"{path}.index")
 
-        data = {
-            "documents": self.documents,
-            "id_to_index": self.id_to_index,
-            "index_to_id": self.index_to_id,
-            "next_index": self._next_index,
-            "config": self.config,
-        }
-
-        with open(f"{path}.data", "wb") as f:
-            pickle.dump(data, f)
+        positions = np.flatnonzero(self.documents.live)
+        metadata_index = (
+            self.metadata_index.compact(self.documents.live)
+            if self.dead_positions
+            else self.metadata_index
+        )
+        metadata_keys, metadata_bitmaps = metadata_index.to_arrays()
+        write_store(
+            path,
+            [self.documents.ids[p] for p in positions.tolist()],
+            [self.documents.document(p) for p in positions.tolist()],
+            vectors=self._vectors(positions),
+            manifest={
+                "kind": "vector",
+                "config": self.config.to_dict(),
+                "trained_size": self._trained_size,
+                "metadata_size": metadata_index.size,
+                "id_scheme": "versioned_hash",
+                "tombstones": self.tombstones,
+            },
+            arrays={
+                "metadata_bitmaps": metadata_bitmaps,
+                "excluded_ids": np.fromiter(self.excluded_ids, dtype=np.int64),
+                "faiss_ids": self._position_ids.values[positions],
+            },
+            blobs={"metadata_keys": metadata_keys},
+        )
 
     def load(self, path: str) -> None:
         """
         Load the index and documents from disk.
 
+        Falls back to the legacy ``{path}.data`` pickle when no columnar
+        store exists; the next ``save`` migrates it.
+
         Args:
             path (str): Path to load the database from
         """
-        self.index = faiss.read_index(f"{path}.index")
+        self.index = enable_reconstruct(faiss.read_index(f"{path}.index"))
+
+        if not store_exists(path):
+            self._load_legacy(path)
+            return
+
+        store = MappedDocumentStore(path)
+        self.documents = DocumentStore(store)
+        self._trained_size = store.manifest.get("trained_size", self.index.ntotal)
+        self.metadata_index = load_metadata_index(store)
+        id_scheme = store.manifest.get("id_scheme")
+        self._load_id_map(store.array("faiss_ids") if id_scheme == "versioned_hash" else None)
+        self._raw_base = store.vectors
+
+        if id_scheme not in ("hash", "versioned_hash"):
+            # Saved with positions as FAISS ids, re-add under hashed ids
+            self._rebuild_index(
+                self._normalize_vectors(np.asarray(store.vectors)),
+                self._position_ids.values,
+            )
+            return
+
+        self.tombstones = store.manifest["tombstones"]
+        self.excluded_ids = set(store.array("excluded_ids").tolist())
+
+        self.staging = IndexFactory.create_staging_index(self.config)
+        if self._requires_training() and store.count:
+            # Staged vectors are not written to the FAISS file, restage them
+            self.staging.add_with_ids(
+                self._normalize_vectors(np.asarray(store.vectors)),
+                self._position_ids.values,
+            )
+
+    def _load_id_map(self, position_ids: Optional[np.ndarray] = None) -> None:
+        """
+        Map positions to FAISS ids and back.
+
+        Args:
+            position_ids: Saved FAISS id per position; derived from the
+                document ids (generation 0) for stores saved without them
+        """
+        ids = self.documents.ids
+        if position_ids is None:
+            position_ids = document_faiss_ids(
+                doc_id if doc_id is not None else "" for doc_id in ids
+            )
+        self._position_ids = ArrayColumn(np.int64, position_ids)
+        self.faiss_to_id = {
+            faiss_id: doc_id
+            for faiss_id, doc_id in zip(self._position_ids.values.tolist(), ids)
+            if doc_id is not None
+        }
 
+    def _load_legacy(self, path: str) -> None:
+        """Load documents from the legacy pickle format."""
         with open(f"{path}.data", "rb") as f:
             data = pickle.load(f)
 
-        self.documents = data["documents"]
-        self.id_to_index = data["id_to_index"]
-        self.index_to_id = data["index_to_id"]
-        self._next_index = data["next_index"]
+        documents = data["documents"]
+        self.documents = legacy_document_store(
+            documents, data["index_to_id"], data["next_index"]
+        )
+        self.metadata_index = build_metadata_index(self.documents)
+        self._load_id_map()
+
+        # Vectors were pickled with the documents; dead positions get zeros
+        vectors = np.zeros((self.documents.size, self.dimension), dtype=np.float32)
+        for position, doc_id in enumerate(self.documents.ids):
+            if doc_id is not None:
+                vectors[position] = documents[doc_id].vector
+        vectors = self._normalize_vectors(vectors)
+        if not IndexFactory.exact_vectors(self.config):
+            self._raw.extend(vectors)
+
+        live = self.documents.live
+        self._rebuild_index(vectors[live], self._position_ids.values[live])
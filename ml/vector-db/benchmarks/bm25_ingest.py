@@ -0,0 +1,56 @@
+"""
+Measure BM25Index ingest cost when loading programs batch by batch.
+
+Run from ml/vector-db:
+
+    python -m benchmarks.bm25_ingest
+"""
+import time
+import argparse
+from typing import List
+
+from app.services.bm25_index import BM25Index
+from app.services.document import Document
+
+from .programs import load_program_documents
+
+
+def ingest(documents: List[Document], batch_size: int, full_refit: bool) -> float:
+    """Load documents in batches and return elapsed seconds."""
+    index = BM25Index()
+
+    start = time.perf_counter()
+    for i in range(0, len(documents), batch_size):
+        index.add_documents(documents[i : i + batch_size])
+        if full_refit:
+            # Previous behaviour: refit the whole corpus on every insert
+            index.bm25.fit(
+                [index.documents.content(p) for p in range(index.documents.size)]
+            )
+    # First query after ingest pays for the deferred IDF
+    index.search("strength training", k=5)
+
+    return time.perf_counter() - start
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BM25 ingest benchmark")
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[1, 10, 100],
+        help="Batch sizes to measure (default: 1 10 100)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    documents = load_program_documents()
+
+    print(f"{'batch':>6} {'refit (s)':>10} {'incremental (s)':>16} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        refit = ingest(documents, batch_size, full_refit=True)
+        incremental = ingest(documents, batch_size, full_refit=False)
+        print(
+            f"{batch_size:>6} {refit:>10.3f} {incremental:>16.3f} "
+            f"{refit / incremental:>7.1f}x"
+        )
@@ -0,0 +1,135 @@
+"""
+Measure Python-heap memory per stored document.
+
+Compares the former layout (a dict of ``Document`` dataclasses, each with
+its own vector copy and metadata dict, plus two id/position dicts) with
+the columnar ``DocumentStore`` used by ``VectorDB`` today. Programs from
+``backend/data/200_sport_programs.json`` are repeated under new ids with
+synthetic vectors. FAISS memory is allocated outside the Python heap and
+is the same for both layouts; it is reported separately. Run from
+ml/vector-db:
+
+    python -m benchmarks.document_memory
+    python -m benchmarks.document_memory --num-documents 100000 --dimension 1024
+"""
+import gc
+import sys
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.config import VectorDBConfig, DistanceMetric, IndexType
+from app.services.document import Document
+from app.services.vector_db import VectorDB
+
+from .programs import load_program_documents
+
+
+@dataclass
+class LegacyDocument:
+    """Document as it was stored before: no slots, own vector and metadata."""
+
+    id: str
+    content: str
+    vector: Optional[np.ndarray] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+def make_documents(programs: List[Document], vectors: np.ndarray) -> List[Document]:
+    """Programs repeated under new ids, one per vector."""
+    documents = []
+    for i in range(len(vectors)):
+        program = programs[i % len(programs)]
+        # Fresh strings and dicts, as if each document came from a request
+        documents.append(
+            Document(
+                id=str(i),
+                content="".join(program.content),
+                vector=vectors[i],
+                metadata={
+                    key: list(value) if isinstance(value, list) else "".join(value)
+                    for key, value in program.metadata.items()
+                },
+            )
+        )
+    return documents
+
+
+def legacy_store(documents: List[Document]) -> Dict[str, Any]:
+    """Build the former document layout."""
+    stored = {}
+    id_to_index = {}
+    index_to_id = {}
+    for position, doc in enumerate(documents):
+        stored[doc.id] = LegacyDocument(
+            id=doc.id,
+            content=doc.content,
+            vector=np.array(doc.vector, dtype=np.float32),
+            metadata=dict(doc.metadata),
+        )
+        id_to_index[doc.id] = position
+        index_to_id[position] = doc.id
+    return {"documents": stored, "id_to_index": id_to_index, "index_to_id": index_to_id}
+
+
+def columnar_store(documents: List[Document], dimension: int) -> VectorDB:
+    """Add documents to a Flat VectorDB, in batches of 100 like the API."""
+    db = VectorDB(
+        VectorDBConfig(
+            dimension=dimension,
+            distance_metric=DistanceMetric.L2,
+            index_type=IndexType.FLAT,
+        )
+    )
+    for i in range(0, len(documents), 100):
+        db.add_documents(documents[i : i + 100])
+    return db
+
+
+def traced_bytes(build: Callable[[], Any]) -> int:
+    """
+    Python-heap bytes still held by what ``build`` returns.
+
+    ``build`` creates its own input documents, so strings that a layout
+    keeps alive are counted and those it drops are not.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Document store memory benchmark")
+    parser.add_argument("--num-documents", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    n = args.num_documents
+    programs = load_program_documents()
+    vectors = np.random.default_rng(0).standard_normal((n, args.dimension))
+    vectors = vectors.astype(np.float32)
+
+    legacy = traced_bytes(lambda: legacy_store(make_documents(programs, vectors))) / n
+    columnar = traced_bytes(
+        lambda: columnar_store(make_documents(programs, vectors), args.dimension)
+    ) / n
+    faiss_bytes = args.dimension * 4
+    content = np.mean([sys.getsizeof(doc.content) for doc in programs])
+
+    print(f"{n} documents, dimension {args.dimension}, bytes per document")
+    print(f"{'layout':>10} {'python heap':>12} {'+ FAISS':>10}")
+    print(f"{'dict':>10} {legacy:>12.0f} {legacy + faiss_bytes:>10.0f}")
+    print(f"{'columnar':>10} {columnar:>12.0f} {columnar + faiss_bytes:>10.0f}")
+    print(f"both layouts hold ~{content:.0f} B/document of content strings")
+    print(f"saved {legacy - columnar:.0f} B/document ({legacy / columnar:.1f}x less heap)")
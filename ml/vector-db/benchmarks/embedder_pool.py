@@ -0,0 +1,71 @@
+"""
+Measure embedding throughput under concurrent requests.
+
+Simulates ``--clients`` concurrent API requests, each embedding one
+program from ``backend/data/200_sport_programs.json`` (like search
+queries and single-document upserts). Compares the in-process
+``HuggingFaceEmbedder``, called from a thread pool as the service does
+by default, with ``EmbedderPool`` at several worker counts. Throughput
+should grow with workers up to the number of CPU cores. Run from
+ml/vector-db:
+
+    python -m benchmarks.embedder_pool
+    python -m benchmarks.embedder_pool --model BAAI/bge-m3 --workers 1 2 4 8
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from app.services.embedder.base import BaseEmbedder
+from app.services.embedder.huggingface import HuggingFaceEmbedder
+from app.services.embedder.pool import EmbedderPool
+
+from .programs import load_program_documents
+
+
+def concurrent_throughput(embedder: BaseEmbedder, texts: List[str], clients: int) -> float:
+    """Texts per second with ``clients`` threads each encoding one text at a time."""
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(embedder.encode, texts[:clients]))  # warm-up
+        start = time.perf_counter()
+        list(executor.map(embedder.encode, texts))
+        return len(texts) / (time.perf_counter() - start)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Embedder worker pool benchmark")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    texts = [doc.content for doc in load_program_documents()]
+
+    embedder = HuggingFaceEmbedder(args.model, device="cpu", max_length=args.max_length)
+    baseline = concurrent_throughput(embedder, texts, args.clients)
+
+    print(f"{len(texts)} texts, {args.clients} concurrent clients, model {args.model}")
+    print(f"{'backend':>16} {'texts/s':>9} {'speedup':>8} {'mean batch':>11}")
+    print(f"{'in-process':>16} {baseline:>9.1f} {1.0:>7.2f}x {1:>11.1f}")
+
+    for workers in args.workers:
+        pool = EmbedderPool(
+            embedder,
+            num_workers=workers,
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+        )
+        try:
+            rate = concurrent_throughput(pool, texts, args.clients)
+            mean_batch = pool.get_stats()["mean_batch_size"]
+        finally:
+            pool.close()
+        name = f"pool x{workers}"
+        print(f"{name:>16} {rate:>9.1f} {rate / baseline:>7.2f}x {mean_batch:>11.1f}")
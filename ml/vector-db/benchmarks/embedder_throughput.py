@@ -0,0 +1,80 @@
+"""
+Compare CPU embedding throughput of the PyTorch and ONNX Runtime backends.
+
+Embeds the programs bundled in ``backend/data/200_sport_programs.json``
+with ``HuggingFaceEmbedder`` (PyTorch, fixed batches) and ``ONNXEmbedder``
+(fp32 and int8, with and without length bucketing), and reports texts per
+second and the lowest cosine similarity to the PyTorch embeddings. The
+model must be available locally or downloadable. Run from ml/vector-db:
+
+    python -m benchmarks.embedder_throughput
+    python -m benchmarks.embedder_throughput --model BAAI/bge-m3 --repeat 3
+"""
+import time
+import argparse
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.embedder.base import BaseEmbedder
+from app.services.embedder.huggingface import HuggingFaceEmbedder
+from app.services.embedder.onnx import ONNXEmbedder
+
+from .programs import load_program_documents
+
+
+def throughput(
+    embedder: BaseEmbedder, texts: List[str], batch_size: int, repeat: int
+) -> Tuple[float, np.ndarray]:
+    """Best texts per second over ``repeat`` runs, with the embeddings."""
+    embedder.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        embeddings = embedder.encode(texts, batch_size=batch_size)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best, embeddings
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Embedder throughput benchmark")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument(
+        "--cache-dir", default=None, help="Where to export ONNX models (default: temp dir)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    texts = [doc.content for doc in load_program_documents()]
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="onnx-")
+
+    torch_embedder = HuggingFaceEmbedder(
+        args.model, device="cpu", max_length=args.max_length
+    )
+    baseline, reference = throughput(torch_embedder, texts, args.batch_size, args.repeat)
+
+    print(f"{len(texts)} texts, model {args.model}, batch size {args.batch_size}")
+    print(f"{'backend':>24} {'texts/s':>9} {'speedup':>8} {'min cosine':>11}")
+    print(f"{'torch':>24} {baseline:>9.1f} {1.0:>7.2f}x {1.0:>11.4f}")
+
+    for quantize in (False, True):
+        for bucketing in (False, True):
+            embedder = ONNXEmbedder(
+                args.model,
+                cache_dir=cache_dir,
+                max_length=args.max_length,
+                quantize=quantize,
+                length_bucketing=bucketing,
+            )
+            rate, embeddings = throughput(embedder, texts, args.batch_size, args.repeat)
+            cosine = float((embeddings * reference).sum(axis=1).min())
+            name = f"onnx {'int8' if quantize else 'fp32'}" + (
+                " + buckets" if bucketing else ""
+            )
+            print(f"{name:>24} {rate:>9.1f} {rate / baseline:>7.2f}x {cosine:>11.4f}")
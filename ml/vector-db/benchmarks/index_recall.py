@@ -0,0 +1,150 @@
+"""
+Compare FAISS index families by recall, latency and memory per vector.
+
+Ground truth is an exact Flat search over the same synthetic clustered
+vectors. Run from ml/vector-db:
+
+    python -m benchmarks.index_recall
+    python -m benchmarks.index_recall --dimension 1024 --num-vectors 50000
+"""
+import time
+import argparse
+from typing import Dict, List, Tuple, Any
+
+import faiss
+import numpy as np
+
+from app.services.config import VectorDBConfig, DistanceMetric, IndexType
+from app.services.indices import IndexFactory
+
+
+def synthetic_vectors(
+    num_vectors: int, num_queries: int, dimension: int, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Clustered unit vectors, loosely shaped like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = 0.5 * rng.standard_normal((max(num_vectors // 100, 1), dimension))
+
+    def sample(n: int) -> np.ndarray:
+        points = centers[rng.integers(len(centers), size=n)]
+        points = points + rng.standard_normal((n, dimension))
+        points /= np.linalg.norm(points, axis=1, keepdims=True)
+        return points.astype(np.float32)
+
+    return sample(num_vectors), sample(num_queries)
+
+
+def build(config: VectorDBConfig, vectors: np.ndarray) -> Tuple[faiss.Index, float]:
+    """Build, train and fill an index; returns it with the build time."""
+    start = time.perf_counter()
+    index = IndexFactory.create_index(config)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index, time.perf_counter() - start
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the true k nearest neighbors that were returned."""
+    hits = sum(len(set(row) & set(true_row)) for row, true_row in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(
+    index: faiss.Index,
+    config: VectorDBConfig,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    **search_kwargs: Any,
+) -> Dict[str, float]:
+    """Recall and per-query latency, searching one query at a time."""
+    params = IndexFactory.search_params(config, **search_kwargs)
+    found = np.empty((len(queries), k), dtype=np.int64)
+    latencies: List[float] = []
+
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k, params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found[i] = ids[0]
+
+    return {
+        "recall": recall_at_k(found, truth),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def index_families(args: argparse.Namespace) -> List[Tuple[VectorDBConfig, str, List[Dict]]]:
+    """Index configs to compare, each with the search parameters to sweep."""
+    base = {
+        "dimension": args.dimension,
+        "distance_metric": DistanceMetric.L2,
+        "nlist": args.nlist,
+    }
+    nprobes = [{"nprobe": nprobe} for nprobe in args.nprobe]
+    return [
+        (VectorDBConfig(index_type=IndexType.IVF_FLAT, **base), "nprobe", nprobes),
+        (VectorDBConfig(index_type=IndexType.IVF_PQ, **base), "nprobe", nprobes),
+        (
+            VectorDBConfig(index_type=IndexType.HNSW, **base),
+            "ef_search",
+            [{"ef_search": ef_search} for ef_search in args.ef_search],
+        ),
+        (VectorDBConfig(index_type=IndexType.SQ8, **base), "", [{}]),
+        (VectorDBConfig(index_type=IndexType.SQ_FP16, **base), "", [{}]),
+    ]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Index recall/latency benchmark")
+    parser.add_argument("--dimension", type=int, default=128)
+    parser.add_argument("--num-vectors", type=int, default=20000)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    vectors, queries = synthetic_vectors(
+        args.num_vectors, args.num_queries, args.dimension
+    )
+
+    flat_config = VectorDBConfig(dimension=args.dimension, index_type=IndexType.FLAT)
+    flat, _ = build(flat_config, vectors)
+    _, truth = flat.search(queries, args.k)
+    flat_bytes = len(faiss.serialize_index(flat)) / args.num_vectors
+
+    print(
+        f"{args.num_vectors} vectors, dimension {args.dimension}, "
+        f"recall@{args.k} against Flat"
+    )
+    print(
+        f"{'index':>8} {'param':>14} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'B/vector':>9} {'vs Flat':>8} {'build s':>8}"
+    )
+    flat_stats = measure(flat, flat_config, queries, truth, args.k)
+    print(
+        f"{'Flat':>8} {'':>14} {flat_stats['recall']:>7.3f} "
+        f"{flat_stats['p50_ms']:>8.3f} {flat_stats['p95_ms']:>8.3f} "
+        f"{flat_bytes:>9.0f} {1.0:>7.1f}x {'':>8}"
+    )
+
+    for config, param_name, sweep in index_families(args):
+        index, build_time = build(config, vectors)
+        bytes_per_vector = len(faiss.serialize_index(index)) / args.num_vectors
+
+        for search_kwargs in sweep:
+            stats = measure(index, config, queries, truth, args.k, **search_kwargs)
+            param = f"{param_name}={search_kwargs[param_name]}" if param_name else ""
+            print(
+                f"{config.index_type.value:>8} {param:>14} {stats['recall']:>7.3f} "
+                f"{stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} "
+                f"{bytes_per_vector:>9.0f} {flat_bytes / bytes_per_vector:>7.1f}x "
+                f"{build_time:>8.2f}"
+            )
@@ -0,0 +1,33 @@
+import os
+import json
+from typing import List
+
+from app.services.document import Document
+
+
+PROGRAMS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "..", "backend", "data", "200_sport_programs.json",
+)
+
+METADATA_FIELDS = [
+    "Activity Type",
+    "Difficulty Level",
+    "Training Environment",
+    "Required Equipment",
+    "Physical Limitations",
+]
+
+
+def load_program_documents(path: str = PROGRAMS_PATH) -> List[Document]:
+    """Load the bundled sport programs as index documents."""
+    with open(path, encoding="utf-8") as f:
+        programs = json.load(f)
+
+    documents = []
+    for i, program in enumerate(programs):
+        content = f"{program['Course Title']}\n{program['Program Description']}"
+        metadata = {field: program.get(field) for field in METADATA_FIELDS}
+        documents.append(Document(id=str(i), content=content, metadata=metadata))
+
+    return documents
@@ -0,0 +1,348 @@
+"""
+Offline benchmark of the vector-db ingest and query paths.
+
+Drives ``VectorDBService`` the way the API does, with a stub embedder in
+place of the model, so no network or model download is needed. The
+corpus is the programs bundled in ``backend/data/200_sport_programs.json``
+repeated under new ids, each copy with a few extra words from the program
+vocabulary so that texts (and their stub vectors) differ. For every index
+type and corpus size it measures:
+
+- ingest: ``add_documents`` throughput and per-batch latency
+- search: per-query latency and QPS for each k (and nprobe for IVF)
+- save/load: checkpoint time, on-disk size and lazy load time
+- memory: resident set growth while ingesting, per document
+
+Each (index type, size) case runs in a fresh process so memory numbers
+do not include earlier cases. Results are written as JSON; pass a
+previous file with ``--baseline`` to print the change of every metric.
+Run from ml/vector-db:
+
+    python -m benchmarks.vector_db_suite
+    python -m benchmarks.vector_db_suite --sizes 1000 100000 1000000 --output results.json
+    python -m benchmarks.vector_db_suite --baseline results.json --output new.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import zlib
+import asyncio
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import faiss
+import numpy as np
+
+from app.api.service import VectorDBService
+from app.services.catalog import IndexCatalog
+from app.services.embedder.base import BaseEmbedder
+
+from .programs import load_program_documents
+
+INDEX_TYPES = ["FLAT", "IVF_FLAT", "HNSW", "BM25"]
+
+
+class StubEmbedder(BaseEmbedder):
+    """
+    Deterministic embedder producing clustered unit vectors from text hashes.
+
+    A CRC32 of the text picks one of ``num_clusters`` centers and a second
+    CRC32 picks a noise vector, so equal texts get equal vectors and the
+    corpus has cluster structure for IVF, at numpy speed.
+    """
+
+    model_name = "stub"
+
+    def __init__(self, dimension: int, num_clusters: int = 1024, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.dimension = dimension
+        self.centers = rng.standard_normal((num_clusters, dimension)).astype(np.float32)
+        self.noise = rng.standard_normal((4096, dimension)).astype(np.float32)
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        encoded = [text.encode("utf-8") for text in texts]
+        clusters = np.array([zlib.crc32(data) for data in encoded]) % len(self.centers)
+        noise = np.array([zlib.crc32(data, 0x9E3779B9) for data in encoded]) % len(self.noise)
+        vectors = self.centers[clusters] + 0.5 * self.noise[noise]
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def get_dimension(self) -> int:
+        return self.dimension
+
+
+def corpus(size: int, batch_size: int, seed: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    """Batches of API-style documents: programs repeated with varied wording."""
+    programs = load_program_documents()
+    words = sorted({word for doc in programs for word in doc.content.split() if word.isalpha()})
+    extra = np.random.default_rng(seed).integers(len(words), size=(size, 3))
+
+    for start in range(0, size, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, size)):
+            program = programs[i % len(programs)]
+            batch.append(
+                {
+                    "id": str(i),
+                    "content": f"{program.content} {' '.join(words[w] for w in extra[i])}",
+                    "metadata": program.metadata,
+                }
+            )
+        yield batch
+
+
+def latency_stats(latencies_ms: List[float]) -> Dict[str, float]:
+    """Mean and tail latencies in milliseconds."""
+    values = np.asarray(latencies_ms)
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        # Peak rather than current RSS where /proc is unavailable (kilobytes on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def directory_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+async def benchmark_case(
+    index_type: str, size: int, args: argparse.Namespace, data_dir: str
+) -> Dict[str, Any]:
+    """Ingest, search and save/load one index of ``size`` documents."""
+    service = VectorDBService(
+        data_dir=data_dir, default_embedder="bm25", default_embedder_type="bm25"
+    )
+    service.embedders["stub"] = StubEmbedder(args.dimension)
+    service.embedder_types["stub"] = "stub"
+    service.default_embedder = "stub"
+    service.indices.checkpoint_batch_size = args.checkpoint_batch_size
+    service.indices.checkpoint_interval = 0
+    service.compaction_threshold = float("inf")
+
+    name = "bench"
+    nlist = args.nlist or max(1, min(4096, int(4 * np.sqrt(size))))
+    await service.create_index(
+        name, args.dimension, distance_metric="COSINE" if args.cosine else "L2",
+        index_type=index_type, nlist=nlist,
+    )
+
+    gc.collect()
+    rss_before = rss_bytes()
+    batch_latencies = []
+    start = time.perf_counter()
+    for batch in corpus(size, args.batch_size):
+        batch_start = time.perf_counter()
+        await service.add_documents(name, batch)
+        batch_latencies.append((time.perf_counter() - batch_start) * 1000)
+    ingest_seconds = time.perf_counter() - start
+    gc.collect()
+    rss_growth = rss_bytes() - rss_before
+
+    programs = load_program_documents()
+    rng = np.random.default_rng(1)
+    queries = [
+        programs[i].content.split("\n")[0]
+        for i in rng.integers(len(programs), size=args.num_queries)
+    ]
+
+    nprobes: List[Optional[int]] = [None]
+    if index_type.startswith("IVF"):
+        nprobes = [nprobe for nprobe in args.nprobe if nprobe <= nlist]
+
+    searches = []
+    for k in args.k:
+        for nprobe in nprobes:
+            # Warm-up, e.g. the deferred BM25 IDF and lazily built caches
+            await service.search(name, query_text=queries[0], k=k, nprobe=nprobe)
+            latencies = []
+            start = time.perf_counter()
+            for query in queries:
+                query_start = time.perf_counter()
+                await service.search(name, query_text=query, k=k, nprobe=nprobe)
+                latencies.append((time.perf_counter() - query_start) * 1000)
+            elapsed = time.perf_counter() - start
+            searches.append(
+                {"k": k, "nprobe": nprobe, "qps": len(queries) / elapsed, **latency_stats(latencies)}
+            )
+
+    start = time.perf_counter()
+    service.indices.checkpoint(name)
+    save_ms = (time.perf_counter() - start) * 1000
+
+    catalog = IndexCatalog(data_dir)
+    start = time.perf_counter()
+    catalog[name]
+    load_ms = (time.perf_counter() - start) * 1000
+
+    db = service.indices[name]
+    result = {
+        "index_type": index_type,
+        "size": size,
+        "nlist": nlist if index_type.startswith("IVF") else None,
+        # Small IVF indices stay untrained and are searched exactly
+        "trained": db.index.is_trained if hasattr(db, "index") else True,
+        "ingest": {
+            "docs_per_second": size / ingest_seconds,
+            "seconds": ingest_seconds,
+            "batch_size": args.batch_size,
+            **latency_stats(batch_latencies),
+        },
+        "search": searches,
+        "save_ms": save_ms,
+        "load_ms": load_ms,
+        "disk_bytes": directory_bytes(data_dir),
+        "rss_growth_bytes": rss_growth,
+        "rss_bytes_per_document": rss_growth / size,
+    }
+    service.close()
+    return result
+
+
+def run_case(index_type: str, size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one case in a scratch data directory."""
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    with tempfile.TemporaryDirectory(prefix="vector-db-bench-") as data_dir:
+        return asyncio.run(benchmark_case(index_type, size, args, data_dir))
+
+
+def case_key(result: Dict[str, Any]) -> str:
+    return f"{result['index_type']}/{result['size']}"
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Print the relative change of each metric against a baseline run."""
+    with open(baseline_path) as f:
+        baseline = {case_key(result): result for result in json.load(f)["results"]}
+
+    def change(new: float, old: float) -> str:
+        return f"{(new / old - 1) * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nChange vs {baseline_path} (latency: lower is better, throughput: higher)")
+    for result in results:
+        old = baseline.get(case_key(result))
+        if old is None:
+            continue
+        print(
+            f"{case_key(result):>16} ingest docs/s {change(result['ingest']['docs_per_second'], old['ingest']['docs_per_second'])}"
+            f"  save {change(result['save_ms'], old['save_ms'])}"
+            f"  load {change(result['load_ms'], old['load_ms'])}"
+            f"  rss {change(result['rss_growth_bytes'], old['rss_growth_bytes'])}"
+        )
+        old_searches = {(s["k"], s["nprobe"]): s for s in old["search"]}
+        for search in result["search"]:
+            previous = old_searches.get((search["k"], search["nprobe"]))
+            if previous is not None:
+                print(
+                    f"{'':>16} k={search['k']} nprobe={search['nprobe']}: "
+                    f"p50 {change(search['p50_ms'], previous['p50_ms'])}  "
+                    f"p99 {change(search['p99_ms'], previous['p99_ms'])}  "
+                    f"qps {change(search['qps'], previous['qps'])}"
+                )
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    ingest = result["ingest"]
+    print(
+        f"\n{result['index_type']} x {result['size']}: "
+        f"ingest {ingest['docs_per_second']:.0f} docs/s "
+        f"(batch p50 {ingest['p50_ms']:.1f} / p99 {ingest['p99_ms']:.1f} ms), "
+        f"save {result['save_ms']:.0f} ms, load {result['load_ms']:.0f} ms, "
+        f"disk {result['disk_bytes'] / 2**20:.1f} MiB, "
+        f"rss +{result['rss_bytes_per_document']:.0f} B/doc"
+        + ("" if result["trained"] else " (not trained yet: exact search)")
+    )
+    print(f"{'k':>6} {'nprobe':>7} {'qps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for search in result["search"]:
+        nprobe = "" if search["nprobe"] is None else search["nprobe"]
+        print(
+            f"{search['k']:>6} {nprobe:>7} {search['qps']:>9.1f} {search['p50_ms']:>8.3f} "
+            f"{search['p95_ms']:>8.3f} {search['p99_ms']:>8.3f}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vector DB ingest/query benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--index-types", nargs="+", default=INDEX_TYPES, choices=INDEX_TYPES)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--cosine", action="store_true", help="Cosine instead of L2 distance")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per add_documents")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("-k", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument(
+        "--nlist", type=int, default=None, help="IVF lists (default: 4 * sqrt(size))"
+    )
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument(
+        "--checkpoint-batch-size", type=int, default=0,
+        help="Checkpoint during ingest every N documents, as the service does "
+             "(default: 0, only the timed save at the end)",
+    )
+    parser.add_argument("--threads", type=int, default=None, help="FAISS OpenMP threads")
+    parser.add_argument(
+        "--no-isolate", action="store_true", help="Run all cases in this process"
+    )
+    parser.add_argument("--output", default="vector_db_benchmark.json")
+    parser.add_argument("--baseline", default=None, help="Earlier JSON output to compare with")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    results = []
+    for size in args.sizes:
+        for index_type in args.index_types:
+            if args.no_isolate:
+                result = run_case(index_type, size, args)
+            else:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(run_case, index_type, size, args).result()
+            print_result(result)
+            results.append(result)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "faiss": faiss.__version__,
+            "numpy": np.__version__,
+        },
+        "args": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
@@ -0,0 +1,227 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from app.services.embedder.bm25 import BM25Embedder
+from app.services.embedder.inverted_index import PostingsArrays
+from app.services.bm25_index import BM25Index
+from app.services.document import Document
+
+
+CORPUS = [
+    "strength training with dumbbells at home",
+    "yoga for flexibility and mobility",
+    "running plan for endurance and speed running",
+    "home workout without equipment",
+    "powerlifting strength program for advanced athletes",
+]
+
+
+@pytest.fixture
+def embedder():
+    bm25 = BM25Embedder()
+    bm25.fit(CORPUS)
+    return bm25
+
+
+def test_search_ranks_matching_documents_first(embedder):
+    """Документы с терминами запроса идут первыми"""
+    results = embedder.search("strength home", k=3)
+    assert results[0][0] == 0
+    assert {idx for idx, _ in results[1:]} == {3, 4}
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_pads_with_unmatched_documents(embedder):
+    """Если совпадений меньше k, добиваем документами с нулевым score"""
+    results = embedder.search("yoga", k=3)
+    assert results[0][0] == 1
+    assert [score for _, score in results[1:]] == [0.0, 0.0]
+    assert [idx for idx, _ in results[1:]] == [0, 2]
+
+
+def test_encode_matches_search_scores(embedder):
+    """encode и search возвращают одинаковые score"""
+    matrix = embedder.encode(["running endurance", "home"])
+    assert matrix.shape == (2, len(CORPUS))
+    assert matrix.dtype == np.float32
+
+    for doc_idx, score in embedder.search("running endurance", k=len(CORPUS)):
+        assert matrix[0, doc_idx] == pytest.approx(score, rel=1e-5)
+
+
+def test_bm25_index_save_load_roundtrip(tmp_path):
+    """Постинги восстанавливаются после загрузки индекса"""
+    index = BM25Index()
+    index.add_documents(
+        [Document(id=str(i), content=text) for i, text in enumerate(CORPUS)]
+    )
+    path = str(tmp_path / "programs")
+    index.save(path)
+
+    restored = BM25Index(index_path=path)
+    scores, docs = restored.search("yoga flexibility", k=2)
+    expected_scores, expected_docs = index.search("yoga flexibility", k=2)
+
+    assert [doc.id for doc in docs] == [doc.id for doc in expected_docs]
+    assert scores == pytest.approx(expected_scores)
+
+
+def test_loaded_postings_stay_memory_mapped_until_write(tmp_path):
+    """Загруженные постинги читаются из mmap-массивов и копируются только при записи"""
+    index = BM25Index()
+    index.add_documents(
+        [Document(id=str(i), content=text) for i, text in enumerate(CORPUS)]
+    )
+    path = str(tmp_path / "programs")
+    index.save(path)
+
+    restored = BM25Index(index_path=path)
+    postings = restored.bm25.inverted_index.postings
+    assert isinstance(postings, PostingsArrays)
+    assert isinstance(postings.docs, np.memmap)
+    assert dict(restored.bm25.doc_freqs) == dict(index.bm25.doc_freqs)
+
+    queries = ["strength home", "running endurance", "yoga"]
+    for query in queries:
+        expected_scores, expected_docs = index.search(query, k=3)
+        scores, docs = restored.search(query, k=3)
+        assert [d.id for d in docs] == [d.id for d in expected_docs]
+        assert scores == pytest.approx(expected_scores)
+    np.testing.assert_allclose(
+        restored.bm25.encode(queries), index.bm25.encode(queries), rtol=1e-5
+    )
+    # Searching and saving again keep the arrays
+    restored.save(str(tmp_path / "copy"))
+    assert restored.bm25.inverted_index.postings is postings
+
+    restored.add_documents([Document(id="5", content="swimming for endurance")])
+    assert isinstance(restored.bm25.inverted_index.postings, dict)
+    _, docs = restored.search("swimming endurance", k=2)
+    assert [d.id for d in docs] == ["5", "2"]
+
+
+def test_incremental_add_matches_full_fit():
+    """Пакетная загрузка даёт те же score, что и полная переиндексация"""
+    docs = [Document(id=str(i), content=text) for i, text in enumerate(CORPUS)]
+
+    incremental = BM25Index()
+    for doc in docs:
+        incremental.add_documents([doc])
+
+    full = BM25Index()
+    full.add_documents(docs)
+
+    for query in ["strength home", "running", "yoga mobility"]:
+        inc_scores, inc_docs = incremental.search(query, k=3)
+        full_scores, full_docs = full.search(query, k=3)
+        assert [d.id for d in inc_docs] == [d.id for d in full_docs]
+        assert inc_scores == pytest.approx(full_scores)
+
+
+def test_readding_document_replaces_content():
+    """Повторное добавление id заменяет старый текст"""
+    index = BM25Index()
+    index.add_documents([Document(id="1", content="yoga for flexibility")])
+    index.add_documents([Document(id="2", content="running plan")])
+    index.add_documents([Document(id="1", content="swimming technique")])
+
+    _, docs = index.search("swimming", k=1)
+    assert docs[0].id == "1"
+    # The old version is tombstoned until compaction
+    scores, docs = index.search("yoga", k=2)
+    assert scores == [0.0, 0.0] and {d.id for d in docs} == {"1", "2"}
+    assert docs[0].content != "yoga for flexibility"
+
+    index.compact()
+    assert index.bm25.get_document_count() == 2
+    assert index.bm25.doc_freqs.get("yoga", 0) == 0
+    _, docs = index.search("swimming", k=1)
+    assert docs[0].id == "1"
+
+
+def test_search_batch_matches_single_search(embedder):
+    """Пакетный поиск через разреженные матрицы совпадает с поштучным"""
+    queries = ["strength home", "yoga", "running running endurance", "unknown"]
+    batch = embedder.search_batch(queries, k=3)
+
+    assert len(batch) == len(queries)
+    for query, results in zip(queries, batch):
+        expected = embedder.search(query, k=3)
+        assert [idx for idx, _ in results] == [idx for idx, _ in expected]
+        assert [s for _, s in results] == pytest.approx(
+            [s for _, s in expected], rel=1e-5
+        )
+
+
+def test_weight_matrix_invalidated_on_partial_fit(embedder):
+    """Матрица весов перестраивается после добавления документов"""
+    assert embedder.encode("swimming").max() == 0.0
+
+    embedder.partial_fit(["swimming technique drills"])
+
+    scores = embedder.encode("swimming")
+    assert scores.shape == (1, len(CORPUS) + 1)
+    assert scores[0, -1] > 0
+
+
+def test_metadata_filter_restricts_candidates(tmp_path):
+    """Фильтр по метаданным ограничивает кандидатов BM25, в т.ч. после загрузки"""
+    index = BM25Index()
+    index.add_documents([
+        Document(id="1", content="strength training with dumbbells",
+                 metadata={"Difficulty Level": "Beginner", "Training Environment": ["Gym"]}),
+        Document(id="2", content="strength training at home",
+                 metadata={"Difficulty Level": "Advanced", "Training Environment": ["Home Without Equipment"]}),
+        Document(id="3", content="yoga and stretching",
+                 metadata={"Difficulty Level": "Beginner", "Training Environment": ["Gym", "Outdoors"]}),
+    ])
+
+    beginner = {"Difficulty Level": "Beginner"}
+    _, docs = index.search("strength training", k=5, metadata_filter=beginner)
+    # Only the two beginner programs, the unmatched one as zero-score padding
+    assert [d.id for d in docs] == ["1", "3"]
+
+    no_gym = {"Training Environment": {"$nin": ["Gym"]}}
+    _, batch_docs = index.search_batch(["strength", "yoga"], k=5, metadata_filter=no_gym)
+    assert [[d.id for d in docs] for docs in batch_docs] == [["2"], ["2"]]
+
+    path = str(tmp_path / "programs")
+    index.save(path)
+    reopened = BM25Index(index_path=path)
+    _, docs = reopened.search("strength", k=5, metadata_filter={"Difficulty Level": "Expert"})
+    assert docs == []
+
+    # Rebuilding the corpus on re-add keeps bitmaps aligned with positions
+    reopened.add_documents([
+        Document(id="1", content="strength training", metadata={"Difficulty Level": "Advanced"}),
+    ])
+    _, docs = reopened.search("strength", k=5, metadata_filter={"Difficulty Level": "Advanced"})
+    assert sorted(d.id for d in docs) == ["1", "2"]
+
+
+def test_delete_documents_tombstones_until_compaction(tmp_path):
+    """Удалённые документы исключаются из поиска, компакция убирает их из постингов"""
+    index = BM25Index(index_path=str(tmp_path / "programs"))
+    index.add_documents([Document(id=str(i), content=text) for i, text in enumerate(CORPUS)])
+
+    assert index.delete_documents(["0", "4", "missing"]) == ["0", "4"]
+    _, docs = index.search("strength", k=5)
+    assert [d.id for d in docs][:1] != ["0"] and {"0", "4"}.isdisjoint(d.id for d in docs)
+    assert index.compaction_due(0.2) and not index.compaction_due(1.0)
+
+    index.save(index.index_path)
+    reopened = BM25Index(index_path=index.index_path)
+    assert reopened.bm25.get_document_count() == 3 and not reopened.tombstones
+
+    index.compact()
+    assert index.bm25.get_document_count() == 3
+    assert index.bm25.doc_freqs["strength"] == 0
+    _, docs = index.search("running", k=1)
+    assert docs[0].id == "2"
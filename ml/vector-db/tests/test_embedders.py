@@ -0,0 +1,344 @@
+import os
+import sys
+from typing import List, Union
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from app.services.embedder.base import BaseEmbedder
+from app.services.embedder.cache import CachedEmbedder
+
+
+class CountingEmbedder(BaseEmbedder):
+    """Детерминированный эмбеддер, считающий вызовы"""
+
+    model_name = "counting"
+
+    def __init__(self, dimension: int = 4):
+        self.dimension = dimension
+        self.calls: List[List[str]] = []
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        self.calls.append(list(texts))
+        return np.array(
+            [[len(text) + i for i in range(self.dimension)] for text in texts],
+            dtype=np.float32,
+        )
+
+    def get_dimension(self) -> int:
+        return self.dimension
+
+
+def test_cache_only_encodes_misses():
+    """В эмбеддер уходят только промахи кэша, без дубликатов"""
+    inner = CountingEmbedder()
+    cached = CachedEmbedder(inner, max_entries=10)
+
+    first = cached.encode(["a", "bb", "a"])
+    second = cached.encode(["bb", "ccc"])
+
+    assert inner.calls == [["a", "bb"], ["ccc"]]
+    assert np.allclose(first, inner.encode(["a", "bb", "a"]))
+    assert np.allclose(second[0], first[1])
+
+    stats = cached.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_cache_evicts_least_recently_used():
+    """LRU ограничен по размеру"""
+    inner = CountingEmbedder()
+    cached = CachedEmbedder(inner, max_entries=2)
+
+    cached.encode(["a", "bb"])
+    cached.encode(["a"])  # "a" becomes most recent
+    cached.encode(["ccc"])  # evicts "bb"
+    inner.calls.clear()
+
+    cached.encode(["a", "bb"])
+    assert inner.calls == [["bb"]]
+    assert cached.get_stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Дисковый уровень кэша переживает перезапуск"""
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbedder(CountingEmbedder(), disk_path=path).encode(["profile query"])
+
+    inner = CountingEmbedder()
+    restarted = CachedEmbedder(inner, disk_path=path)
+    vectors = restarted.encode(["profile query"])
+
+    assert inner.calls == []
+    assert vectors.shape == (1, 4)
+    assert restarted.get_stats()["disk_hits"] == 1
+    assert restarted.get_stats()["disk_entries"] == 1
+
+
+class StubEmbeddingServer:
+    """Локальный HTTP-сервер с OpenAI-совместимым /embeddings"""
+
+    def __init__(self, fail_first: int = 0, status_code: int = 503):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.batches: List[List[str]] = []
+        self.fail_first = fail_first
+        self.status_code = status_code
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                import time
+
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failing = stub.fail_first > 0
+                    if failing:
+                        stub.fail_first -= 1
+                    else:
+                        stub.batches.append(body["input"])
+                time.sleep(0.02)
+
+                if failing:
+                    payload, code = b"{}", stub.status_code
+                else:
+                    data = [
+                        {"index": i, "embedding": [float(len(text)), 1.0]}
+                        for i, text in enumerate(body["input"])
+                    ]
+                    payload, code = json.dumps({"data": data}).encode(), 200
+
+                with lock:
+                    stub.in_flight -= 1
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/embeddings"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_api_embedder_batches_concurrently():
+    """Тексты уходят пачками, параллельно и в исходном порядке"""
+    from app.services.embedder.api import KlusterAIEmbedder
+
+    texts = [f"program {'x' * i}" for i in range(25)]
+    with StubEmbeddingServer() as server:
+        embedder = KlusterAIEmbedder(
+            api_key="test", api_url=server.url, dimension=2,
+            max_batch_size=4, max_concurrency=3,
+        )
+        embeddings = embedder.encode(texts)
+        embedder.close()
+
+    assert embeddings.shape == (25, 2)
+    assert embeddings[:, 0].tolist() == [float(len(text)) for text in texts]
+    assert len(server.batches) == 7
+    assert max(len(batch) for batch in server.batches) == 4
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_api_embedder_retries_transient_errors():
+    """503 повторяется для пачки, а 400 - нет"""
+    import requests
+    from app.services.embedder.api import KlusterAIEmbedder
+
+    with StubEmbeddingServer(fail_first=2) as server:
+        embedder = KlusterAIEmbedder(
+            api_key="test", api_url=server.url, dimension=2, retry_delay=0.01,
+        )
+        assert embedder.encode(["a", "bb"]).shape == (2, 2)
+        assert server.batches == [["a", "bb"]]
+
+    with StubEmbeddingServer(fail_first=1, status_code=400) as server:
+        embedder = KlusterAIEmbedder(
+            api_key="test", api_url=server.url, dimension=2, retry_delay=0.01,
+        )
+        with pytest.raises(requests.exceptions.HTTPError):
+            embedder.encode(["a"])
+
+
+def test_api_embedder_async_batches_concurrently():
+    """aencode шлёт пачки через httpx с тем же лимитом и повторами"""
+    import asyncio
+    from app.services.embedder.api import KlusterAIEmbedder
+
+    texts = [f"program {'x' * i}" for i in range(25)]
+    with StubEmbeddingServer(fail_first=1) as server:
+        embedder = KlusterAIEmbedder(
+            api_key="test", api_url=server.url, dimension=2,
+            max_batch_size=4, max_concurrency=3, retry_delay=0.01,
+        )
+
+        async def run():
+            try:
+                return await embedder.aencode(texts)
+            finally:
+                await embedder.aclose()
+
+        embeddings = asyncio.run(run())
+
+    assert embeddings[:, 0].tolist() == [float(len(text)) for text in texts]
+    assert len(server.batches) == 7
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_cache_aencode_only_encodes_misses():
+    """Асинхронный путь кэша тоже отправляет только промахи"""
+    import asyncio
+
+    inner = CountingEmbedder()
+    cached = CachedEmbedder(inner, max_entries=10)
+
+    cached.encode(["a"])
+    vectors = asyncio.run(cached.aencode(["a", "bb"]))
+
+    assert inner.calls == [["a"], ["bb"]]
+    assert np.allclose(vectors, inner.encode(["a", "bb"]))
+
+
+def test_cache_aencode_queries_disk_tier_off_the_event_loop(tmp_path):
+    """Дисковый уровень кэша в aencode читается и пишется вне event loop"""
+    import asyncio
+    import threading
+
+    cached = CachedEmbedder(CountingEmbedder(), disk_path=str(tmp_path / "embeddings.sqlite"))
+    disk_threads = []
+    get_many, put_many = cached.disk.get_many, cached.disk.put_many
+
+    def recording(method):
+        def wrapper(*args):
+            disk_threads.append(threading.get_ident())
+            return method(*args)
+        return wrapper
+
+    cached.disk.get_many = recording(get_many)
+    cached.disk.put_many = recording(put_many)
+
+    async def run():
+        return threading.get_ident(), await cached.aencode(["a", "bb"])
+
+    loop_thread, vectors = asyncio.run(run())
+
+    assert vectors.shape == (2, 4)
+    assert len(disk_threads) == 2
+    assert loop_thread not in disk_threads
+    assert cached.get_stats()["disk_entries"] == 2
+
+
+def test_length_buckets_group_similar_lengths():
+    """Тексты группируются по длине в токенах, все индексы сохраняются"""
+    from app.services.embedder.onnx import length_buckets
+
+    lengths = [50, 3, 47, 4, 500, 5]
+    batches = length_buckets(lengths, batch_size=2)
+
+    assert [batch.tolist() for batch in batches] == [[1, 3], [5, 2], [0, 4]]
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    assert padded < sum(2 * max(lengths[i : i + 2]) for i in range(0, len(lengths), 2))
+
+
+def make_tiny_bert(tmp_path) -> str:
+    """Маленькая случайная BERT-модель с токенизатором в tmp_path"""
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = "yoga strength running plan for beginners gym home mobility stretch core".split()
+    model_dir = tmp_path / "tiny-bert"
+    model_dir.mkdir()
+    (model_dir / "vocab.txt").write_text(
+        "\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words)
+    )
+    BertTokenizerFast(str(model_dir / "vocab.txt")).save_pretrained(str(model_dir))
+    BertModel(
+        BertConfig(
+            vocab_size=len(words) + 5,
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=64,
+        )
+    ).save_pretrained(str(model_dir))
+    return str(model_dir)
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_onnx_embedder_matches_torch(quantize, tmp_path):
+    """ONNX-бэкенд даёт те же эмбеддинги, что и PyTorch, в исходном порядке"""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from app.services.embedder.huggingface import HuggingFaceEmbedder
+    from app.services.embedder.onnx import ONNXEmbedder
+
+    model_dir = make_tiny_bert(tmp_path)
+
+    texts = ["yoga", "strength plan for beginners at home", "core", "running plan for gym"]
+    expected = HuggingFaceEmbedder(model_dir, device="cpu").encode(texts)
+    embedder = ONNXEmbedder(
+        model_dir, cache_dir=str(tmp_path / "onnx"), quantize=quantize
+    )
+    embeddings = embedder.encode(texts, batch_size=2)
+
+    assert embedder.get_dimension() == 32
+    assert embeddings.shape == (4, 32)
+    assert (embeddings * expected).sum(axis=1).min() > (0.99 if quantize else 0.9999)
+
+
+def test_embedder_pool_coalesces_concurrent_requests(tmp_path):
+    """Пул процессов склеивает параллельные запросы в микробатчи без потери порядка"""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.embedder.huggingface import HuggingFaceEmbedder
+    from app.services.embedder.pool import EmbedderPool
+
+    embedder = HuggingFaceEmbedder(make_tiny_bert(tmp_path), device="cpu")
+    texts = ["yoga", "strength plan for beginners at home", "core", "running plan for gym"] * 5
+    expected = embedder.encode(texts)
+
+    pool = EmbedderPool(embedder, num_workers=2, max_batch_size=8, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            results = list(executor.map(pool.encode, texts))
+        large = pool.encode(texts)
+        async_result = asyncio.run(pool.aencode(texts[:3]))
+    finally:
+        pool.close()
+
+    assert np.allclose(np.vstack(results), expected, atol=1e-5)
+    assert np.allclose(large, expected, atol=1e-5)
+    assert np.allclose(async_result, expected[:3], atol=1e-5)
+    # 20 одиночных запросов и 20 текстов одним вызовом, батчи не больше 8
+    stats = pool.get_stats()
+    assert stats["batches"] < len(texts) + 3
+    assert stats["mean_batch_size"] > 1
+    with pytest.raises(RuntimeError):
+        pool.encode("yoga")
@@ -0,0 +1,597 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from app.services.config import VectorDBConfig, DistanceMetric, IndexType, FusionMethod
+from app.services.vector_db import VectorDB
+from app.services.document import Document
+
+
+DIMENSION = 16
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((50, DIMENSION)).astype("float32")
+
+
+@pytest.fixture
+def flat_db(vectors):
+    db = VectorDB(
+        VectorDBConfig(
+            dimension=DIMENSION,
+            distance_metric=DistanceMetric.L2,
+            index_type=IndexType.FLAT,
+        )
+    )
+    db.add_documents(
+        [
+            Document(id=str(i), content=f"doc {i}", vector=vector)
+            for i, vector in enumerate(vectors)
+        ]
+    )
+    return db
+
+
+def test_search_batch_matches_single_search(flat_db, vectors):
+    """Пакетный поиск FAISS совпадает с поштучным"""
+    queries = vectors[:5] + 0.01
+    distances, documents = flat_db.search_batch(queries, k=3)
+
+    assert [len(row) for row in distances] == [3] * 5
+    for i, query in enumerate(queries):
+        single_distances, single_documents = flat_db.search(query, k=3)
+        assert [d.id for d in documents[i]] == [d.id for d in single_documents]
+        assert np.allclose(distances[i], single_distances)
+        assert documents[i][0].id == str(i)
+
+
+def test_save_load_memory_maps_documents(flat_db, vectors, tmp_path):
+    """Документы читаются из memory-mapped колонок, векторы - из FAISS"""
+    path = str(tmp_path / "programs")
+    flat_db.save(path)
+
+    restored = VectorDB(
+        VectorDBConfig(
+            dimension=DIMENSION,
+            distance_metric=DistanceMetric.L2,
+            index_type=IndexType.FLAT,
+            index_path=path,
+        )
+    )
+
+    assert len(restored.documents) == len(vectors)
+    doc = restored.get_document("7")
+    assert doc.content == "doc 7"
+    assert doc.vector is None
+    assert np.allclose(restored.get_vector("7"), vectors[7])
+
+    _, documents = restored.search(vectors[3], k=1)
+    assert documents[0].id == "3"
+
+    # Adding after load and saving over the mapped store keeps both parts
+    restored.add_documents(
+        [Document(id="new", content="new doc", vector=vectors[0] * 2)]
+    )
+    restored.save(path)
+
+    reloaded = VectorDB(restored.config)
+    assert len(reloaded.documents) == len(vectors) + 1
+    assert reloaded.get_document("new").content == "new doc"
+    assert reloaded.get_document("7").content == "doc 7"
+
+
+def test_migrate_legacy_bm25_pickle(tmp_path):
+    """Старые pickle-индексы BM25 переводятся в новый формат"""
+    import pickle
+    from app.migrate import migrate
+    from app.services.bm25_index import BM25Index
+    from app.services.storage import store_exists
+
+    docs = {
+        "a": Document(id="a", content="yoga for flexibility"),
+        "b": Document(id="b", content="running plan for endurance"),
+    }
+    legacy = {
+        "bm25_state": {
+            "k1": 1.2,
+            "b": 0.75,
+            "epsilon": 0.25,
+            "corpus": [docs["a"].content, docs["b"].content],
+            "doc_tokens": [["yoga", "for", "flexibility"], ["running", "plan", "for", "endurance"]],
+        },
+        "documents": docs,
+        "id_to_index": {"a": 0, "b": 1},
+        "index_to_id": {0: "a", 1: "b"},
+        "next_index": 2,
+    }
+    path = str(tmp_path / "bm25_index")
+    with open(f"{path}.bm25", "wb") as f:
+        pickle.dump(legacy, f)
+
+    assert migrate(str(tmp_path), remove_legacy=True) == 1
+    assert store_exists(path)
+    assert not os.path.exists(f"{path}.bm25")
+
+    index = BM25Index(index_path=path)
+    _, found = index.search("running", k=1)
+    assert found[0].id == "b"
+
+
+def test_catalog_reopens_checkpointed_indices(tmp_path, vectors):
+    """После рестарта индексы подхватываются из каталога лениво"""
+    from app.services.catalog import IndexCatalog
+
+    config = VectorDBConfig(dimension=DIMENSION, index_type=IndexType.FLAT)
+    catalog = IndexCatalog(str(tmp_path), checkpoint_batch_size=2, checkpoint_interval=0)
+    db = catalog.create("programs", "vector", config.to_dict())
+    bm25 = catalog.create("programs_bm25", "bm25", {"k1": 1.5, "b": 0.7, "epsilon": 0.25})
+
+    db.add_documents([Document(id="0", content="doc 0", vector=vectors[0])])
+    assert catalog.record_write("programs", 1) is False
+    db.add_documents([Document(id="1", content="doc 1", vector=vectors[1])])
+    assert catalog.record_write("programs", 1) is True
+
+    bm25.add_documents([Document(id="a", content="yoga for flexibility")])
+    catalog.record_write("programs_bm25", 1)
+    catalog.flush()
+
+    restarted = IndexCatalog(str(tmp_path))
+    assert set(restarted) == {"programs", "programs_bm25"}
+    assert not restarted.is_loaded("programs")
+
+    reopened = restarted["programs"]
+    assert restarted.is_loaded("programs")
+    assert len(reopened.documents) == 2
+    assert reopened.config.index_type == IndexType.FLAT
+
+    reopened_bm25 = restarted["programs_bm25"]
+    assert reopened_bm25.bm25.k1 == 1.5
+    assert reopened_bm25.search("yoga", k=1)[1][0].id == "a"
+
+
+def test_catalog_flushes_writes_after_quiet_period(tmp_path):
+    """Последние записи перед паузой сохраняются по интервалу, без новой записи"""
+    import time
+    from app.services.catalog import IndexCatalog
+
+    catalog = IndexCatalog(str(tmp_path), checkpoint_batch_size=0, checkpoint_interval=0.2)
+    bm25 = catalog.create("programs", "bm25", {"k1": 1.2, "b": 0.75, "epsilon": 0.25})
+    catalog.checkpoint("programs")
+
+    # The first write after opening an index is not due by time
+    restarted = IndexCatalog(str(tmp_path), checkpoint_batch_size=0, checkpoint_interval=0.2)
+    bm25 = restarted["programs"]
+    bm25.add_documents([Document(id="a", content="yoga for flexibility")])
+    assert restarted.record_write("programs", 1) is False
+    assert restarted.flush_due() == []
+    assert restarted.pending_writes("programs") == 1
+
+    time.sleep(0.25)
+    assert restarted.flush_due() == ["programs"]
+    assert restarted.pending_writes("programs") == 0
+    assert restarted.flush_due() == []
+
+    reopened = IndexCatalog(str(tmp_path))["programs"]
+    assert reopened.search("yoga", k=1)[1][0].id == "a"
+
+
+def test_catalog_discovers_uncatalogued_indices(tmp_path, flat_db):
+    """Индексы, сохранённые без каталога, находятся при старте"""
+    from app.services.catalog import IndexCatalog
+
+    flat_db.save(str(tmp_path / "legacy_programs"))
+
+    catalog = IndexCatalog(str(tmp_path))
+    assert "legacy_programs" in catalog
+    assert len(catalog["legacy_programs"].documents) == len(flat_db.documents)
+
+
+@pytest.mark.parametrize(
+    "index_type, params",
+    [
+        (IndexType.HNSW, {"ef_search": 32}),
+        (IndexType.IVF_PQ, {"nprobe": 4}),
+        (IndexType.SQ8, {}),
+        (IndexType.SQ_FP16, {}),
+    ],
+)
+def test_index_families_find_nearest_neighbor(index_type, params, tmp_path):
+    """HNSW, IVF-PQ и SQ находят ближайший вектор и переживают save/load"""
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((300, DIMENSION)).astype("float32")
+    config = VectorDBConfig(
+        dimension=DIMENSION, index_type=index_type, nlist=4, pq_nbits=4,
+        train_points_per_centroid=10,
+    )
+    db = VectorDB(config)
+    db.add_documents(
+        [Document(id=str(i), content=f"doc {i}", vector=v) for i, v in enumerate(vectors)]
+    )
+
+    _, documents = db.search_batch(vectors[:10], k=3, **params)
+    hits = sum(docs[0].id == str(i) for i, docs in enumerate(documents))
+    assert hits >= 8
+
+    path = str(tmp_path / "programs")
+    db.save(path)
+    config.index_path = path
+    reopened = VectorDB(config)
+    assert reopened.search(vectors[0], k=1, **params)[1][0].id == "0"
+
+
+def test_index_family_parameters():
+    """Параметры квантизации и графа доходят до FAISS"""
+    import faiss
+    from app.services.indices import IndexFactory
+
+    hnsw_config = VectorDBConfig(
+        dimension=1024, index_type=IndexType.HNSW, hnsw_m=16, ef_construction=80
+    )
+    hnsw = IndexFactory.create_index(hnsw_config)
+    assert hnsw.hnsw.efConstruction == 80
+    assert IndexFactory.search_params(hnsw_config, ef_search=256).efSearch == 256
+    assert IndexFactory.search_params(hnsw_config).efSearch == hnsw_config.ef_search
+
+    # One byte per 8 dimensions: 32x smaller than float32
+    pq = IndexFactory.create_index(
+        VectorDBConfig(dimension=1024, index_type=IndexType.IVF_PQ)
+    )
+    assert faiss.downcast_index(pq).pq.M == 128
+
+    with pytest.raises(ValueError):
+        IndexFactory.create_index(
+            VectorDBConfig(dimension=1000, index_type=IndexType.IVF_PQ, pq_m=64)
+        )
+
+    assert IndexType.parse("IVF_FLAT") == IndexType.IVF_FLAT
+    assert IndexType.parse("IVFPQ") == IndexType.IVF_PQ
+
+
+def test_cosine_flat_index(vectors):
+    """COSINE работает через скалярное произведение нормированных векторов"""
+    db = VectorDB(
+        VectorDBConfig(
+            dimension=DIMENSION,
+            distance_metric=DistanceMetric.COSINE,
+            index_type=IndexType.FLAT,
+        )
+    )
+    db.add_documents(
+        [Document(id=str(i), content=f"doc {i}", vector=v) for i, v in enumerate(vectors)]
+    )
+
+    distances, documents = db.search(vectors[3] * 5, k=1)
+    assert documents[0].id == "3"
+    assert distances[0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_ivf_training_is_deferred_until_enough_vectors(tmp_path):
+    """IVF копит векторы в плоском индексе, обучается и переобучается при росте"""
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((100, DIMENSION)).astype("float32")
+    config = VectorDBConfig(
+        dimension=DIMENSION, index_type=IndexType.IVF_FLAT, nlist=4,
+        train_points_per_centroid=10, retrain_growth_factor=2.0,
+    )
+    db = VectorDB(config)
+
+    def add(start, end):
+        db.add_documents(
+            [Document(id=str(i), content=f"doc {i}", vector=vectors[i]) for i in range(start, end)]
+        )
+
+    add(0, 10)
+    assert (db.index.ntotal, db.staging.ntotal) == (0, 10)
+    assert db.search(vectors[7], k=1)[1][0].id == "7"
+
+    # Staged vectors survive a restart
+    path = str(tmp_path / "programs")
+    db.save(path)
+    config.index_path = path
+    db = VectorDB(config)
+    assert db.staging.ntotal == 10
+
+    add(10, 40)  # reaches 10 * nlist
+    assert (db.index.ntotal, db.staging.ntotal) == (40, 0)
+    assert db.index.is_trained and db._trained_size == 40
+    assert db.search(vectors[7], k=1, nprobe=4)[1][0].id == "7"
+
+    add(40, 79)
+    assert db._trained_size == 40
+    add(79, 80)  # corpus doubled since training
+    assert db._trained_size == 80
+    assert db.ntotal == 80
+    assert db.search(vectors[55], k=1, nprobe=4)[1][0].id == "55"
+
+
+def test_metadata_index_operators():
+    """Битовые индексы: значения, списки и операторы $eq/$ne/$in/$nin"""
+    from app.services.metadata_index import MetadataIndex
+
+    index = MetadataIndex()
+    index.add(0, {"level": "Beginner", "equipment": ["Mat", "Dumbbells"]})
+    index.add(1, {"level": "Advanced", "equipment": ["Barbell"]})
+    index.add(2, {"level": "Beginner"})
+
+    def match(metadata_filter):
+        return np.flatnonzero(index.mask(metadata_filter)).tolist()
+
+    assert match({"level": "Beginner"}) == [0, 2]
+    assert match({"equipment": "Mat"}) == [0]
+    assert match({"equipment": ["Mat", "Barbell"]}) == [0, 1]
+    assert match({"equipment": {"$nin": ["Barbell"]}}) == [0, 2]
+    assert match({"level": {"$ne": "Beginner"}, "equipment": {"$in": ["Barbell"]}}) == [1]
+    assert match({"missing": "x"}) == []
+
+    with pytest.raises(ValueError):
+        index.mask({"level": {"$regex": "B.*"}})
+
+
+@pytest.mark.parametrize(
+    "index_type", [IndexType.FLAT, IndexType.IVF_FLAT, IndexType.HNSW]
+)
+def test_metadata_filter_inside_faiss(index_type, tmp_path):
+    """Фильтр передаётся в FAISS через IDSelectorBitmap и переживает save/load"""
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((200, DIMENSION)).astype("float32")
+    config = VectorDBConfig(
+        dimension=DIMENSION, index_type=index_type, nlist=4,
+        train_points_per_centroid=10,
+    )
+    db = VectorDB(config)
+    db.add_documents([
+        Document(
+            id=str(i), content=f"doc {i}", vector=v,
+            metadata={"Difficulty Level": "Beginner" if i % 4 == 0 else "Advanced"},
+        )
+        for i, v in enumerate(vectors)
+    ])
+
+    beginner = {"Difficulty Level": "Beginner"}
+    _, documents = db.search(vectors[1], k=5, metadata_filter=beginner, nprobe=4)
+    assert len(documents) == 5
+    assert all(doc.metadata["Difficulty Level"] == "Beginner" for doc in documents)
+
+    path = str(tmp_path / "programs")
+    db.save(path)
+    config.index_path = path
+    reopened = VectorDB(config)
+    _, documents = reopened.search(vectors[4], k=3, metadata_filter=beginner, nprobe=4)
+    assert documents[0].id == "4"
+    assert all(int(doc.id) % 4 == 0 for doc in documents)
+
+
+@pytest.mark.parametrize(
+    "index_type", [IndexType.FLAT, IndexType.IVF_FLAT, IndexType.HNSW]
+)
+def test_filter_with_fewer_matches_than_k(index_type):
+    """Если фильтру соответствует меньше k документов, возвращаются только они"""
+    rng = np.random.default_rng(4)
+    vectors = rng.standard_normal((100, DIMENSION)).astype("float32")
+    db = VectorDB(
+        VectorDBConfig(
+            dimension=DIMENSION, index_type=index_type, nlist=4,
+            train_points_per_centroid=10,
+        )
+    )
+    db.add_documents([
+        Document(
+            id=str(i), content=f"doc {i}", vector=v,
+            metadata={"rare": i in (7, 42)},
+        )
+        for i, v in enumerate(vectors)
+    ])
+
+    distances, documents = db.search(
+        vectors[7], k=5, metadata_filter={"rare": True}, nprobe=4
+    )
+    assert sorted(doc.id for doc in documents) == ["42", "7"]
+    assert len(distances) == 2
+    assert np.all(distances < np.finfo(np.float32).max)
+
+    all_distances, all_documents = db.search_batch(
+        vectors[[7, 42]], k=5, metadata_filter={"missing": "x"}, nprobe=4
+    )
+    assert all_documents == [[], []]
+    assert [len(row) for row in all_distances] == [0, 0]
+
+
+def _hybrid_documents():
+    contents = ["yoga stretching", "barbell squat", "running intervals", "yoga flow"]
+    rng = np.random.default_rng(1)
+    return [
+        Document(id=str(i), content=content, vector=rng.standard_normal(DIMENSION).astype("float32"))
+        for i, content in enumerate(contents)
+    ]
+
+
+@pytest.mark.parametrize("fusion", [FusionMethod.RRF, FusionMethod.WEIGHTED])
+def test_hybrid_index_fuses_rankings(fusion, tmp_path):
+    """Гибридный индекс объединяет BM25 и векторный поиск в один список"""
+    from app.services.catalog import IndexCatalog
+    from app.services.hybrid_index import HybridIndex
+
+    config = VectorDBConfig(
+        dimension=DIMENSION,
+        index_type=IndexType.FLAT,
+        fusion=fusion,
+        index_path=str(tmp_path / "hybrid"),
+    )
+    index = HybridIndex(config)
+    documents = _hybrid_documents()
+    index.add_documents(documents)
+
+    # The query text matches doc 0 and 3, its vector is doc 1's vector
+    scores, found = index.search("yoga stretching", documents[1].vector, k=4)
+    ids = [doc.id for doc in found]
+    assert ids[0] in ("0", "1")
+    assert {"0", "1"} <= set(ids[:3])
+    assert scores == sorted(scores, reverse=True)
+
+    scores, found = index.search(
+        "yoga", documents[1].vector, k=4, metadata_filter={"missing": "x"}
+    )
+    assert found == []
+
+    index.save(config.index_path)
+    catalog = IndexCatalog(str(tmp_path))
+    assert catalog.entry("hybrid")["kind"] == "hybrid"
+    reopened = catalog["hybrid"]
+    assert isinstance(reopened, HybridIndex)
+    assert reopened.config.fusion == fusion
+    _, found_again = reopened.search("yoga stretching", documents[1].vector, k=4)
+    assert [doc.id for doc in found_again] == ids
+
+
+def test_hybrid_dense_ranking_skips_replaced_hnsw_vectors():
+    """Старый вектор обновлённого документа не попадает в плотный ранжир гибридного индекса"""
+    from app.services.hybrid_index import HybridIndex
+
+    index = HybridIndex(VectorDBConfig(dimension=DIMENSION, index_type=IndexType.HNSW))
+    documents = _hybrid_documents()
+    index.add_documents(documents)
+    index.add_documents([Document(id="2", content="running", vector=documents[1].vector)])
+
+    (ranking,) = index.search_dense(documents[2].vector.reshape(1, -1), k=4)
+    # An exact match (score 0) could only be the stale vector of doc 2
+    assert ranking and all(score < -1e-6 for score, _ in ranking)
+
+
+def test_rrf_rewards_documents_found_by_both():
+    """RRF ставит выше документ, найденный обоими методами"""
+    from app.services.hybrid_index import HybridIndex
+
+    index = HybridIndex(VectorDBConfig(dimension=DIMENSION, index_type=IndexType.FLAT))
+    a, b, c = (Document(id=doc_id, content=doc_id) for doc_id in "abc")
+
+    scores, documents = index.fuse([(9.0, a), (5.0, b)], [(0.9, c), (0.8, b)], k=3)
+
+    assert [doc.id for doc in documents] == ["b", "a", "c"]
+    assert scores[0] == pytest.approx(1 / 62 + 1 / 62)
+
+
+@pytest.mark.parametrize(
+    "index_type", [IndexType.FLAT, IndexType.IVF_FLAT, IndexType.HNSW, IndexType.SQ8]
+)
+def test_delete_and_upsert_documents(index_type, tmp_path):
+    """Удалённые документы не находятся, обновлённые ищутся по новому вектору"""
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((120, DIMENSION)).astype("float32")
+    config = VectorDBConfig(
+        dimension=DIMENSION, index_type=index_type, nlist=4, nprobe=4,
+        train_points_per_centroid=10,
+    )
+    db = VectorDB(config)
+    db.add_documents(
+        [
+            Document(id=str(i), content=f"doc {i}", vector=v, metadata={"even": i % 2 == 0})
+            for i, v in enumerate(vectors)
+        ]
+    )
+
+    assert db.delete_documents(["0", "1", "missing"]) == ["0", "1"]
+    _, documents = db.search_batch(vectors[:2], k=5)
+    assert all(doc.id not in ("0", "1") for docs in documents for doc in docs)
+
+    # Doc 2 moves to doc 1's old vector
+    db.add_documents([Document(id="2", content="moved", vector=vectors[1], metadata={"even": False})])
+    assert db.search(vectors[1], k=1)[1][0].content == "moved"
+    _, found = db.search(vectors[2], k=5, metadata_filter={"even": True})
+    assert all(doc.id != "2" for doc in found)
+    # The replaced vector is not found without a filter either: the top hit
+    # would be doc 2 at distance 0
+    _, found = db.search(vectors[2], k=5)
+    assert found[0].id != "2"
+    assert len(db.documents) == 118
+
+    # A deleted document added again is only found by its new vector
+    db.delete_documents(["4"])
+    db.add_documents([Document(id="4", content="re-added", vector=vectors[0], metadata={"even": True})])
+    assert db.search(vectors[0], k=1)[1][0].content == "re-added"
+    _, found = db.search(vectors[4], k=5)
+    assert found[0].id != "4"
+
+    path = str(tmp_path / "programs")
+    db.save(path)
+    config.index_path = path
+    reopened = VectorDB(config)
+    assert reopened.get_document("0") is None
+    assert reopened.search(vectors[1], k=1)[1][0].content == "moved"
+    for stale, doc_id in ((2, "2"), (4, "4")):
+        _, found = reopened.search(vectors[stale], k=5)
+        assert found[0].id != doc_id
+
+    assert db.compaction_due(0.0)
+    db.compact()
+    assert db.tombstones == 0 and db.dead_positions == 0
+    assert db.index.ntotal == 118
+    assert db.search(vectors[1], k=1)[1][0].content == "moved"
+    _, found = db.search(vectors[3], k=1, metadata_filter={"even": False})
+    assert found[0].id == "3"
+
+
+def test_document_store_interns_metadata_and_compacts():
+    """Колоночное хранилище делит строки метаданных и перенумеровывает позиции"""
+    from app.services.storage import DocumentStore
+
+    store = DocumentStore()
+    positions = store.extend(
+        Document(
+            id=str(i),
+            content=f"doc {i}",
+            metadata={"level": "Beginner " + "x" * (i % 2), "equipment": ["Mat", "Band"]},
+        )
+        for i in range(6)
+    )
+    assert list(positions) == list(range(6))
+    assert store.metadata(0)["level"] is store.metadata(2)["level"]
+    assert store["3"].metadata == {"level": "Beginner x", "equipment": ["Mat", "Band"]}
+
+    assert store.delete("1") == 1 and store.delete("1") is None
+    store.extend([Document(id="4", content="doc 4 v2")])
+    assert store.dead == 2 and len(store) == 5
+
+    keep = store.compact()
+    assert keep.tolist() == [True, False, True, True, False, True, True]
+    assert list(store) == ["0", "2", "3", "5", "4"]
+    assert store.positions["4"] == 4 and store["4"].content == "doc 4 v2"
+
+
+@pytest.mark.parametrize("index_type", [IndexType.IVF_FLAT, IndexType.SQ8, IndexType.HNSW])
+def test_vectors_are_reconstructed_after_reload(index_type, tmp_path):
+    """Векторы не хранятся в документах и восстанавливаются из индекса после загрузки"""
+    rng = np.random.default_rng(3)
+    data = rng.standard_normal((120, DIMENSION)).astype("float32")
+    config = VectorDBConfig(
+        dimension=DIMENSION,
+        index_type=index_type,
+        nlist=2,
+        train_points_per_centroid=20,
+        index_path=str(tmp_path / "programs"),
+    )
+    db = VectorDB(config)
+    db.add_documents(
+        [Document(id=str(i), content=f"doc {i}", vector=v) for i, v in enumerate(data)]
+    )
+    db.delete_documents(["5"])
+    db.save(config.index_path)
+
+    reopened = VectorDB(config)
+    assert reopened.get_document("6").vector is None
+    assert reopened.get_vector("5") is None
+    atol = 0.1 if index_type == IndexType.SQ8 else 1e-5
+    assert np.allclose(reopened.get_vector("6"), data[6], atol=atol)
+
+    # Rebuilding from the stored vectors keeps search exact for exact codecs
+    reopened.add_documents([Document(id="new", content="new", vector=data[0] + 5)])
+    reopened.compact()
+    _, found = reopened.search(data[7], k=1, nprobe=2)
+    assert found[0].id == "7"
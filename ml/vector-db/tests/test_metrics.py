@@ -0,0 +1,29 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from app.services.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Гистограмма выводится в текстовом формате Prometheus с накопленными бакетами"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    counter = registry.counter("hits_total", "Hits.", ("result",))
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="embed")
+    counter.inc(2, result='memory "hit"')
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{stage="embed",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="embed",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="embed",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="embed"} 3.65' in lines
+    assert 'latency_seconds_count{stage="embed"} 4' in lines
+    assert 'hits_total{result="memory \\"hit\\""} 2.0' in lines
@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from typing import List, Union
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+
+from app.api.service import VectorDBService
+from app.services.embedder.base import BaseEmbedder
+from app.services.document import Document
+from app.services.locks import ReadWriteLock
+
+DIMENSION = 8
+
+
+class SlowEmbedder(BaseEmbedder):
+    """Эмбеддер с задержкой, имитирующей сетевой вызов"""
+
+    model_name = "slow"
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        return np.array([self._vector(text) for text in texts], dtype=np.float32)
+
+    async def aencode(self, texts, executor=None, **kwargs) -> np.ndarray:
+        await asyncio.sleep(self.delay)
+        return self.encode(texts)
+
+    @staticmethod
+    def _vector(text: str) -> List[float]:
+        rng = np.random.default_rng(sum(text.encode("utf-8")))
+        return rng.random(DIMENSION).tolist()
+
+    def get_dimension(self) -> int:
+        return DIMENSION
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = VectorDBService(
+        data_dir=str(tmp_path), default_embedder="bm25", default_embedder_type="bm25"
+    )
+    service.embedders["slow"] = SlowEmbedder()
+    service.default_embedder = "slow"
+    yield service
+    service.close()
+
+
+def test_read_write_lock_excludes_writers():
+    """Читатели работают параллельно, писатель - монопольно"""
+    lock = ReadWriteLock()
+    events: List[str] = []
+
+    lock.acquire_read()
+    lock.acquire_read()
+
+    writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("write")))
+    writer.start()
+    time.sleep(0.05)
+    assert events == []  # writer waits for both readers
+
+    # A waiting writer blocks new readers
+    reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read")))
+    reader.start()
+    time.sleep(0.05)
+    assert events == []
+
+    lock.release_read()
+    lock.release_read()
+    writer.join(timeout=1)
+    assert events == ["write"]
+
+    lock.release_write()
+    reader.join(timeout=1)
+    assert events == ["write", "read"]
+
+
+def test_concurrent_embedding_does_not_serialize_requests(service):
+    """Эмбеддинг не блокирует цикл событий: запросы идут параллельно"""
+
+    async def run():
+        await service.create_index("programs", DIMENSION, index_type="Flat")
+        await service.add_documents(
+            "programs",
+            [{"id": str(i), "content": f"program {i}"} for i in range(20)],
+        )
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                service.search("programs", query_text=f"program {i}", k=1)
+                for i in range(20)
+            )
+        )
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+
+    # 20 sequential embeddings would take >= 1s
+    assert elapsed < 0.5
+    assert [documents[0].id for _, documents, _ in results] == [
+        str(i) for i in range(20)
+    ]
+
+
+def test_searches_run_alongside_ingest(service):
+    """Поиск и добавление документов в одном индексе не мешают друг другу"""
+
+    async def run():
+        await service.create_index("programs", DIMENSION, index_type="Flat")
+        await service.add_documents(
+            "programs", [{"id": "seed", "content": "seed program"}]
+        )
+
+        adds = [
+            service.add_documents(
+                "programs",
+                [{"id": f"{batch}-{i}", "content": f"p {batch} {i}"} for i in range(10)],
+            )
+            for batch in range(5)
+        ]
+        searches = [
+            service.search("programs", query_vector=[0.5] * DIMENSION, k=3)
+            for _ in range(20)
+        ]
+        return await asyncio.gather(*adds, *searches)
+
+    results = asyncio.run(run())
+
+    assert all(count == 10 for count, _ in results[:5])
+    assert all(documents for _, documents, _ in results[5:])
+    assert len(service.indices["programs"].documents) == 51
+
+
+def test_close_saves_writes_still_in_flight(tmp_path):
+    """close() дожидается записей в пуле и только потом сохраняет индексы"""
+    service = VectorDBService(
+        data_dir=str(tmp_path), default_embedder="bm25", default_embedder_type="bm25"
+    )
+    asyncio.run(service.create_index("programs", 0, index_type="BM25"))
+    service._executor.submit(time.sleep, 0.1)  # keeps the writes below queued
+    for batch in range(5):
+        documents = [
+            Document(id=f"{batch}-{i}", content=f"yoga program {batch} {i}")
+            for i in range(10)
+        ]
+        service._executor.submit(service._write_documents, "programs", documents)
+    service.close()
+
+    restarted = VectorDBService(
+        data_dir=str(tmp_path), default_embedder="bm25", default_embedder_type="bm25"
+    )
+    try:
+        assert len(restarted.indices["programs"].documents) == 50
+    finally:
+        restarted.close()
+
+
+def test_aclose_closes_async_api_clients(tmp_path):
+    """aclose() закрывает httpx-клиенты API-эмбеддеров, в т.ч. за кэшем"""
+    from app.services.embedder.api import KlusterAIEmbedder
+    from app.services.embedder.cache import CachedEmbedder
+
+    service = VectorDBService(
+        data_dir=str(tmp_path), default_embedder="bm25", default_embedder_type="bm25"
+    )
+    embedder = KlusterAIEmbedder(
+        api_key="test", api_url="http://127.0.0.1:9/embeddings", dimension=DIMENSION
+    )
+    service.embedders["api"] = CachedEmbedder(embedder)
+
+    async def run():
+        client = embedder._get_async_client()
+        await service.aclose()
+        return client
+
+    client = asyncio.run(run())
+    assert client.is_closed
+    assert embedder._async_client is None
+
+
+def test_periodic_checkpoint_saves_idle_writes(tmp_path, monkeypatch):
+    """Фоновая задача сохраняет записи, после которых новых не было"""
+    monkeypatch.setenv("CHECKPOINT_INTERVAL_SECONDS", "0.1")
+    monkeypatch.setenv("CHECKPOINT_BATCH_SIZE", "0")
+    service = VectorDBService(
+        data_dir=str(tmp_path), default_embedder="bm25", default_embedder_type="bm25"
+    )
+
+    async def run():
+        await service.create_index("programs", 0, index_type="BM25")
+        await service.add_documents("programs", [{"id": "1", "content": "yoga"}])
+        task = asyncio.create_task(service.checkpoint_periodically())
+        await asyncio.sleep(0.3)
+        task.cancel()
+        return service.indices.pending_writes("programs")
+
+    try:
+        assert asyncio.run(run()) == 0
+        restarted = VectorDBService(
+            data_dir=str(tmp_path), default_embedder="bm25", default_embedder_type="bm25"
+        )
+        assert len(restarted.indices["programs"].documents) == 1
+        restarted.close()
+    finally:
+        service.close()
+
+
+def test_delete_index_rejects_later_requests(service):
+    """После удаления индекса запросы получают ValueError"""
+
+    async def run():
+        await service.create_index("programs", 0, index_type="BM25")
+        await service.add_documents("programs", [{"id": "1", "content": "yoga"}])
+        await service.delete_index("programs")
+        await service.search("programs", query_text="yoga")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_hybrid_index_search(service):
+    """Гибридный индекс: создание, добавление и поиск через сервис"""
+
+    async def run():
+        await service.create_index(
+            "programs", DIMENSION, index_type="HYBRID", dense_index_type="Flat"
+        )
+        await service.add_documents(
+            "programs",
+            [
+                {"id": "1", "content": "yoga for beginners"},
+                {"id": "2", "content": "powerlifting program"},
+                {"id": "3", "content": "morning yoga flow"},
+            ],
+        )
+        single = await service.search("programs", query_text="yoga", k=2)
+        batch = await service.search_batch(
+            "programs", [{"query_text": "yoga"}, {"query_text": "powerlifting"}], k=2
+        )
+        return single, batch
+
+    (scores, documents, _), batch = asyncio.run(run())
+
+    assert {doc.id for doc in documents} == {"1", "3"}
+    assert scores == sorted(scores, reverse=True)
+    assert batch[1][1][0].id == "2"
+    assert service.get_health_info()["indices"]["programs"]["index_type"] == "Hybrid"
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.search("programs", query_vector=[0.5] * DIMENSION))
+
+
+def test_delete_and_upsert_documents_with_background_compaction(service):
+    """Удаление и upsert через сервис, компакция запускается в фоне"""
+    service.compaction_threshold = 0.1
+
+    async def run():
+        await service.create_index("programs", DIMENSION, index_type="HNSW")
+        await service.add_documents(
+            "programs", [{"id": str(i), "content": f"program {i}"} for i in range(10)]
+        )
+        deleted = await service.delete_documents("programs", ["3", "missing"])
+        await service.upsert_documents(
+            "programs", [{"id": "4", "content": "program 3"}]
+        )
+        results = await service.search("programs", query_text="program 3", k=2)
+        return deleted, results
+
+    (deleted, not_found), (_, documents, _) = asyncio.run(run())
+
+    assert deleted == ["3"] and not_found == ["missing"]
+    assert documents[0].id == "4" and "3" not in [doc.id for doc in documents]
+
+    # The compaction queued behind the writes rebuilds the HNSW graph
+    deadline = time.monotonic() + 5
+    while service._compacting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    db = service.indices["programs"]
+    assert db.tombstones == 0 and db.index.ntotal == 9
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.upsert_documents("programs", [{"content": "no id"}]))
+
+
+def test_cursor_pagination_and_export(service):
+    """Курсорная пагинация устойчива к записям, экспорт отдаёт все документы постранично"""
+    service.export_batch_size = 4
+
+    async def run():
+        await service.create_index("programs", DIMENSION, index_type="FLAT")
+        await service.add_documents(
+            "programs", [{"id": f"{i:02d}", "content": f"program {i}"} for i in range(10)]
+        )
+        first, total, cursor = await service.get_index_documents("programs", limit=3)
+        # Writes between pages neither repeat nor skip documents after the cursor
+        await service.delete_documents("programs", ["01", "04"])
+        await service.upsert_documents("programs", [{"id": "00", "content": "updated"}])
+        second, _, next_cursor = await service.get_index_documents(
+            "programs", limit=3, cursor=cursor
+        )
+        by_offset, _, _ = await service.get_index_documents("programs", limit=2, offset=2)
+        exported = [doc async for doc in service.export_index_documents("programs")]
+        return first, total, cursor, second, next_cursor, by_offset, exported
+
+    first, total, cursor, second, next_cursor, by_offset, exported = asyncio.run(run())
+
+    assert [doc.id for doc in first] == ["00", "01", "02"] and total == 10
+    assert cursor == "02"
+    assert [doc.id for doc in second] == ["03", "05", "06"] and next_cursor == "06"
+    assert [doc.id for doc in by_offset] == ["03", "05"]
+    assert [doc.id for doc in exported] == ["00", "02", "03", "05", "06", "07", "08", "09"]
+    assert exported[0].content == "updated"
+
+    with pytest.raises(ValueError):
+        service.export_index_documents("missing")
+
+
+def test_search_records_stage_timings(service):
+    """Этапы поиска попадают в гистограммы и в трассировку запроса"""
+    from app.services.metrics import STAGE_SECONDS, start_trace
+
+    service.embedder_types["slow"] = "api"
+    before = STAGE_SECONDS.count(stage="index_search", kind="FLAT")
+
+    async def run():
+        await service.create_index("programs", DIMENSION, index_type="FLAT")
+        await service.add_documents(
+            "programs", [{"id": str(i), "content": f"program {i}"} for i in range(5)]
+        )
+        trace = start_trace()
+        await service.search("programs", query_text="program 3", k=2)
+        return trace
+
+    trace = asyncio.run(run())
+
+    assert set(trace.stages) == {"embed", "index_search", "materialize"}
+    # Эмбеддер ждёт 50 мс, поиск во Flat-индексе из 5 векторов намного быстрее
+    assert trace.stages["embed"] >= 0.04 > trace.stages["index_search"]
+    assert STAGE_SECONDS.count(stage="index_search", kind="FLAT") == before + 1
+    assert STAGE_SECONDS.count(stage="embed", kind="api") >= 2
+    assert "index_search;dur=" in trace.server_timing(total=0.1)
@@ -1,7 +1,7 @@
 import pytest
 import sys
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 
 # Получаем абсолютный путь к корню проекта
@@ -64,11 +64,11 @@ def test_get_embedding_success():
         mock_embedder_instance.embed.return_value = TEST_EMBEDDINGS
         mock_embedder.return_value = mock_embedder_instance
         
-        mock_service.get_embeddings.return_value = (
+        mock_service.get_embeddings = AsyncMock(return_value=(
             TEST_EMBEDDINGS,
             TEST_DIMENSION,
             "BAAI/bge-small-en-v1.5"
-        )
+        ))
 
         # 3. Выполняем запрос
         response = client.post(
@@ -93,6 +93,25 @@ def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"  # Changed from "OK" to "healthy"
+
+
+def test_health_reports_embedder_pools():
+    """Статистика пулов эмбеддеров попадает в ответ /health"""
+    pools = {"default": {"workers": 2, "batches": 3, "mean_batch_size": 4.0}}
+    with patch('app.api.endpoints.vector_service') as mock_service:
+        mock_service.get_health_info.return_value = {
+            "status": "healthy",
+            "timestamp": "2026-01-01T00:00:00",
+            "version": "1.0.0",
+            "indices": {},
+            "loaded_embedders": ["default"],
+            "embedder_pools": pools,
+            "config": {},
+        }
+        response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["embedder_pools"] == pools
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -395,3 +414,57 @@ def test_get_document_not_found():
         response = client.get(f"/indices/{TEST_INDEX_NAME}/documents/invalid_id")
         assert response.status_code == 404
 
+
+
+def test_search_batch_success():
+    """Тест пакетного поиска"""
+    from app.services.document import Document
+
+    docs = [Document(id=d["id"], content=d["content"], metadata=d["metadata"])
+            for d in TEST_DOCUMENTS]
+    with patch('app.api.endpoints.vector_service') as mock_service:
+        mock_service.search_batch = AsyncMock(return_value=[
+            ([0.1, 0.2], docs, 1.5),
+            ([0.3], docs[:1], 1.5),
+        ])
+        response = client.post(
+            "/search_batch",
+            json={
+                "index_name": TEST_INDEX_NAME,
+                "queries": [
+                    {"query_text": "sample"},
+                    {"query_vector": TEST_QUERY_VECTOR},
+                ],
+                "k": 2,
+            },
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [len(r["results"]) for r in body["results"]] == [2, 1]
+        assert body["results"][0]["results"][0]["id"] == "1"
+        assert body["query_time_ms"] == pytest.approx(3.0)
+
+
+def test_search_batch_requires_queries():
+    """Пустой список запросов отклоняется валидацией"""
+    response = client.post(
+        "/search_batch",
+        json={"index_name": TEST_INDEX_NAME, "queries": []},
+    )
+    assert response.status_code == 422
+
+
+def test_metrics_endpoint_and_trace_header():
+    """/metrics отдаёт гистограммы по маршрутам, X-Trace включает Server-Timing"""
+    traced = client.get("/health", headers={"X-Trace": "1"})
+    untraced = client.get("/health")
+
+    assert "total;dur=" in traced.headers["Server-Timing"]
+    assert "Server-Timing" not in untraced.headers
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE vector_db_stage_seconds histogram" in response.text
+    assert 'vector_db_request_seconds_count{method="GET",route="/health",status="200"}' in response.text